@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import ai_email, resume, config
+from app.api.v1.endpoints import admin, ai_email, resume, config, campaign, reply, contact, email_template
 
 api_router = APIRouter()
 
@@ -20,4 +20,34 @@ api_router.include_router(
 api_router.include_router(
     config.router,
     tags=["Configuration"]
-)
\ No newline at end of file
+)
+
+# Registering the Campaign routes
+api_router.include_router(
+    campaign.router,
+    tags=["Campaigns"]
+)
+
+# Registering the Reply routes
+api_router.include_router(
+    reply.router,
+    tags=["Replies"]
+)
+
+# Registering the Contact routes
+api_router.include_router(
+    contact.router,
+    tags=["Contacts"]
+)
+
+# Registering the Email Template routes
+api_router.include_router(
+    email_template.router,
+    tags=["Templates"]
+)
+
+# Registering the Admin (profiling) routes
+api_router.include_router(
+    admin.router,
+    tags=["Admin"]
+)
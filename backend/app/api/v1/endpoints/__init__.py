@@ -1,3 +1,3 @@
-from . import ai_email, resume
+from . import ai_email, resume, campaign, reply, contact, email_template
 
-__all__ = ["ai_email", "resume"]
+__all__ = ["ai_email", "resume", "campaign", "reply", "contact", "email_template"]
@@ -0,0 +1,85 @@
+import os
+import secrets
+import tempfile
+import time
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from app.core.config import get_settings
+from app.core.profiling import memory_report, memory_snapshot, profile_lock, sample_for
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """True when ADMIN_TOKEN is configured and `token` matches it."""
+    expected = get_settings().ADMIN_TOKEN
+    return bool(expected and token) and secrets.compare_digest(token.encode(), expected.encode())
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    if not get_settings().ADMIN_TOKEN:
+        # Profiling stays invisible unless an admin token is configured
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Missing or invalid {ADMIN_TOKEN_HEADER}")
+
+
+def artifact(content, filename: str, media_type: str = "text/plain") -> Response:
+    return Response(content, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "X-Worker-Pid": str(os.getpid()),
+    })
+
+
+def _stamp() -> str:
+    return f"{os.getpid()}-{time.strftime('%Y%m%dT%H%M%S')}"
+
+
+def _exclusive():
+    if not profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running in this worker")
+
+
+# Sync routes: they sleep in the threadpool while the process keeps serving
+
+@router.get("/profile/cpu", dependencies=[Depends(require_admin)])
+def profile_cpu(
+    seconds: float = Query(10, gt=0, le=300),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    format: str = Query("folded", pattern="^(folded|text)$"),
+    include_idle: bool = False,
+):
+    """Sample every thread of this worker for `seconds`; folded stacks or a text summary."""
+    _exclusive()
+    try:
+        profile = sample_for(seconds, interval_ms / 1000, include_idle)
+    finally:
+        profile_lock.release()
+    if format == "text":
+        return artifact(profile.summary(), f"cpu-{_stamp()}.txt")
+    return artifact(profile.folded(), f"cpu-{_stamp()}.folded")
+
+
+@router.get("/profile/memory", dependencies=[Depends(require_admin)])
+def profile_memory(
+    seconds: float = Query(10, ge=0, le=300),
+    limit: int = Query(30, ge=1, le=500),
+    frames: int = Query(1, ge=1, le=50),
+    format: str = Query("text", pattern="^(text|raw)$"),
+):
+    """tracemalloc snapshot of this worker; `raw` loads with tracemalloc.Snapshot.load()."""
+    _exclusive()
+    try:
+        after, before = memory_snapshot(seconds, frames)
+    finally:
+        profile_lock.release()
+    if format == "text":
+        return artifact(memory_report(after, before, seconds, limit), f"memory-{_stamp()}.txt")
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "snapshot")
+        after.dump(path)
+        with open(path, "rb") as handle:
+            content = handle.read()
+    return artifact(content, f"memory-{_stamp()}.tracemalloc", "application/octet-stream")
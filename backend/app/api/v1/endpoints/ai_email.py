@@ -1,21 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.core.database import get_db
 from app.schemas.email import AIPromptRequest, EmailResponse, BulkEmailRequest
-from app.services.ai_service import AIService
-from app.services.email_service import EmailService
+from app.schemas.campaign import BulkSendQueued
+from app.services.ai_service import AIService, get_ai_service
+from app.services.campaign_queue import campaign_queue
 
 router = APIRouter()
 
 @router.post("/generate-content", response_model=EmailResponse)
-async def generate_ai_email(request: AIPromptRequest, ai_service: AIService = Depends(AIService)):
+async def generate_ai_email(request: AIPromptRequest, ai_service: AIService = Depends(get_ai_service)):
     content = await ai_service.generate_email(request.prompt, request.context)
     return {"content": content}
 
-@router.post("/send-bulk")
-async def send_bulk(request: BulkEmailRequest, email_service: EmailService = Depends(EmailService)):
+@router.post("/generate-content/stream")
+async def stream_ai_email(request: AIPromptRequest, ai_service: AIService = Depends(get_ai_service)):
+    """Stream the generated email as server-sent events ("delta" chunks, then "done")."""
+    async def events():
+        try:
+            async for delta in ai_service.stream_email(request.prompt, request.context):
+                yield f"data: {json.dumps({'delta': delta})}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/generate-content/stats")
+def ai_cache_stats(ai_service: AIService = Depends(get_ai_service)):
+    """Cache hit ratio and upstream latency saved by the AI response cache."""
+    return ai_service.stats()
+
+@router.post("/send-bulk", response_model=BulkSendQueued, status_code=status.HTTP_202_ACCEPTED)
+def send_bulk(request: BulkEmailRequest, db: Session = Depends(get_db)):
+    """Queue a bulk send; poll /campaigns/{job_id}/progress for delivery status."""
     try:
-        success = email_service.send_bulk_emails(request.hr_emails, request.subject, request.body)
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to send emails")
-        return {"status": "Success", "sent_to": len(request.hr_emails)}
+        campaign = campaign_queue.enqueue(
+            db, request.hr_emails, request.subject, request.body, name=request.campaign_name
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Email sending error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Email queueing error: {str(e)}")
+    return {"status": campaign.status, "job_id": campaign.id, "recipient_count": campaign.recipient_count}
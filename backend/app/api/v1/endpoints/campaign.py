@@ -0,0 +1,117 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.utils import BaseRepository, set_next_cursor
+from app.models.campaign import Campaign
+from app.models.contact import Contact
+from app.models.email_template import EmailTemplate
+from app.schemas.campaign import BulkSendQueued, CampaignListItem, CampaignProgress, CampaignStats, PersonalizedCampaignRequest, TemplateCampaignRequest
+from app.services.campaign_queue import campaign_queue
+from app.services.campaign_stats import campaign_stats
+from app.services.personalization_service import personalization_pipeline
+from app.services.template_engine import TemplateSyntaxError, template_engine
+
+router = APIRouter(prefix="/campaigns", tags=["campaigns"])
+
+@router.get("/", response_model=list[CampaignListItem])
+def list_campaigns(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """Get a page of campaigns, newest first (without their bodies)."""
+    repo = BaseRepository(Campaign, db)
+    campaigns, next_cursor = repo.get_page(limit, cursor, columns=CampaignListItem.model_fields, descending=True)
+    set_next_cursor(response, next_cursor)
+    return campaigns
+
+def create_personalized_campaign(db: Session, request: PersonalizedCampaignRequest) -> Campaign:
+    contacts = db.query(Contact.email, Contact.id).filter(Contact.id.in_(set(request.contact_ids))).all()
+    if not contacts:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No matching contacts found")
+    contact_ids = {email: contact_id for email, contact_id in contacts}
+    return campaign_queue.enqueue(
+        db,
+        list(contact_ids),
+        request.subject,
+        request.body,
+        name=request.campaign_name,
+        contact_ids=contact_ids,
+        drafting=True,
+    )
+
+@router.post("/personalized", response_model=BulkSendQueued, status_code=status.HTTP_202_ACCEPTED)
+async def send_personalized(request: PersonalizedCampaignRequest, db: Session = Depends(get_db)):
+    """Queue a campaign whose emails are personalised per contact while it sends."""
+    campaign = await run_in_threadpool(create_personalized_campaign, db, request)
+    personalization_pipeline.start(campaign.id, request.instructions or "")
+    return {"status": campaign.status, "job_id": campaign.id, "recipient_count": campaign.recipient_count}
+
+@router.post("/from-template", response_model=BulkSendQueued, status_code=status.HTTP_202_ACCEPTED)
+def send_from_template(request: TemplateCampaignRequest, db: Session = Depends(get_db)):
+    """Queue a mail merge of a stored template over the given contacts."""
+    template = BaseRepository(EmailTemplate, db).get_or_404(request.template_id)
+    try:
+        compiled = template_engine.compile(template)
+    except TemplateSyntaxError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    contacts = db.query(Contact).filter(Contact.id.in_(set(request.contact_ids))).all()
+    if not contacts:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No matching contacts found")
+    campaign = campaign_queue.enqueue(
+        db,
+        [contact.email for contact in contacts],
+        template.subject,
+        template.body,
+        name=request.campaign_name or template.name,
+        contact_ids={contact.email: contact.id for contact in contacts},
+        contents={contact.email: compiled.render_contact(contact) for contact in contacts},
+    )
+    return {"status": campaign.status, "job_id": campaign.id, "recipient_count": campaign.recipient_count}
+
+@router.get("/{campaign_id}/progress", response_model=CampaignProgress)
+def get_campaign_progress(campaign_id: int, db: Session = Depends(get_db)):
+    """Get delivery progress for a queued bulk send."""
+    campaign = BaseRepository(Campaign, db).get_or_404(campaign_id)
+    total = campaign.recipient_count or 0
+    sent = campaign.sent_count or 0
+    failed = campaign.failed_count or 0
+    return {
+        "campaign_id": campaign.id,
+        "status": campaign.status,
+        "total": total,
+        "sent": sent,
+        "failed": failed,
+        "remaining": max(total - sent - failed, 0),
+    }
+
+@router.get("/{campaign_id}/stats", response_model=CampaignStats)
+def get_campaign_stats(
+    campaign_id: int,
+    buckets: int = Query(168, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """Get precomputed delivery/reply counters and time-bucketed activity for a campaign."""
+    campaign = BaseRepository(Campaign, db).get_or_404(campaign_id)
+    sent = campaign.sent_count or 0
+    failed = campaign.failed_count or 0
+    bounced = campaign.bounced_count or 0
+    replied = campaign.replied_count or 0
+    attempted = sent + failed
+    return {
+        "campaign_id": campaign.id,
+        "status": campaign.status,
+        "total": campaign.recipient_count or 0,
+        "sent": sent,
+        "failed": failed,
+        "bounced": bounced,
+        "replied": replied,
+        "delivery_rate": round((sent - bounced) / attempted, 4) if attempted else 0.0,
+        "bounce_rate": round(bounced / sent, 4) if sent else 0.0,
+        "reply_rate": round(replied / sent, 4) if sent else 0.0,
+        "bucket_minutes": campaign_stats.bucket_minutes,
+        "buckets": campaign_stats.buckets(db, campaign_id, limit=buckets),
+    }
@@ -2,8 +2,9 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 import smtplib
 import os
+import tempfile
 from pathlib import Path
-from app.core.config import get_settings, reload_settings
+from app.core.config import ENV_FILE, get_settings, reload_settings
 
 router = APIRouter()
 
@@ -14,25 +15,26 @@ class CredentialsModel(BaseModel):
     email_user: str
     email_password: str
 
-def get_env_file_path():
+def get_env_file_path() -> Path:
     """Get .env file path."""
-    backend_dir = Path(__file__).resolve().parent.parent.parent.parent.parent
-    return backend_dir / ".env"
+    return ENV_FILE
 
 def save_to_env_file(credentials: dict) -> None:
-    """Save credentials to .env file."""
+    """Save credentials to .env, keeping any other settings in it.
+
+    The file is replaced in one rename so workers watching it never read a
+    half-written version.
+    """
     env_file = get_env_file_path()
-    env_content = f"""GEMINI_API_KEY={credentials['gemini_api_key']}
-SMTP_SERVER={credentials['smtp_server']}
-SMTP_PORT={credentials['smtp_port']}
-EMAIL_USER={credentials['email_user']}
-EMAIL_PASSWORD={credentials['email_password']}
-DATABASE_URL=sqlite:///./email_tracker.db
-DEBUG=True
-"""
+    values = {name.upper(): str(value) for name, value in credentials.items()}
     try:
-        with open(env_file, 'w') as f:
-            f.write(env_content)
+        lines = env_file.read_text().splitlines() if env_file.exists() else []
+        kept = [line for line in lines if line.partition("=")[0].strip() not in values]
+        kept += [f"{name}={value}" for name, value in values.items()]
+        fd, tmp_path = tempfile.mkstemp(dir=env_file.parent, prefix=".env.")
+        with os.fdopen(fd, "w") as f:
+            f.write("\n".join(kept) + "\n")
+        os.replace(tmp_path, env_file)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save to .env: {str(e)}")
 
@@ -62,12 +64,9 @@ async def update_credentials(credentials: CredentialsModel):
         
         save_to_env_file(creds_dict)
         
-        os.environ['GEMINI_API_KEY'] = credentials.gemini_api_key
-        os.environ['SMTP_SERVER'] = credentials.smtp_server
-        os.environ['SMTP_PORT'] = str(credentials.smtp_port)
-        os.environ['EMAIL_USER'] = credentials.email_user
-        os.environ['EMAIL_PASSWORD'] = credentials.email_password
-        
+        # Saved credentials win over the environment (see load_settings); this
+        # rebuilds the SMTP pool and Gemini client here, and the other workers
+        # pick up the changed .env within SETTINGS_CHECK_SECONDS
         reload_settings()
         
         return {"message": "Credentials saved successfully"}
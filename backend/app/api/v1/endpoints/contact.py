@@ -0,0 +1,53 @@
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.utils import BaseRepository, set_next_cursor
+from app.models.contact import Contact
+from app.schemas.contact import ContactImportResponse, ContactResponse
+from app.services.contact_import import ContactImporter, iter_csv_rows, iter_xlsx_rows
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/contacts", tags=["contacts"])
+
+@router.get("/", response_model=list[ContactResponse])
+def list_contacts(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """Get a page of contacts."""
+    repo = BaseRepository(Contact, db)
+    contacts, next_cursor = repo.get_page(limit, cursor, columns=ContactResponse.model_fields)
+    set_next_cursor(response, next_cursor)
+    return contacts
+
+@router.post("/import", response_model=ContactImportResponse)
+def import_contacts(
+    file: UploadFile = File(...),
+    update_existing: bool = True,
+    db: Session = Depends(get_db),
+):
+    """Import contacts from a CSV or XLSX file with an email column."""
+    filename = (file.filename or "").lower()
+    if filename.endswith(".xlsx"):
+        rows = iter_xlsx_rows(file.file)
+    elif filename.endswith(".csv") or file.content_type in ("text/csv", "application/vnd.ms-excel"):
+        rows = iter_csv_rows(file.file)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported file type. Upload a .csv or .xlsx file."
+        )
+    try:
+        result = ContactImporter().import_rows(db, rows, update_existing=update_existing)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    logger.info(
+        "Imported %d contacts from %s (%d rejected, %.0f rows/sec)",
+        result.written, file.filename, result.rejected, result.rows_per_second,
+    )
+    return result.to_dict()
@@ -0,0 +1,22 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.utils import BaseRepository, set_next_cursor
+from app.models.email_template import EmailTemplate
+from app.schemas.email_template import EmailTemplateListItem
+
+router = APIRouter(prefix="/templates", tags=["templates"])
+
+@router.get("/", response_model=list[EmailTemplateListItem])
+def list_templates(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """Get a page of email templates (without their bodies)."""
+    repo = BaseRepository(EmailTemplate, db)
+    templates, next_cursor = repo.get_page(limit, cursor, columns=EmailTemplateListItem.model_fields)
+    set_next_cursor(response, next_cursor)
+    return templates
@@ -0,0 +1,23 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.models.reply import Reply
+from app.schemas.reply import ReplyResponse
+
+router = APIRouter(prefix="/replies", tags=["replies"])
+
+@router.get("/", response_model=list[ReplyResponse])
+def list_replies(
+    campaign_id: Optional[int] = None,
+    contact_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """Get the most recent tracked replies, optionally for one campaign or contact."""
+    query = db.query(Reply)
+    if campaign_id is not None:
+        query = query.filter(Reply.campaign_id == campaign_id)
+    if contact_id is not None:
+        query = query.filter(Reply.contact_id == contact_id)
+    return query.order_by(Reply.id.desc()).limit(limit).all()
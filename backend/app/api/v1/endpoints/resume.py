@@ -1,62 +1,75 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.utils import BaseRepository
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.utils import AsyncBaseRepository, set_next_cursor
 from app.models.resume import Resume
 from app.schemas.resume import ResumeCreate, ResumeUpdate, ResumeResponse, ResumeListItem
 
 router = APIRouter(prefix="/resumes", tags=["resumes"])
 
-def check_duplicate_name(db: Session, name: str, exclude_id: int = None) -> None:
+RESUME_PAGE_SIZE = 100
+
+async def check_duplicate_name(db: AsyncSession, name: str, exclude_id: int = None) -> None:
     """Check if resume name already exists."""
-    query = db.query(Resume).filter(Resume.name == name)
+    query = select(Resume.id).where(Resume.name == name)
     if exclude_id:
-        query = query.filter(Resume.id != exclude_id)
-    if query.first():
+        query = query.where(Resume.id != exclude_id)
+    if (await db.execute(query.limit(1))).first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Resume with this name already exists"
         )
 
 @router.post("/", response_model=ResumeResponse, status_code=status.HTTP_201_CREATED)
-def create_resume(resume: ResumeCreate, db: Session = Depends(get_db)):
+async def create_resume(resume: ResumeCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new resume."""
-    check_duplicate_name(db, resume.name)
+    await check_duplicate_name(db, resume.name)
     db_resume = Resume(name=resume.name, content=resume.content)
-    repo = BaseRepository(Resume, db)
-    return repo.create(db_resume)
+    repo = AsyncBaseRepository(Resume, db)
+    return await repo.create(db_resume)
 
 @router.get("/", response_model=list[ResumeListItem])
-def list_resumes(db: Session = Depends(get_db)):
-    """Get all resumes (list view without full content)."""
-    repo = BaseRepository(Resume, db)
-    return repo.get_all()
+async def list_resumes(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get resumes (list view without full content); all of them unless `cursor` or `limit` asks for a page."""
+    if limit is None and cursor is not None:
+        limit = RESUME_PAGE_SIZE
+    repo = AsyncBaseRepository(Resume, db)
+    resumes, next_cursor = await repo.get_page(limit, cursor, columns=ResumeListItem.model_fields)
+    set_next_cursor(response, next_cursor)
+    return resumes
 
 @router.get("/{resume_id}", response_model=ResumeResponse)
-def get_resume(resume_id: int, db: Session = Depends(get_db)):
+async def get_resume(resume_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific resume by ID."""
-    repo = BaseRepository(Resume, db)
-    return repo.get_or_404(resume_id)
+    repo = AsyncBaseRepository(Resume, db)
+    return await repo.get_or_404(resume_id)
 
 @router.put("/{resume_id}", response_model=ResumeResponse)
-def update_resume(resume_id: int, resume: ResumeUpdate, db: Session = Depends(get_db)):
+async def update_resume(resume_id: int, resume: ResumeUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update a resume."""
-    repo = BaseRepository(Resume, db)
-    db_resume = repo.get_or_404(resume_id)
+    repo = AsyncBaseRepository(Resume, db)
+    db_resume = await repo.get_or_404(resume_id)
     
     if resume.name and resume.name != db_resume.name:
-        check_duplicate_name(db, resume.name, exclude_id=resume_id)
+        await check_duplicate_name(db, resume.name, exclude_id=resume_id)
         db_resume.name = resume.name
     
     if resume.content:
         db_resume.content = resume.content
     
-    return repo.update(db_resume)
+    return await repo.update(db_resume)
 
 @router.delete("/{resume_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_resume(resume_id: int, db: Session = Depends(get_db)):
+async def delete_resume(resume_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a resume."""
-    repo = BaseRepository(Resume, db)
-    db_resume = repo.get_or_404(resume_id)
-    repo.delete(db_resume)
+    repo = AsyncBaseRepository(Resume, db)
+    db_resume = await repo.get_or_404(resume_id)
+    await repo.delete(db_resume)
     return None
@@ -1,16 +1,72 @@
 from pydantic_settings import BaseSettings
 import os
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from dotenv import dotenv_values
+
+# The file update_credentials writes; every worker watches it for changes
+ENV_FILE = Path(__file__).resolve().parent.parent.parent / ".env"
+CREDENTIAL_FIELDS = ("GEMINI_API_KEY", "SMTP_SERVER", "SMTP_PORT", "EMAIL_USER", "EMAIL_PASSWORD")
 
 class Settings(BaseSettings):
     # API Keys
     GEMINI_API_KEY: str = ""
+    GEMINI_MODEL: str = "models/gemini-flash-latest"
+    AI_CACHE_SIZE: int = 256
+    AI_CACHE_TTL_SECONDS: int = 3600
+    AI_MAX_CONCURRENCY: int = 4
+    
+    # Per-contact personalisation
+    PERSONALIZE_BATCH_SIZE: int = 5
+    PERSONALIZE_CONCURRENCY: int = 3
+    PERSONALIZE_MAX_RETRIES: int = 4
+    PERSONALIZE_STALL_SECONDS: int = 300
     
     # Email Configuration
     SMTP_SERVER: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
     EMAIL_USER: str = ""
     EMAIL_PASSWORD: str = ""
+    SMTP_USE_TLS: bool = True
+    SMTP_TIMEOUT: int = 10
+    
+    # Reply checking
+    IMAP_SERVER: str = "imap.gmail.com"
+    IMAP_PORT: int = 993
+    IMAP_USE_SSL: bool = True
+    IMAP_MAILBOX: str = "INBOX"
+    REPLY_FETCH_MODE: str = "headers"  # headers (headers + 2KB of body) or full (RFC822)
+    REPLY_LISTENER_ENABLED: bool = False
+    REPLY_IDLE_SECONDS: int = 25 * 60  # re-issue IDLE before the server's 29-minute cutoff
+    REPLY_POLL_SECONDS: int = 300  # fallback for servers without IDLE
+    REPLY_LISTENER_LEASE_SECONDS: int = 90  # one worker holds the IDLE session; another takes over after this
+    
+    # Bulk delivery tuning (rates are messages/second, 0 = unlimited)
+    SMTP_POOL_SIZE: int = 4
+    SMTP_SEND_WORKERS: int = 4
+    SMTP_RATE_PER_CONNECTION: float = 0
+    SMTP_GLOBAL_RATE: float = 0  # whole account, per process
+    SMTP_GLOBAL_BURST: int = 1
+    SMTP_DOMAIN_RATE: float = 0  # per recipient domain
+    SMTP_DOMAIN_BURST: int = 5
+    SMTP_MAX_SCHEDULE_WAIT: float = 5  # longer waits defer the recipient to the retry queue
+    SMTP_DAILY_QUOTA: int = 0  # messages per rolling 24h across all workers, 0 = no cap (Gmail: 500)
+    SMTP_RETRY_MAX_ATTEMPTS: int = 5
+    SMTP_RETRY_BASE_SECONDS: float = 60
+    SMTP_RETRY_MAX_SECONDS: float = 3600
+    
+    # Background campaign queue
+    CAMPAIGN_QUEUE_WORKERS: int = 2
+    CAMPAIGN_QUEUE_POLL_SECONDS: float = 5
+    CAMPAIGN_LEASE_SECONDS: int = 120
+    CAMPAIGN_ERROR_RETRY_SECONDS: float = 30  # a campaign interrupted by a database error is resumed after this
+    CAMPAIGN_STATS_BUCKET_MINUTES: int = 60
+    SUPPRESSION_REFRESH_SECONDS: float = 10  # how often each process picks up addresses suppressed elsewhere
+    METRICS_REFRESH_SECONDS: float = 15  # how often each worker copies pool/queue/cache state into its gauges
     
     # Database Configuration
     # Use PostgreSQL for production, SQLite for development
@@ -18,26 +74,168 @@ class Settings(BaseSettings):
         "DATABASE_URL", 
         "sqlite:///./email_tracker.db"
     )
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # drop connections older than this (seconds, -1 = never)
+    DB_POOL_PRE_PING: bool = True  # PostgreSQL only
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
     
     # Frontend URL for CORS
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "")
     
     # App Configuration
     DEBUG: bool = False
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # json or text
+    LOG_SEND_SAMPLE_RATE: float = 0.01  # share of per-recipient "sent" lines kept; failures are always logged
+    LOG_SQL: bool = False  # log every SQL statement (sqlalchemy.engine at INFO)
+    ADMIN_TOKEN: str = ""  # enables /api/v1/admin and ?profile=1 for requests sending it as X-Admin-Token
+    SETTINGS_CHECK_SECONDS: float = 2  # how often each worker looks for a changed .env
     
     class Config:
-        env_file = ".env"
+        env_file = str(ENV_FILE)
         case_sensitive = True
 
-# Create initial settings instance
-settings = Settings()
+def load_settings(env_file: Path = ENV_FILE) -> Settings:
+    """Settings from the environment and .env; credentials saved to .env take precedence.
 
-def reload_settings():
-    """Reload settings from environment variables."""
+    update_credentials writes the credentials to .env, and every worker has
+    to end up with the same values whatever its own environment says.
+    """
+    saved = dotenv_values(env_file) if env_file.exists() else {}
+    overrides = {name: saved[name] for name in CREDENTIAL_FIELDS if saved.get(name) is not None}
+    return Settings(_env_file=env_file, **overrides)
+
+
+@dataclass
+class _Client:
+    fields: tuple
+    key: tuple
+    version: int
+    value: object
+    close: Optional[Callable]
+
+
+class SettingsRegistry:
+    """The current Settings and the clients built from them.
+
+    Clients (the SMTP pool, the Gemini client) are built once and handed
+    out until a reload changes one of the fields they were built from; the
+    stale client is then dropped and closed in the same step that swaps the
+    settings in. Workers find out about a reload done elsewhere by checking
+    the .env file's mtime and size, at most every SETTINGS_CHECK_SECONDS.
+    """
+
+    def __init__(self, env_file: Path = ENV_FILE):
+        self.env_file = env_file
+        self._lock = threading.RLock()
+        self._clients: Dict[str, _Client] = {}
+        self._listeners: List[Callable[[Settings], None]] = []
+        self._stamp = self._env_stamp()
+        self._next_check = 0.0
+        self.version = 0
+        self.settings = load_settings(env_file)
+
+    def _env_stamp(self):
+        try:
+            stat = self.env_file.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self) -> Settings:
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.settings.SETTINGS_CHECK_SECONDS
+            if self._env_stamp() != self._stamp:
+                with self._lock:
+                    # Another thread may have reloaded while this one waited
+                    if self._env_stamp() != self._stamp:
+                        return self.reload()
+        return self.settings
+
+    def reload(self) -> Settings:
+        """Re-read the environment and .env; clients whose inputs changed are closed."""
+        with self._lock:
+            self._stamp = self._env_stamp()
+            settings = load_settings(self.env_file)
+            stale = [
+                (name, client) for name, client in self._clients.items()
+                if client.key != tuple(getattr(settings, field) for field in client.fields)
+            ]
+            for name, _ in stale:
+                del self._clients[name]
+            self.settings = settings
+            self.version += 1
+            listeners = list(self._listeners)
+        for _, client in stale:
+            if client.close is not None:
+                client.close(client.value)
+        for listener in listeners:
+            listener(settings)
+        return settings
+
+    def client(self, name: str, fields: Sequence[str], build: Callable[[Settings], object],
+               close: Optional[Callable[[object], None]] = None, settings: Optional[Settings] = None):
+        """The client called `name`, built by `build(settings)` on first use.
+
+        It is rebuilt (and the old one closed) only when one of `fields`
+        differs. Callers passing their own `settings` get a client built from
+        those instead, replacing the shared one.
+        """
+        current = self.get()
+        shared = settings is None or settings is current
+        entry = self._clients.get(name)
+        if shared and entry is not None and entry.version == self.version:
+            return entry.value
+        with self._lock:
+            source = self.settings if shared else settings
+            key = tuple(getattr(source, field) for field in fields)
+            entry = self._clients.get(name)
+            if entry is not None and entry.key == key:
+                if shared:
+                    entry.version = self.version
+                return entry.value
+            # A client built from caller-supplied settings never takes the fast path above
+            client = _Client(tuple(fields), key, self.version if shared else -1, build(source), close)
+            self._clients[name] = client
+        if entry is not None and entry.close is not None:
+            entry.close(entry.value)
+        return client.value
+
+    def peek(self, name: str):
+        """The client called `name` if it has been built, without building it."""
+        entry = self._clients.get(name)
+        return entry.value if entry is not None else None
+
+    def subscribe(self, listener: Callable[[Settings], None]) -> None:
+        """Call `listener(settings)` after every reload, in the reloading thread."""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+
+settings_registry = SettingsRegistry()
+# Snapshot for code that reads settings at import time; kept current on reload
+settings = settings_registry.settings
+
+
+def _track_reload(new_settings: Settings) -> None:
     global settings
-    settings = Settings()
-    return settings
+    settings = new_settings
+
+
+settings_registry.subscribe(_track_reload)
+
+
+def reload_settings():
+    """Reload settings from environment variables and .env in this worker."""
+    return settings_registry.reload()
+
 
 def get_settings():
-    """Get current settings."""
-    return settings
\ No newline at end of file
+    """Get current settings, picking up a .env changed by another worker."""
+    return settings_registry.get()
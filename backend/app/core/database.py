@@ -1,17 +1,194 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from prometheus_client import Counter, Gauge
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.metrics import db_query_seconds, register_collector
 from app.models.base import Base
 
-# Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
-    echo=settings.DEBUG
+
+db_pool_connections = Gauge(
+    "db_pool_connections", "Pooled DB connections by state", ("engine", "state"), multiprocess_mode="livesum",
 )
+db_pool_checkouts = Counter("db_pool_checkouts", "Connection checkouts", ("engine",))
+db_pool_timeouts = Counter("db_pool_timeouts", "Checkouts that timed out waiting for a connection", ("engine",))
+db_pool_max_wait_seconds = Gauge(
+    "db_pool_max_wait_seconds", "Longest wait for a connection since start", ("engine",), multiprocess_mode="max",
+)
+
+
+class PoolMetrics:
+    """Checkout counts and time spent waiting for a pooled connection."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        (db_pool_timeouts if timed_out else db_pool_checkouts).labels(engine=self.label).inc()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "average_wait_ms": round(self.wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            }
+
+
+pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+
+class _TimedCheckout:
+    """Pool mixin that records how long each checkout waited for a connection."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    metrics = pool_metrics
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        # WAL lets readers run alongside the single writer; busy_timeout makes
+        # a second writer wait instead of failing with "database is locked"
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    finally:
+        cursor.close()
+
+
+TIMED_STATEMENTS = {"select", "insert", "update", "delete", "with"}
+
+
+def _instrument(db_engine, label: str) -> None:
+    """Time every statement the driver executes (db_query_duration_seconds)."""
 
-# Create session factory
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        verb = statement.lstrip()[:6].lower()
+        db_query_seconds.labels(
+            engine=label,
+            statement=verb if verb in TIMED_STATEMENTS else "other",
+        ).observe(time.perf_counter() - started)
+
+    def handle_error(exception_context):
+        stack = exception_context.connection.info.get("query_started") if exception_context.connection else None
+        if stack:
+            stack.pop()
+
+    event.listen(db_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(db_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(db_engine, "handle_error", handle_error)
+
+
+def _engine_options(url, poolclass) -> dict:
+    """Pool settings suited to the database backend."""
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            return {}
+        return {
+            "poolclass": poolclass,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+        }
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        # Detects connections the server closed while idle (restarts, idle timeouts)
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _is_sqlite_file(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def build_engine(database_url: str):
+    """Create the synchronous engine."""
+    url = make_url(database_url)
+    options = _engine_options(url, TimedQueuePool)
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+    db_engine = create_engine(url, **options)
+    if _is_sqlite_file(url):
+        event.listen(db_engine, "connect", _set_sqlite_pragmas)
+    _instrument(db_engine, "sync")
+    return db_engine
+
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def async_database_url(database_url: str):
+    """The same database, addressed through its asyncio driver (aiosqlite/asyncpg)."""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for '{url.get_backend_name()}'")
+    return url.set(drivername=driver)
+
+
+def build_async_engine(database_url: str):
+    """Create the asyncio engine used by async routes."""
+    url = async_database_url(database_url)
+    db_engine = create_async_engine(url, **_engine_options(url, TimedAsyncQueuePool))
+    if _is_sqlite_file(url):
+        event.listen(db_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    _instrument(db_engine.sync_engine, "async")
+    return db_engine
+
+
+# Create database engine
+engine = build_engine(settings.DATABASE_URL)
+
+async_engine = build_async_engine(settings.DATABASE_URL)
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 def get_db():
     """Dependency to get database session."""
@@ -21,6 +198,41 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Dependency to get an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def create_tables():
     """Create all database tables."""
     Base.metadata.create_all(bind=engine)
+
+def _pool_stats(db_engine, metrics: PoolMetrics) -> dict:
+    pool = db_engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=settings.DB_MAX_OVERFLOW,
+        )
+    stats.update(metrics.snapshot())
+    return stats
+
+def pool_stats() -> dict:
+    """Current pool occupancy plus checkout/wait-time counters for both engines."""
+    return {
+        "sync": _pool_stats(engine, pool_metrics),
+        "async": _pool_stats(async_engine.sync_engine, async_pool_metrics),
+    }
+
+def collect_pool_metrics():
+    for label, engine_stats in pool_stats().items():
+        for state in ("checked_out", "idle", "overflow"):
+            if state in engine_stats:
+                db_pool_connections.labels(engine=label, state=state).set(engine_stats[state])
+        db_pool_max_wait_seconds.labels(engine=label).set(engine_stats["max_wait_ms"] / 1000)
+
+register_collector(collect_pool_metrics)
@@ -0,0 +1,141 @@
+"""Structured logging that never writes from the calling thread.
+
+`configure_logging()` puts a QueueHandler on the root logger. Records are
+queued with their context and formatted and written by a QueueListener
+thread, so a log call in the send loop costs building the record and a
+queue put.
+
+Fields bound with `log_context(campaign_id=...)` are attached to every
+record logged inside the block, including from threads whose work was
+submitted with the context copied (see EmailService.send_each). Fields
+passed via `extra=` are emitted as well. LOG_FORMAT=json writes one JSON
+object per line; "text" is meant for local development.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+_context: ContextVar[dict] = ContextVar("log_context", default={})
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "context"}
+
+_listener = None
+_configure_lock = threading.Lock()
+
+
+@contextmanager
+def log_context(**fields):
+    """Attach `fields` to every record logged inside the block (this thread/task only)."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current_context() -> dict:
+    return _context.get()
+
+
+def record_fields(record: logging.LogRecord) -> dict:
+    """Bound context plus any `extra=` fields of a record."""
+    fields = dict(getattr(record, "context", None) or {})
+    fields.update((key, value) for key, value in vars(record).items() if key not in _STANDARD_ATTRS)
+    return fields
+
+
+class Sampler:
+    """Lets through one call in every `round(1 / rate)`; checked before a record is built.
+
+        if sent_sampler.hit():
+            logger.info("Email sent", extra={"recipient": r, "sampled_1_in": sent_sampler.every})
+    """
+
+    def __init__(self, rate: float):
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._count = 0
+
+    def hit(self) -> bool:
+        if not self.every:
+            return False
+        # Unlocked: a racing increment only shifts which call is sampled
+        self._count += 1
+        return (self._count - 1) % self.every == 0
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """Captures the log context and merges the arguments in the caller's thread; nothing else."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.context = _context.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(record_fields(record))
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = record_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+def configure_logging(settings) -> None:
+    """Route the root logger through a background writer; safe to call more than once."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+        # Unbounded so a slow stdout never blocks senders; records are small
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, ContextQueueHandler):
+                root.removeHandler(handler)
+        root.addHandler(ContextQueueHandler(log_queue))
+        root.setLevel(settings.LOG_LEVEL.upper())
+        # SQL statements only when asked for, and through the same pipeline
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO if settings.LOG_SQL else logging.WARNING)
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
@@ -0,0 +1,104 @@
+"""Prometheus metrics served at /metrics, pooled across gunicorn workers.
+
+Built on prometheus_client. When PROMETHEUS_MULTIPROC_DIR is set (the
+gunicorn config does this) each worker writes its samples to files in
+that directory and /metrics aggregates every worker's files, so any
+worker can answer a scrape. Without it, as under a single uvicorn
+process, the default in-process registry is served.
+
+Counters and histograms are updated inline on the hot paths (HTTP
+requests, SMTP, IMAP, Gemini and DB calls). Values that live elsewhere,
+such as pool occupancy, are copied into gauges by collectors, which every
+worker runs every METRICS_REFRESH_SECONDS and the scraping worker runs
+again just before rendering.
+"""
+
+import logging
+import os
+import threading
+from typing import Callable, List, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+_collectors: List[Callable[[], None]] = []
+_collectors_lock = threading.Lock()
+_refresher: Optional[threading.Thread] = None
+
+collector_errors = Counter(
+    "metrics_collector_errors", "Collectors that raised while updating their gauges", ("collector",)
+)
+
+
+def multiprocess_mode() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def register_collector(collector: Callable[[], None]) -> None:
+    """Add a callable that sets gauges from state kept elsewhere."""
+    with _collectors_lock:
+        if collector not in _collectors:
+            _collectors.append(collector)
+
+
+def collect() -> None:
+    for collector in list(_collectors):
+        try:
+            collector()
+        except Exception as e:
+            logger.warning("Metrics collector %s failed: %s", collector.__qualname__, e)
+            collector_errors.labels(collector=collector.__qualname__).inc()
+
+
+def start_collecting(interval: float) -> None:
+    """Run the collectors in the background, so workers that are not scraped stay current."""
+    global _refresher
+    if not multiprocess_mode() or interval <= 0 or (_refresher is not None and _refresher.is_alive()):
+        return
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            collect()
+
+    collect()
+    _refresher = threading.Thread(target=run, name="metrics-collector", daemon=True)
+    _refresher.start()
+
+
+def render() -> bytes:
+    collect()
+    if not multiprocess_mode():
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+http_request_seconds = Histogram(
+    "http_request_duration_seconds", "Time to produce the response headers, by route template",
+    ("method", "route", "status"),
+)
+smtp_operation_seconds = Histogram(
+    "smtp_operation_duration_seconds", "SMTP connect, login and per-message send time", ("operation",),
+)
+smtp_errors = Counter(
+    "smtp_errors", "Failed SMTP operations by reply code (0 = no reply)", ("operation", "code"),
+)
+imap_operation_seconds = Histogram(
+    "imap_operation_duration_seconds", "IMAP login, select, search and fetch round-trips", ("operation",),
+)
+gemini_request_seconds = Histogram(
+    "gemini_request_duration_seconds", "Upstream Gemini calls (streams until the last chunk)",
+    ("operation", "outcome"),
+)
+db_query_seconds = Histogram(
+    "db_query_duration_seconds", "Statement execution time on the DB driver", ("engine", "statement"),
+)
+campaign_events = Counter(
+    "campaign_events", "Campaign outcomes recorded", ("event_type",),
+)
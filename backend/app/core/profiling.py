@@ -0,0 +1,192 @@
+"""On-demand CPU and memory profiling of a running worker.
+
+`SamplingProfiler` snapshots every thread's Python stack with
+sys._current_frames() at a fixed interval from a background thread, so it
+sees the event loop, the threadpool running sync routes and the send,
+queue and IMAP threads alike, and costs nothing when not running. The
+result is a `Profile` that renders as folded stacks (flamegraph.pl,
+speedscope) or a plain-text summary.
+
+`memory_snapshot()` traces allocations with tracemalloc for a window and
+reports what is still allocated at the end of it, by source line.
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+# Leaf frames of threads parked in a wait rather than running code
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("socket.py", "readinto"),
+    ("ssl.py", "read"),
+    ("imaplib.py", "_get_line"),
+    ("thread.py", "_worker"),
+    ("handlers.py", "dequeue"),
+}
+_MEMORY_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+# One profile at a time per worker: samplers and tracemalloc both slow the process down
+profile_lock = threading.Lock()
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    parts = path.replace("\\", "/").rsplit("/", 2)
+    return f"{code.co_name} ({'/'.join(parts[-2:])}:{code.co_firstlineno})"
+
+
+@dataclass
+class Profile:
+    interval: float
+    started_at: float
+    duration: float = 0.0
+    samples: int = 0
+    idle_samples: int = 0
+    # (thread name, outermost frame, ..., innermost frame) -> samples
+    stacks: Counter = field(default_factory=Counter)
+
+    def folded(self) -> str:
+        """One `thread;frame;...;frame count` line per distinct stack."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, limit: int = 30) -> str:
+        busy = sum(self.stacks.values())
+        own: Counter = Counter()
+        total: Counter = Counter()
+        threads: Counter = Counter()
+        for (thread, *frames), count in self.stacks.items():
+            threads[thread] += count
+            if frames:
+                own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+
+        def table(title: str, counts: Counter) -> list:
+            lines = [f"\n{title}", f"{'samples':>8} {'%':>6}  function"]
+            for name, count in counts.most_common(limit):
+                lines.append(f"{count:>8} {count / busy * 100 if busy else 0:>5.1f}%  {name}")
+            return lines
+
+        lines = [
+            f"pid {os.getpid()}: {self.duration:.2f}s sampled every {self.interval * 1000:g}ms, "
+            f"{self.samples} thread samples ({busy} busy, {self.idle_samples} idle)",
+        ]
+        lines += table("Busy samples by thread", threads)
+        lines += table("Self (innermost frame)", own)
+        lines += table("Total (anywhere on the stack)", total)
+        return "\n".join(lines) + "\n"
+
+
+class SamplingProfiler:
+    """Samples the stacks of every thread in the process until stopped.
+
+        profiler = SamplingProfiler(interval=0.005)
+        profiler.start()
+        ...
+        profile = profiler.stop()
+    """
+
+    def __init__(self, interval: float = 0.005, include_idle: bool = False, ignore_threads: Tuple[int, ...] = ()):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.ignore_threads = set(ignore_threads)
+        self.profile: Optional[Profile] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.profile = Profile(self.interval, time.time())
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        self._thread.join()
+        self.profile.duration = time.time() - self.profile.started_at
+        return self.profile
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or ident in self.ignore_threads:
+                    continue
+                self._record(names.get(ident, f"thread-{ident}"), frame)
+
+    def _record(self, thread_name: str, frame) -> None:
+        profile = self.profile
+        profile.samples += 1
+        leaf = frame.f_code
+        if not self.include_idle and (os.path.basename(leaf.co_filename), leaf.co_name) in _IDLE_FRAMES:
+            profile.idle_samples += 1
+            return
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        stack.append(thread_name)
+        profile.stacks[tuple(reversed(stack))] += 1
+
+
+def sample_for(seconds: float, interval: float = 0.005, include_idle: bool = False) -> Profile:
+    """Profile the whole process for `seconds`, leaving out the calling thread."""
+    profiler = SamplingProfiler(interval, include_idle, ignore_threads=(threading.get_ident(),))
+    profiler.start()
+    try:
+        time.sleep(seconds)
+    finally:
+        profile = profiler.stop()
+    return profile
+
+
+def memory_snapshot(seconds: float, frames: int = 1) -> Tuple[tracemalloc.Snapshot, Optional[tracemalloc.Snapshot]]:
+    """Snapshot allocations after `seconds`, plus one from the start of the window.
+
+    If tracemalloc was off (the usual case) it is switched on for the window
+    only; the end snapshot then holds just what was allocated in the window
+    and is still alive, and no start snapshot is returned.
+    """
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(frames)
+    try:
+        before = None if started_here else tracemalloc.take_snapshot().filter_traces(_MEMORY_FILTERS)
+        time.sleep(seconds)
+        after = tracemalloc.take_snapshot().filter_traces(_MEMORY_FILTERS)
+    finally:
+        if started_here:
+            tracemalloc.stop()
+    return after, before
+
+
+def memory_report(after: tracemalloc.Snapshot, before: Optional[tracemalloc.Snapshot], seconds: float, limit: int = 30) -> str:
+    stats = after.statistics("lineno")
+    lines = [
+        f"pid {os.getpid()}: {sum(stat.size for stat in stats) / 1024:.1f} KiB in "
+        f"{sum(stat.count for stat in stats)} blocks "
+        + ("traced since startup" if before is not None else f"allocated during the {seconds:g}s window and still alive"),
+        "",
+        f"{'KiB':>10} {'blocks':>8}  line",
+    ]
+    lines += [f"{stat.size / 1024:>10.1f} {stat.count:>8}  {stat.traceback}" for stat in stats[:limit]]
+    if before is not None:
+        lines += ["", f"Growth over the {seconds:g}s window", f"{'KiB':>10} {'blocks':>8}  line"]
+        growth = [stat for stat in after.compare_to(before, "lineno") if stat.size_diff > 0]
+        lines += [f"{stat.size_diff / 1024:>+10.1f} {stat.count_diff:>+8}  {stat.traceback}" for stat in growth[:limit]]
+    return "\n".join(lines) + "\n"
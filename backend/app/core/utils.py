@@ -1,11 +1,46 @@
 """Utility functions and helpers for the application."""
 
-from typing import TypeVar, Generic, Type, Optional
-from sqlalchemy.orm import Session
-from fastapi import HTTPException, status
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import TypeVar, Generic, Type, Optional, Iterable, Tuple, List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
+from fastapi import HTTPException, Response, status
 
 T = TypeVar('T')
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def page_statement(model, limit: Optional[int], cursor: Optional[int] = None, columns: Iterable[str] = (), descending: bool = False):
+    """Keyset page ordered by primary key, loading only `columns` (plus the key).
+
+    Fetches one extra row so the caller can tell whether another page
+    exists; a `limit` of None returns every row after the cursor.
+    """
+    statement = select(model)
+    columns = [getattr(model, name) for name in columns if name != "id"]
+    if columns:
+        statement = statement.options(load_only(*columns))
+    if cursor is not None:
+        statement = statement.where(model.id < cursor if descending else model.id > cursor)
+    statement = statement.order_by(model.id.desc() if descending else model.id)
+    return statement if limit is None else statement.limit(limit + 1)
+
+
+def split_page(rows: list, limit: Optional[int]) -> Tuple[list, Optional[int]]:
+    """Trim the look-ahead row; the cursor for the next page is the last returned id."""
+    if limit is not None and len(rows) > limit:
+        return rows[:limit], rows[limit - 1].id
+    return rows, None
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[int]) -> None:
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(next_cursor)
+
 class BaseRepository(Generic[T]):
     """Generic repository pattern for CRUD operations."""
     
@@ -31,6 +66,11 @@ class BaseRepository(Generic[T]):
         """Get all items."""
         return self.db.query(self.model).all()
     
+    def get_page(self, limit: Optional[int], cursor: Optional[int] = None, columns: Iterable[str] = (), descending: bool = False) -> Tuple[List[T], Optional[int]]:
+        """Get one keyset page of items and the cursor for the next one."""
+        statement = page_statement(self.model, limit, cursor, columns, descending)
+        return split_page(self.db.execute(statement).scalars().all(), limit)
+    
     def create(self, obj: T) -> T:
         """Create new item."""
         self.db.add(obj)
@@ -50,17 +90,118 @@ class BaseRepository(Generic[T]):
         self.db.commit()
 
 
+class AsyncBaseRepository(Generic[T]):
+    """BaseRepository for AsyncSession; every database call is awaited."""
+    
+    def __init__(self, model: Type[T], db: AsyncSession):
+        self.model = model
+        self.db = db
+    
+    async def get_by_id(self, id: int) -> Optional[T]:
+        """Get item by ID."""
+        return await self.db.get(self.model, id)
+    
+    async def get_or_404(self, id: int) -> T:
+        """Get item by ID or raise 404."""
+        item = await self.get_by_id(id)
+        if not item:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{self.model.__name__} not found"
+            )
+        return item
+    
+    async def get_all(self):
+        """Get all items."""
+        result = await self.db.execute(select(self.model))
+        return result.scalars().all()
+    
+    async def get_page(self, limit: Optional[int], cursor: Optional[int] = None, columns: Iterable[str] = (), descending: bool = False) -> Tuple[List[T], Optional[int]]:
+        """Get one keyset page of items and the cursor for the next one."""
+        result = await self.db.execute(page_statement(self.model, limit, cursor, columns, descending))
+        return split_page(result.scalars().all(), limit)
+    
+    async def create(self, obj: T) -> T:
+        """Create new item."""
+        self.db.add(obj)
+        await self.db.commit()
+        await self.db.refresh(obj)
+        return obj
+    
+    async def update(self, obj: T) -> T:
+        """Update item."""
+        await self.db.commit()
+        await self.db.refresh(obj)
+        return obj
+    
+    async def delete(self, obj: T) -> None:
+        """Delete item."""
+        await self.db.delete(obj)
+        await self.db.commit()
+
+
+EMAIL_PATTERN = re.compile(r'^[^\s@]+@([^\s@]+\.[^\s@]+)$')
+DOMAIN_LABEL_PATTERN = re.compile(r'^(?!-)[a-z0-9-]{1,63}(?<!-)$')
+TLD_PATTERN = re.compile(r'^([a-z]{2,63}|xn--[a-z0-9-]{1,59})$')
+# Reserved names (RFC 2606 / 6761) that can never receive mail
+UNDELIVERABLE_DOMAINS = frozenset({
+    "example.com", "example.net", "example.org", "localhost", "invalid", "test", "local",
+})
+
+
+@dataclass
+class EmailValidationResult:
+    valid: list = field(default_factory=list)
+    invalid: list = field(default_factory=list)
+    duplicates: int = 0
+
+
 class EmailValidator:
     """Centralized email validation."""
     
+    @staticmethod
+    def normalise(email: str) -> str:
+        """Canonical form used for comparison and storage."""
+        return email.strip().lower()
+    
+    @staticmethod
+    @lru_cache(maxsize=16384)
+    def is_valid_domain(domain: str) -> bool:
+        """Check a lowercased domain against DNS naming rules (cached per domain)."""
+        if len(domain) > 253 or domain in UNDELIVERABLE_DOMAINS:
+            return False
+        labels = domain.split('.')
+        if labels[-1] in UNDELIVERABLE_DOMAINS or not TLD_PATTERN.match(labels[-1]):
+            return False
+        return all(DOMAIN_LABEL_PATTERN.match(label) for label in labels)
+    
     @staticmethod
     def is_valid(email: str) -> bool:
         """Validate email format."""
-        import re
-        pattern = r'^[^\s@]+@[^\s@]+\.[^\s@]+$'
-        return re.match(pattern, email) is not None
+        match = EMAIL_PATTERN.match(email)
+        return match is not None and EmailValidator.is_valid_domain(match.group(1).lower())
     
     @staticmethod
     def validate_list(emails: list[str]) -> bool:
         """Validate list of emails."""
         return all(EmailValidator.is_valid(email) for email in emails)
+    
+    @staticmethod
+    def validate_batch(emails: Iterable[str]) -> EmailValidationResult:
+        """Normalise, dedupe and partition addresses into valid/invalid in one pass."""
+        result = EmailValidationResult()
+        seen = set()
+        match = EMAIL_PATTERN.match
+        valid_domain = EmailValidator.is_valid_domain
+        for email in emails:
+            address = email.strip().lower() if isinstance(email, str) else ""
+            if address in seen:
+                result.duplicates += 1
+                continue
+            seen.add(address)
+            matched = match(address)
+            if matched is not None and valid_domain(matched.group(1)):
+                result.valid.append(address)
+            else:
+                result.invalid.append(email)
+        return result
@@ -1,11 +1,24 @@
 import asyncio
-from fastapi import FastAPI
+import logging
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
 from app.api.v1.api import api_router
-from app.services.reply_service import ReplyCheckerService
+from app.api.v1.endpoints.admin import ADMIN_TOKEN_HEADER, artifact, is_admin_token
+from app.services.reply_listener import reply_listener
 from app.core.config import settings
-from app.core.database import create_tables
+from app.core.database import async_engine, pool_stats
+from app.core.logging import configure_logging, shutdown_logging
+from app.core import metrics as app_metrics
+from app.core.metrics import CONTENT_TYPE, http_request_seconds
+from app.core.profiling import SamplingProfiler, profile_lock
+from app.services.campaign_queue import campaign_queue
+from app.services.suppression import suppression_list
 from fastapi.middleware.cors import CORSMiddleware
 
+configure_logging(settings)
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="AI HR Automator")
 
 # CORS configuration
@@ -26,35 +39,109 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(api_router, prefix="/api/v1")
 
-# Minimal Background Task for Reply Checking
-async def reply_checker_worker():
-    reply_service = ReplyCheckerService()
-    user=settings.EMAIL_USER
-    password=settings.EMAIL_PASSWORD
+_route_templates: dict = {}
+
+def route_template(request: Request) -> str:
+    """The matched route's path pattern, so /resumes/1 and /resumes/2 share one series."""
+    endpoint = request.scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if endpoint not in _route_templates:
+        _route_templates[endpoint] = next(
+            (route.path for route in app.routes if getattr(route, "endpoint", None) is endpoint), "unmatched"
+        )
+    return _route_templates[endpoint]
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        http_request_seconds.labels(
+            method=request.method,
+            route=route_template(request),
+            status=status,
+        ).observe(time.perf_counter() - started)
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """`?profile=1` with the admin token returns a CPU profile of the request instead of its body."""
+    if request.query_params.get("profile") != "1" or not is_admin_token(request.headers.get(ADMIN_TOKEN_HEADER)):
+        return await call_next(request)
+    if not profile_lock.acquire(blocking=False):
+        return Response("A profile is already running in this worker\n", status_code=409)
+    # Samples every thread, so concurrent requests in this worker show up too
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    try:
+        response = await call_next(request)
+        async for _ in response.body_iterator:
+            pass
+    finally:
+        profile = profiler.stop()
+        profile_lock.release()
+    if request.query_params.get("profile_format") == "folded":
+        result = artifact(profile.folded(), "request-profile.folded")
+    else:
+        result = artifact(profile.summary(), "request-profile.txt")
+    result.headers["X-Profiled-Status"] = str(response.status_code)
+    return result
+
+# Replies are pushed by the IMAP IDLE listener thread as they arrive
+async def reply_event_consumer():
     while True:
-        # Industry Practice: In a real app, you'd fetch user_email/pass from DB
-        # For bare minimum, we illustrate the loop logic
-        replies=reply_service.check_for_replies(user,password, ["researchanalystforapurpose@gmail.com"])
-        print("Checking for HR replies...")
-        for reply in replies:
-            print(reply)
+        reply = await reply_listener.events.get()
+        logger.info("HR reply from %s: %s", reply["from"], reply["subject"])
         
         # This is where you would trigger your 'Custom Message' notification 
         # (e.g., via WebSocket or updating a DB flag for the Frontend)
-        
-        await asyncio.sleep(300) # Check every 5 minutes
 
 @app.on_event("startup")
 async def startup_event():
-    # Initialize database tables
-    create_tables()
-    # Start the background task
-    # asyncio.create_task(reply_checker_worker())
+    # Schema is managed by Alembic (`alembic upgrade head` runs before the workers start)
+    # Known-dead addresses are checked in memory before every send
+    try:
+        logger.info("Suppression list loaded: %d addresses", suppression_list.load())
+    except Exception as e:
+        logger.warning("Could not load suppression list: %s", e)
+    # Resume any queued bulk sends and start draining new ones
+    campaign_queue.start()
+    # Under gunicorn, keep this worker's gauges current between scrapes of other workers
+    app_metrics.start_collecting(settings.METRICS_REFRESH_SECONDS)
+    # Start listening for HR replies
+    if settings.REPLY_LISTENER_ENABLED and settings.EMAIL_USER and settings.EMAIL_PASSWORD:
+        reply_listener.start(asyncio.get_running_loop())
+        # Keep a reference: the loop only holds tasks weakly
+        app.state.reply_consumer = asyncio.create_task(reply_event_consumer())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    reply_listener.stop()
+    consumer = getattr(app.state, "reply_consumer", None)
+    if consumer is not None:
+        consumer.cancel()
+    campaign_queue.stop()
+    await async_engine.dispose()
+    shutdown_logging()
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/health/db")
+async def database_health():
+    return pool_stats()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # Sync route: collectors may query the database
+    return Response(app_metrics.render(), media_type=CONTENT_TYPE)
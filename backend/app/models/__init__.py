@@ -2,6 +2,13 @@ from .base import Base
 from .resume import Resume
 from .contact import Contact
 from .campaign import Campaign
+from .campaign_recipient import CampaignRecipient
+from .campaign_event import CampaignEvent
+from .campaign_stat_bucket import CampaignStatBucket
 from .email_template import EmailTemplate
+from .mailbox_checkpoint import MailboxCheckpoint
+from .sent_message import SentMessage
+from .reply import Reply
+from .suppressed_address import SuppressedAddress
 
-__all__ = ["Base", "Resume", "Contact", "Campaign", "EmailTemplate"]
+__all__ = ["Base", "Resume", "Contact", "Campaign", "CampaignRecipient", "CampaignEvent", "CampaignStatBucket", "EmailTemplate", "MailboxCheckpoint", "SentMessage", "Reply", "SuppressedAddress"]
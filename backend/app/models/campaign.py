@@ -1,9 +1,24 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Index, text
 from .base import Base
 
+# Statuses the campaign queue still has to pick up or resume
+ACTIVE_STATUSES = ("queued", "sending")
+
 class Campaign(Base):
     __tablename__ = "campaigns"
+    __table_args__ = (
+        Index("ix_campaigns_status_created_at", "status", "created_at"),
+        # Small partial index the queue workers poll instead of scanning finished campaigns;
+        # status leads so the planner prefers it to the one above for the same IN lookup
+        Index(
+            "ix_campaigns_active",
+            "status",
+            "id",
+            sqlite_where=text("status IN ('queued', 'sending')"),
+            postgresql_where=text("status IN ('queued', 'sending')"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -11,9 +26,13 @@ class Campaign(Base):
     body = Column(Text, nullable=False)
     recipient_count = Column(Integer, default=0)
     sent_count = Column(Integer, default=0)
-    status = Column(String(50), default="draft")  # draft, sent, scheduled
+    failed_count = Column(Integer, default=0)
+    bounced_count = Column(Integer, default=0)
+    replied_count = Column(Integer, default=0)
+    status = Column(String(50), default="draft")  # draft, queued, sending, sent, failed, scheduled
     created_at = Column(DateTime, default=datetime.utcnow)
     sent_at = Column(DateTime, nullable=True)
+    locked_until = Column(DateTime, nullable=True)  # lease held by the worker delivering it
     
     def __repr__(self):
         return f"<Campaign(id={self.id}, name={self.name}, status={self.status})>"
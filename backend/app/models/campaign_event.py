@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from .base import Base
+
+class CampaignEvent(Base):
+    __tablename__ = "campaign_events"
+    __table_args__ = (
+        Index("ix_campaign_events_campaign_type_created", "campaign_id", "event_type", "created_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id", ondelete="CASCADE"), nullable=False)
+    event_type = Column(String(20), nullable=False)  # sent, failed, bounced, replied
+    recipient = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<CampaignEvent(campaign_id={self.campaign_id}, event_type={self.event_type}, recipient={self.recipient})>"
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from .base import Base
+
+class CampaignRecipient(Base):
+    __tablename__ = "campaign_recipients"
+    __table_args__ = (
+        Index("ix_campaign_recipients_campaign_status", "campaign_id", "status", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id", ondelete="CASCADE"), nullable=False)
+    email = Column(String(255), nullable=False)
+    contact_id = Column(Integer, ForeignKey("contacts.id", ondelete="SET NULL"), nullable=True)
+    # Per-recipient content from personalisation; NULL falls back to the campaign's subject/body
+    subject = Column(String(500), nullable=True)
+    body = Column(Text, nullable=True)
+    status = Column(String(20), default="pending", nullable=False)  # drafting, pending, sent, failed, suppressed
+    error = Column(Text, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+    # Temporary failures go back to "pending" and are not retried before next_attempt_at
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<CampaignRecipient(id={self.id}, email={self.email}, status={self.status})>"
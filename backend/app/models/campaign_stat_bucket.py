@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, UniqueConstraint
+from .base import Base
+
+class CampaignStatBucket(Base):
+    """Event counts for one campaign over one time bucket, kept up to date as events are recorded."""
+    __tablename__ = "campaign_stat_buckets"
+    __table_args__ = (
+        UniqueConstraint("campaign_id", "bucket_start", name="uq_campaign_stat_buckets_campaign_bucket"),
+        # Account-wide sums over recent buckets (the daily send quota)
+        Index("ix_campaign_stat_buckets_bucket_start", "bucket_start"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id", ondelete="CASCADE"), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    sent = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    bounced = Column(Integer, default=0, nullable=False)
+    replied = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<CampaignStatBucket(campaign_id={self.campaign_id}, bucket_start={self.bucket_start})>"
@@ -0,0 +1,23 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, UniqueConstraint
+from .base import Base
+
+class MailboxCheckpoint(Base):
+    __tablename__ = "mailbox_checkpoints"
+    __table_args__ = (
+        UniqueConstraint("account", "mailbox", name="uq_mailbox_checkpoints_account_mailbox"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    account = Column(String(255), nullable=False)
+    mailbox = Column(String(255), nullable=False)
+    uidvalidity = Column(BigInteger, nullable=True)
+    last_uid = Column(BigInteger, default=0, nullable=False)
+    highest_modseq = Column(BigInteger, nullable=True)  # only set when the server supports CONDSTORE
+    # The one process holding the IDLE session for this mailbox, see ReplyListener
+    listener_id = Column(String(255), nullable=True)
+    listener_lease_until = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<MailboxCheckpoint(account={self.account}, mailbox={self.mailbox}, last_uid={self.last_uid})>"
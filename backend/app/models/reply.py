@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from .base import Base
+
+class Reply(Base):
+    __tablename__ = "replies"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    message_id = Column(String(255), nullable=True, unique=True)
+    in_reply_to = Column(String(255), nullable=True)
+    from_email = Column(String(255), nullable=False, index=True)
+    subject = Column(String(500), nullable=True)
+    snippet = Column(Text, nullable=True)
+    sent_message_id = Column(Integer, ForeignKey("sent_messages.id", ondelete="SET NULL"), nullable=True, index=True)
+    contact_id = Column(Integer, ForeignKey("contacts.id", ondelete="SET NULL"), nullable=True, index=True)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id", ondelete="SET NULL"), nullable=True, index=True)
+    received_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Reply(id={self.id}, from_email={self.from_email}, campaign_id={self.campaign_id})>"
@@ -0,0 +1,16 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from .base import Base
+
+class SentMessage(Base):
+    __tablename__ = "sent_messages"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    message_id = Column(String(255), nullable=False, unique=True, index=True)
+    recipient = Column(String(255), nullable=False, index=True)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id", ondelete="SET NULL"), nullable=True, index=True)
+    contact_id = Column(Integer, ForeignKey("contacts.id", ondelete="SET NULL"), nullable=True, index=True)
+    sent_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<SentMessage(id={self.id}, recipient={self.recipient}, message_id={self.message_id})>"
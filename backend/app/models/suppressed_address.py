@@ -0,0 +1,16 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from .base import Base
+
+class SuppressedAddress(Base):
+    __tablename__ = "suppressed_addresses"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    email = Column(String(255), nullable=False, unique=True)
+    reason = Column(String(50), nullable=False)  # hard_bounce (DSN) or smtp_rejected
+    detail = Column(Text, nullable=True)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)  # the processes' refresh watermark
+    
+    def __repr__(self):
+        return f"<SuppressedAddress(email={self.email}, reason={self.reason})>"
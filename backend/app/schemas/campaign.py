@@ -0,0 +1,66 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Optional
+
+class CampaignListItem(BaseModel):
+    id: int
+    name: str
+    subject: str
+    status: Optional[str] = None
+    recipient_count: Optional[int] = None
+    sent_count: Optional[int] = None
+    failed_count: Optional[int] = None
+    created_at: Optional[datetime] = None
+    sent_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class BulkSendQueued(BaseModel):
+    status: str
+    job_id: int
+    recipient_count: int
+
+class CampaignProgress(BaseModel):
+    campaign_id: int
+    status: str
+    total: int
+    sent: int
+    failed: int
+    remaining: int
+
+class CampaignStatBucket(BaseModel):
+    bucket_start: datetime
+    sent: int
+    failed: int
+    bounced: int
+    replied: int
+    
+    class Config:
+        from_attributes = True
+
+class CampaignStats(BaseModel):
+    campaign_id: int
+    status: str
+    total: int
+    sent: int
+    failed: int
+    bounced: int
+    replied: int
+    delivery_rate: float
+    bounce_rate: float
+    reply_rate: float
+    bucket_minutes: int
+    buckets: List[CampaignStatBucket]
+
+class PersonalizedCampaignRequest(BaseModel):
+    subject: str = Field(..., min_length=1, max_length=500)
+    body: str = Field(..., min_length=1)
+    instructions: Optional[str] = None
+    contact_ids: List[int] = Field(..., min_length=1)
+    campaign_name: Optional[str] = None
+
+class TemplateCampaignRequest(BaseModel):
+    template_id: int
+    contact_ids: List[int] = Field(..., min_length=1)
+    campaign_name: Optional[str] = None
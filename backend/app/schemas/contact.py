@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class ContactResponse(BaseModel):
+    id: int
+    email: str
+    name: Optional[str] = None
+    company: Optional[str] = None
+    position: Optional[str] = None
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class RejectedRow(BaseModel):
+    row: int
+    email: str
+    reason: str
+
+class ContactImportResponse(BaseModel):
+    processed: int
+    written: int
+    skipped: int
+    rejected: int
+    duplicates: int
+    elapsed_seconds: float
+    rows_per_second: float
+    rejected_samples: list[RejectedRow]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, field_validator
+from pydantic import BaseModel, field_validator
 from typing import List, Optional
 from app.core.utils import EmailValidator
 
@@ -10,16 +10,21 @@ class EmailResponse(BaseModel):
     content: str
 
 class BulkEmailRequest(BaseModel):
-    hr_emails: List[EmailStr]
+    hr_emails: List[str]
     subject: str
     body: str
+    campaign_name: Optional[str] = None
     
     @field_validator('hr_emails')
     @classmethod
     def validate_emails(cls, v):
-        if not EmailValidator.validate_list(v):
-            raise ValueError('One or more invalid email addresses')
-        return v
+        result = EmailValidator.validate_batch(v)
+        if result.invalid:
+            preview = ", ".join(map(str, result.invalid[:5]))
+            raise ValueError(f'{len(result.invalid)} invalid email address(es): {preview}')
+        if not result.valid:
+            raise ValueError('No recipients provided')
+        return result.valid
 
 class ReplyNotification(BaseModel):
     hr_email: str
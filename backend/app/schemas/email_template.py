@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class EmailTemplateListItem(BaseModel):
+    id: int
+    name: str
+    subject: str
+    category: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class ReplyResponse(BaseModel):
+    id: int
+    from_email: str
+    subject: Optional[str] = None
+    snippet: Optional[str] = None
+    contact_id: Optional[int] = None
+    campaign_id: Optional[int] = None
+    received_at: Optional[datetime] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
@@ -1,13 +1,252 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Optional
 import google.generativeai as genai
-from app.core.config import get_settings
+from prometheus_client import Counter, Gauge
+from app.core.config import get_settings, settings_registry
+from app.core.metrics import gemini_request_seconds, register_collector
+
+
+class ResponseCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+ai_cache_lookups = Counter("ai_cache_lookups", "Draft generation requests by how they were served", ("result",))
+ai_saved_seconds = Counter("ai_saved_seconds", "Estimated Gemini time avoided by cache hits")
+ai_cache_entries = Gauge("ai_cache_entries", "Cached Gemini responses", multiprocess_mode="livesum")
+
+
+def normalise_text(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def build_prompt(prompt: str, context: str) -> str:
+    return f"Context: {context}\n\nTask: {prompt}\n\nWrite a professional email:"
+
+
+_STREAM_END = object()
+
 
 class AIService:
-    def __init__(self):
-        settings = get_settings()
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('models/gemini-flash-latest')
+    def __init__(self, model=None, model_name: Optional[str] = None, cache: Optional[ResponseCache] = None, settings=None):
+        settings = settings or get_settings()
+        self.model_name = model_name or settings.GEMINI_MODEL
+        if model is None:
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            model = genai.GenerativeModel(self.model_name)
+        self.model = model
+        self.cache = cache or ResponseCache(settings.AI_CACHE_SIZE, settings.AI_CACHE_TTL_SECONDS)
+        # Gemini's client is blocking; calls run here so the event loop stays free
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.AI_MAX_CONCURRENCY), thread_name_prefix="gemini"
+        )
+        self._inflight: dict = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self.upstream_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
+
+    def cache_key(self, prompt: str, context: str) -> str:
+        raw = "\x1f".join((self.model_name, normalise_text(prompt), normalise_text(context)))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @property
+    def average_upstream_seconds(self) -> float:
+        return self.upstream_seconds / self.upstream_calls if self.upstream_calls else 0.0
+
+    def _count(self, result: str) -> None:
+        ai_cache_lookups.labels(result=result).inc()
+        if result == "miss":
+            self.misses += 1
+            return
+        if result == "hit":
+            self.hits += 1
+        else:
+            self.coalesced += 1
+        self.saved_seconds += self.average_upstream_seconds
+        ai_saved_seconds.inc(self.average_upstream_seconds)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "model": self.model_name,
+            "cache_entries": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            "upstream_calls": self.upstream_calls,
+            "average_upstream_seconds": round(self.average_upstream_seconds, 3),
+            "saved_seconds": round(self.saved_seconds, 3),
+        }
+
+    def _generate_sync(self, full_prompt: str) -> str:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            text = self.model.generate_content(full_prompt).text
+            outcome = "ok"
+            return text
+        finally:
+            gemini_request_seconds.labels(operation="generate", outcome=outcome).observe(time.perf_counter() - started)
+
+    async def _call_model(self, full_prompt: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._generate_sync, full_prompt)
+
+    def _stream_sync(self, full_prompt: str, loop, queue: asyncio.Queue, cancelled: threading.Event) -> None:
+        """Producer side of stream_email: runs on the executor and feeds the loop's queue."""
+        def put(item) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                cancelled.set()  # event loop already closed
+
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            for chunk in self.model.generate_content(full_prompt, stream=True):
+                if cancelled.is_set():
+                    outcome = "cancelled"
+                    return
+                text = getattr(chunk, "text", "")
+                if text:
+                    put(text)
+            put(_STREAM_END)
+            outcome = "ok"
+        except Exception as e:
+            put(e)
+        finally:
+            gemini_request_seconds.labels(operation="stream", outcome=outcome).observe(time.perf_counter() - started)
+
+    async def stream_email(self, prompt: str, context: str = "") -> AsyncIterator[str]:
+        """Yield the email text as the model produces it; cached answers come back in one piece."""
+        key = self.cache_key(prompt, context)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._count("hit")
+            yield cached
+            return
+
+        self._count("miss")
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+        started = time.perf_counter()
+        loop.run_in_executor(self.executor, self._stream_sync, build_prompt(prompt, context), loop, queue, cancelled)
+        parts = []
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                parts.append(item)
+                yield item
+        finally:
+            # Client went away or the model failed: stop pulling chunks upstream
+            cancelled.set()
+        self.upstream_calls += 1
+        self.upstream_seconds += time.perf_counter() - started
+        self.cache.set(key, "".join(parts))
+
+    async def complete(self, full_prompt: str) -> str:
+        """Uncached model call for callers that manage their own caching."""
+        started = time.perf_counter()
+        text = await self._call_model(full_prompt)
+        self.upstream_calls += 1
+        self.upstream_seconds += time.perf_counter() - started
+        return text
 
     async def generate_email(self, prompt: str, context: str = "") -> str:
-        full_prompt = f"Context: {context}\n\nTask: {prompt}\n\nWrite a professional email:"
-        response = self.model.generate_content(full_prompt)
-        return response.text
\ No newline at end of file
+        """Cached draft for this prompt and context.
+
+        Concurrent identical requests share one upstream call. The call
+        runs on the executor in its own task, so it never blocks the event
+        loop and keeps going for the others if the request that started it
+        is cancelled.
+        """
+        key = self.cache_key(prompt, context)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._count("hit")
+            return cached
+
+        # Identical request already on its way upstream: wait for that answer
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self._count("coalesced")
+        else:
+            self._count("miss")
+            pending = self._inflight[key] = asyncio.create_task(self._fetch(key, build_prompt(prompt, context)))
+            # Mark the error retrieved even if every waiter has gone, so it is not logged as unhandled
+            pending.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return await asyncio.shield(pending)
+
+    async def _fetch(self, key: str, full_prompt: str) -> str:
+        try:
+            started = time.perf_counter()
+            text = await self._call_model(full_prompt)
+            self.upstream_calls += 1
+            self.upstream_seconds += time.perf_counter() - started
+            self.cache.set(key, text)
+            return text
+        finally:
+            self._inflight.pop(key, None)
+
+
+# A reload that changes any of these replaces the client (and its response cache)
+AI_SETTINGS = ("GEMINI_API_KEY", "GEMINI_MODEL", "AI_CACHE_SIZE", "AI_CACHE_TTL_SECONDS", "AI_MAX_CONCURRENCY")
+
+
+def get_ai_service() -> AIService:
+    """Process-wide AIService, rebuilt only when its settings change."""
+    return settings_registry.client("gemini", AI_SETTINGS, lambda settings: AIService(settings=settings), AIService.close)
+
+
+def collect_ai_metrics():
+    service = settings_registry.peek("gemini")
+    ai_cache_entries.set(len(service.cache) if service is not None else 0)
+
+
+register_collector(collect_ai_metrics)
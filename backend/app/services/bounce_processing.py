@@ -0,0 +1,137 @@
+"""Delivery status notifications (RFC 3464) and permanent SMTP rejections.
+
+Hard bounces reported by a DSN in the mailbox put the address on the
+suppression list and count as a "bounced" event for the campaign that
+last mailed it. Dead-mailbox rejections from the SMTP server while
+sending (`is_dead_mailbox_error`) also suppress the address, but the
+campaign queue records them as "failed": the message was never sent, and
+the bounce and delivery rates count bounces out of sent messages.
+"""
+
+import re
+import smtplib
+from email.parser import BytesHeaderParser
+from email.utils import parseaddr
+from typing import Iterable, Optional
+from app.core.utils import EmailValidator
+from app.models.sent_message import SentMessage
+from app.services.campaign_stats import campaign_stats
+from app.services.suppression import suppression_list
+
+STATUS_CODE_PATTERN = re.compile(r'\b([245])\.(\d{1,3})\.(\d{1,3})\b')
+BLOCK_SEPARATOR_PATTERN = re.compile(rb'\r?\n[ \t]*\r?\n')
+# Basic reply codes that mean the mailbox itself does not exist or is unusable
+DEAD_MAILBOX_SMTP_CODES = {550, 551, 553}
+
+
+def is_delivery_report(msg) -> bool:
+    return (
+        msg.get_content_type() == "multipart/report"
+        and (msg.get_param("report-type") or "").lower() == "delivery-status"
+    )
+
+
+def parse_delivery_status(data: bytes) -> list:
+    """Per-recipient fields from a message/delivery-status body.
+
+    The body is one block of per-message fields followed by one block per
+    recipient; only blocks naming a recipient are returned.
+    """
+    parser = BytesHeaderParser()
+    recipients = []
+    for block in BLOCK_SEPARATOR_PATTERN.split(data or b""):
+        if not block.strip():
+            continue
+        fields = parser.parsebytes(block.strip() + b"\r\n")
+        recipient = fields.get("Final-Recipient") or fields.get("Original-Recipient")
+        if not recipient:
+            continue
+        # "rfc822; user@example.com"
+        address = parseaddr(recipient.split(";", 1)[-1].strip())[1].lower()
+        if not address:
+            continue
+        recipients.append({
+            "recipient": address,
+            "action": (fields.get("Action") or "").strip().lower(),
+            "status": (fields.get("Status") or "").strip(),
+            "diagnostic": (fields.get("Diagnostic-Code") or "").strip(),
+        })
+    return recipients
+
+
+def delivery_status_bytes(msg) -> bytes:
+    """The message/delivery-status part of a fully fetched report, as bytes."""
+    for part in msg.walk():
+        if part.get_content_type() == "message/delivery-status":
+            payload = part.get_payload()
+            if isinstance(payload, list):
+                # The email package parses each status block into a Message
+                return b"\r\n".join(block.as_bytes() for block in payload)
+            return payload.encode() if isinstance(payload, str) else (payload or b"")
+    return b""
+
+
+def is_hard_bounce(entry: dict) -> bool:
+    return entry["action"] == "failed" and entry["status"].startswith("5")
+
+
+def is_dead_mailbox_error(error: Exception, recipient: str) -> Optional[str]:
+    """Detail text when an SMTP error permanently rejects this mailbox, else None.
+
+    Enhanced status 5.1.x (bad destination mailbox) counts; so does a bare
+    550/551/553 without an enhanced code. Quota (5.2.x) and policy/spam
+    (5.7.x) rejections do not, as the address itself may be fine.
+    """
+    if not isinstance(error, smtplib.SMTPRecipientsRefused):
+        return None
+    refused = error.recipients.get(recipient)
+    if not refused:
+        return None
+    code, message = refused
+    text = message.decode(errors="ignore") if isinstance(message, bytes) else str(message)
+    if code < 500:
+        return None
+    enhanced = STATUS_CODE_PATTERN.search(text)
+    if enhanced:
+        return f"{code} {text}" if enhanced.group(1) == "5" and enhanced.group(2) == "1" else None
+    return f"{code} {text}" if code in DEAD_MAILBOX_SMTP_CODES else None
+
+
+class BounceProcessor:
+    def __init__(self, suppressions=suppression_list, stats=campaign_stats):
+        self.suppressions = suppressions
+        self.stats = stats
+
+    def process(self, db, bounces: Iterable[dict], reason: str = "hard_bounce") -> int:
+        """Suppress bounced recipients and count a bounce for their latest campaign; the caller commits.
+
+        Each bounce is {"recipient", "detail", "campaign_id" (optional)}.
+        Only newly suppressed addresses count as bounced, so a second DSN
+        for the same address, or one re-read from the mailbox, changes
+        nothing. Returns the number of newly suppressed addresses.
+        """
+        bounces = [bounce for bounce in bounces if bounce.get("recipient")]
+        if not bounces:
+            return 0
+        unattributed = {bounce["recipient"] for bounce in bounces if bounce.get("campaign_id") is None}
+        latest_campaign = {}
+        if unattributed:
+            rows = (
+                db.query(SentMessage.recipient, SentMessage.campaign_id)
+                .filter(SentMessage.recipient.in_(unattributed))
+                .order_by(SentMessage.id)
+                .all()
+            )
+            latest_campaign = {recipient: campaign_id for recipient, campaign_id in rows}
+
+        entries, campaigns = [], {}
+        for bounce in bounces:
+            campaign_id = bounce.get("campaign_id") or latest_campaign.get(bounce["recipient"])
+            entries.append((bounce["recipient"], reason, bounce.get("detail"), campaign_id))
+            campaigns.setdefault(EmailValidator.normalise(bounce["recipient"]), campaign_id)
+        added = self.suppressions.add(db, entries)
+        self.stats.record(db, [(campaigns[address], "bounced", address) for address in added])
+        return len(added)
+
+
+bounce_processor = BounceProcessor()
@@ -0,0 +1,385 @@
+"""Persisted bulk-send queue drained by background worker threads.
+
+Each bulk send becomes a `Campaign` with one `CampaignRecipient` row per
+address. Workers claim a campaign with a time-limited lease, deliver its
+pending recipients in small batches and record every outcome before moving
+on, so a restarted process resumes at the first undelivered recipient.
+
+Temporary failures (throttling, 4xx replies, dropped connections) put the
+recipient back to "pending" with an exponentially growing `next_attempt_at`.
+A campaign with nothing due hands its lease back until the earliest retry,
+and SMTP_DAILY_QUOTA holds every campaign once the account has sent that
+many messages in the last 24 hours. A campaign interrupted by a database
+error (a lock timeout, a dropped connection) goes back to "queued" for
+CAMPAIGN_ERROR_RETRY_SECONDS; any other error fails it.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from prometheus_client import Gauge
+from sqlalchemy import and_, bindparam, func, insert, or_
+from sqlalchemy.exc import DBAPIError, DisconnectionError, OperationalError, TimeoutError as PoolTimeoutError
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.core.logging import log_context
+from app.core.metrics import register_collector
+from app.models.campaign import ACTIVE_STATUSES, Campaign
+from app.models.campaign_recipient import CampaignRecipient
+from app.services.campaign_stats import campaign_stats
+from app.services.send_scheduler import retry_delay
+from app.services.suppression import suppression_list
+from app.services.email_service import EmailService
+
+logger = logging.getLogger(__name__)
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether a delivery aborted by this error may simply be resumed later."""
+    if isinstance(error, (OperationalError, DisconnectionError, PoolTimeoutError)):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+
+class CampaignQueue:
+    def __init__(self, session_factory=SessionLocal, workers: Optional[int] = None):
+        settings = get_settings()
+        self.session_factory = session_factory
+        self.workers = max(1, workers or settings.CAMPAIGN_QUEUE_WORKERS)
+        self.poll_interval = settings.CAMPAIGN_QUEUE_POLL_SECONDS
+        self.lease = timedelta(seconds=settings.CAMPAIGN_LEASE_SECONDS)
+        self.error_retry = timedelta(seconds=settings.CAMPAIGN_ERROR_RETRY_SECONDS)
+        self.stall_seconds = settings.PERSONALIZE_STALL_SECONDS
+        self.daily_quota = settings.SMTP_DAILY_QUOTA
+        self.max_attempts = max(1, settings.SMTP_RETRY_MAX_ATTEMPTS)
+        self.retry_base = settings.SMTP_RETRY_BASE_SECONDS
+        self.retry_cap = settings.SMTP_RETRY_MAX_SECONDS
+        self._threads: list[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        # Separate from _wakeup: workers delivering a campaign wait here for drafts,
+        # and must not swallow the wakeup meant for idle workers (or each other's)
+        self._drafted = threading.Condition()
+
+    def start(self) -> None:
+        """Start the worker threads; campaigns left over from a previous run are picked up on the first poll."""
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"campaign-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10) -> None:
+        """Ask workers to finish their current batch and exit."""
+        self._stop.set()
+        self._wakeup.set()
+        self.notify_drafted()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def notify(self) -> None:
+        """Wake idle workers so a freshly queued campaign starts immediately."""
+        self._wakeup.set()
+
+    def notify_drafted(self) -> None:
+        """Wake workers waiting for personalised recipients to become pending."""
+        with self._drafted:
+            self._drafted.notify_all()
+
+    def enqueue(
+        self,
+        db,
+        recipients: list,
+        subject: str,
+        body: str,
+        name: Optional[str] = None,
+        contact_ids: Optional[dict] = None,
+        contents: Optional[dict] = None,
+        drafting: bool = False,
+    ) -> Campaign:
+        """Persist a campaign and its recipients, then hand it to the workers.
+
+        `contents` maps an address to its own (subject, body), e.g. from a
+        rendered template. With `drafting=True` recipients wait for
+        personalised content (see PersonalizationPipeline) before they
+        become deliverable.
+        """
+        unique_recipients = list(dict.fromkeys(recipients))
+        contact_ids = contact_ids or {}
+        contents = contents or {}
+        initial_status = "drafting" if drafting else "pending"
+        campaign = Campaign(
+            name=name or subject,
+            subject=subject,
+            body=body,
+            recipient_count=len(unique_recipients),
+            sent_count=0,
+            failed_count=0,
+            status="queued",
+        )
+        db.add(campaign)
+        db.flush()
+        db.execute(
+            insert(CampaignRecipient),
+            [
+                {
+                    "campaign_id": campaign.id,
+                    "email": email,
+                    "contact_id": contact_ids.get(email),
+                    "subject": contents.get(email, (None, None))[0],
+                    "body": contents.get(email, (None, None))[1],
+                    "status": initial_status,
+                }
+                for email in unique_recipients
+            ],
+        )
+        db.commit()
+        db.refresh(campaign)
+        self.notify()
+        return campaign
+
+    def _claimable(self, now: datetime):
+        # The literal IN term matches ix_campaigns_active's predicate, so the claim reads only
+        # active campaigns (and sorts that handful by id); check_query_plans asserts it
+        return and_(
+            Campaign.status.in_(bindparam("active_statuses", ACTIVE_STATUSES, expanding=True, literal_execute=True)),
+            # Queued campaigns have no lease unless they are backing off after an error
+            or_(Campaign.locked_until.is_(None), Campaign.locked_until < now),
+        )
+
+    def _claim_next(self, db) -> Optional[int]:
+        """Atomically take the lease on the oldest claimable campaign."""
+        now = datetime.utcnow()
+        candidate = (
+            db.query(Campaign.id)
+            .filter(self._claimable(now))
+            .order_by(Campaign.id)
+            .first()
+        )
+        if candidate is None:
+            return None
+        claimed = (
+            db.query(Campaign)
+            .filter(Campaign.id == candidate.id, self._claimable(now))
+            .update({"status": "sending", "locked_until": now + self.lease}, synchronize_session=False)
+        )
+        db.commit()
+        return candidate.id if claimed else None
+
+    def _deliver(self, db, campaign_id: int, email_service: Optional[EmailService] = None) -> None:
+        """Send pending recipients batch by batch, committing progress after each.
+
+        Recipients still being personalised are "drafting"; the worker waits
+        for them while nothing else is pending, and after PERSONALIZE_STALL_SECONDS
+        without progress releases them with the campaign's generic content.
+        Recipients that failed temporarily wait for their `next_attempt_at`.
+        """
+        campaign = db.get(Campaign, campaign_id)
+        email_service = email_service or EmailService()
+        batch_size = email_service.send_workers
+        last_progress = time.monotonic()
+
+        while True:
+            if self._stop.is_set():
+                # Hand the campaign back so the next process resumes it right away
+                campaign.status = "queued"
+                campaign.locked_until = None
+                db.commit()
+                return
+
+            limit = batch_size
+            if self.daily_quota:
+                limit, resume_at = self._quota_allowance(db, batch_size)
+                if not limit:
+                    self._hold(db, campaign, resume_at, "daily send quota reached")
+                    return
+
+            now = datetime.utcnow()
+            batch = (
+                db.query(CampaignRecipient)
+                .filter(
+                    CampaignRecipient.campaign_id == campaign_id,
+                    CampaignRecipient.status == "pending",
+                    or_(CampaignRecipient.next_attempt_at.is_(None), CampaignRecipient.next_attempt_at <= now),
+                )
+                .order_by(CampaignRecipient.id)
+                .limit(limit)
+                .all()
+            )
+            if not batch:
+                drafting = self._has_drafting(db, campaign_id)
+                next_retry = self._next_retry_at(db, campaign_id)
+                if not drafting and next_retry is None:
+                    break
+                if drafting and time.monotonic() - last_progress > self.stall_seconds:
+                    self._release_drafting(db, campaign_id)
+                    continue
+                if not drafting and next_retry > now + timedelta(seconds=self.poll_interval):
+                    self._hold(db, campaign, next_retry, "waiting to retry deferred recipients")
+                    return
+                campaign.locked_until = now + self.lease
+                db.commit()
+                with self._drafted:
+                    self._drafted.wait(1)
+                continue
+
+            result = email_service.send_each([
+                (row.email, row.subject or campaign.subject, row.body or campaign.body)
+                for row in batch
+            ])
+            now = datetime.utcnow()
+            final = []
+            for row, outcome in zip(batch, result.results):
+                row.error = outcome.error
+                if outcome.retry_after is not None:
+                    if not outcome.deferred:
+                        row.attempts = (row.attempts or 0) + 1
+                    if outcome.deferred or row.attempts < self.max_attempts:
+                        delay = outcome.retry_after
+                        if not outcome.deferred:
+                            delay = max(delay, retry_delay(row.attempts, self.retry_base, self.retry_cap))
+                        row.next_attempt_at = now + timedelta(seconds=delay)
+                        continue
+                row.status = "sent" if outcome.success else "suppressed" if outcome.suppressed else "failed"
+                row.sent_at = now if outcome.success else None
+                row.next_attempt_at = None
+                final.append(outcome)
+            email_service.record_sent(db, final, campaign_id=campaign_id)
+            suppression_list.add(db, [
+                (outcome.recipient, "smtp_rejected", outcome.dead_mailbox, campaign_id)
+                for outcome in final if outcome.dead_mailbox
+            ])
+            campaign_stats.record(db, [
+                (campaign_id, "sent" if outcome.success else "failed", outcome.recipient)
+                for outcome in final
+            ], at=now)
+            campaign.locked_until = now + self.lease
+            db.commit()
+            last_progress = time.monotonic()
+
+        campaign.status = "sent" if campaign.sent_count else "failed"
+        campaign.sent_at = datetime.utcnow()
+        campaign.locked_until = None
+        db.commit()
+        logger.info(
+            "Campaign finished: %d sent, %d failed", campaign.sent_count, campaign.failed_count,
+            extra={"sent": campaign.sent_count, "failed": campaign.failed_count},
+        )
+
+    def _quota_allowance(self, db, batch_size: int):
+        """How many more messages fit in SMTP_DAILY_QUOTA now, and when to look again if none do.
+
+        Counts come from the shared stat buckets, so every worker process
+        sees the same total; concurrent batches can overshoot by at most
+        one batch each.
+        """
+        now = datetime.utcnow()
+        sent, oldest = campaign_stats.sent_since(db, now - timedelta(days=1))
+        remaining = self.daily_quota - sent
+        if remaining > 0:
+            return min(batch_size, remaining), None
+        # The oldest bucket drops out of the window one day after it closes
+        return 0, (oldest or now) + timedelta(days=1, minutes=campaign_stats.bucket_minutes)
+
+    def _hold(self, db, campaign: Campaign, until: datetime, reason: str) -> None:
+        """Keep the campaign "sending" but leased until `until`, freeing this worker meanwhile."""
+        campaign.locked_until = until
+        db.commit()
+        logger.info("Campaign paused until %s UTC: %s", f"{until:%Y-%m-%d %H:%M:%S}", reason)
+
+    @staticmethod
+    def _next_retry_at(db, campaign_id: int) -> Optional[datetime]:
+        return (
+            db.query(func.min(CampaignRecipient.next_attempt_at))
+            .filter(CampaignRecipient.campaign_id == campaign_id, CampaignRecipient.status == "pending")
+            .scalar()
+        )
+
+    @staticmethod
+    def _has_drafting(db, campaign_id: int) -> bool:
+        return db.query(
+            db.query(CampaignRecipient.id)
+            .filter(CampaignRecipient.campaign_id == campaign_id, CampaignRecipient.status == "drafting")
+            .exists()
+        ).scalar()
+
+    @staticmethod
+    def _release_drafting(db, campaign_id: int) -> None:
+        released = (
+            db.query(CampaignRecipient)
+            .filter(CampaignRecipient.campaign_id == campaign_id, CampaignRecipient.status == "drafting")
+            .update({"status": "pending"}, synchronize_session=False)
+        )
+        db.commit()
+        logger.warning("Personalisation stalled, sending %d recipients the generic email", released)
+
+    def _worker_loop(self) -> None:
+        # One per thread, so sender threads and serialised messages outlive each batch
+        email_service = EmailService()
+        while not self._stop.is_set():
+            db = self.session_factory()
+            campaign_id = None
+            try:
+                campaign_id = self._claim_next(db)
+                if campaign_id is not None:
+                    with log_context(campaign_id=campaign_id):
+                        self._deliver(db, campaign_id, email_service)
+            except Exception as e:
+                db.rollback()
+                logger.exception("Campaign queue error", extra={"campaign_id": campaign_id})
+                if campaign_id is not None:
+                    self._abort(db, campaign_id, e)
+            finally:
+                db.close()
+
+            if campaign_id is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+        email_service.close()
+
+    def _abort(self, db, campaign_id: int, error: Exception) -> None:
+        """Requeue a campaign whose delivery hit a transient error, fail it otherwise.
+
+        Pending recipients stay pending either way. If the update itself
+        fails the lease simply runs out and another worker resumes it.
+        """
+        if is_transient_error(error):
+            changes = {"status": "queued", "locked_until": datetime.utcnow() + self.error_retry}
+        else:
+            changes = {"status": "failed", "locked_until": None}
+        try:
+            db.query(Campaign).filter(Campaign.id == campaign_id).update(changes, synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+
+
+campaign_queue = CampaignQueue()
+
+# Counted from the shared table, so every worker reports the same numbers
+campaigns_by_status = Gauge("campaigns", "Campaigns by status", ("status",), multiprocess_mode="livemostrecent")
+campaigns_by_status_seen: set = set()
+campaign_queue_workers = Gauge(
+    "campaign_queue_workers", "Live campaign worker threads", multiprocess_mode="livesum",
+)
+
+
+def collect_queue_metrics():
+    db = campaign_queue.session_factory()
+    try:
+        by_status = dict(db.query(Campaign.status, func.count(Campaign.id)).group_by(Campaign.status).all())
+    finally:
+        db.close()
+    # Statuses that emptied out since the last run go back to zero
+    for status in set(by_status) | campaigns_by_status_seen:
+        campaigns_by_status.labels(status=status).set(by_status.get(status, 0))
+    campaigns_by_status_seen.update(by_status)
+    campaign_queue_workers.set(sum(thread.is_alive() for thread in campaign_queue._threads))
+
+
+register_collector(collect_queue_metrics)
@@ -0,0 +1,121 @@
+"""Campaign event log with incrementally maintained rollups.
+
+Every sent/failed/bounced/replied outcome is appended to `campaign_events`
+and, in the same transaction, added to the campaign's counters and to a
+per-campaign time bucket. Dashboards read the counters and buckets and
+never aggregate the event log.
+"""
+
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+from sqlalchemy import func, insert, update
+from app.core.config import get_settings
+from app.core.metrics import campaign_events
+from app.models.campaign import Campaign
+from app.models.campaign_event import CampaignEvent
+from app.models.campaign_stat_bucket import CampaignStatBucket
+
+EVENT_TYPES = ("sent", "failed", "bounced", "replied")
+COUNTER_COLUMNS = {
+    "sent": "sent_count",
+    "failed": "failed_count",
+    "bounced": "bounced_count",
+    "replied": "replied_count",
+}
+
+
+def bucket_start(at: datetime, bucket_minutes: int) -> datetime:
+    """Start of the fixed-size bucket `at` falls in (buckets are aligned to midnight)."""
+    minutes = at.hour * 60 + at.minute
+    minutes -= minutes % bucket_minutes
+    return at.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0)
+
+
+def bucket_upsert_statement(dialect_name: str, counts: dict):
+    """Single-row INSERT .. ON CONFLICT that adds `counts` to an existing bucket."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise ValueError(f"Campaign stats do not support the '{dialect_name}' database")
+    stmt = dialect_insert(CampaignStatBucket)
+    return stmt.on_conflict_do_update(
+        index_elements=[CampaignStatBucket.campaign_id, CampaignStatBucket.bucket_start],
+        set_={name: getattr(CampaignStatBucket, name) + getattr(stmt.excluded, name) for name in counts},
+    )
+
+
+class CampaignStats:
+    def __init__(self, bucket_minutes: Optional[int] = None):
+        minutes = bucket_minutes or get_settings().CAMPAIGN_STATS_BUCKET_MINUTES
+        # Buckets must tile a day evenly so they line up across days
+        self.bucket_minutes = minutes if 0 < minutes <= 1440 and 1440 % minutes == 0 else 60
+
+    def record(self, db, events: Iterable[Tuple[int, str, Optional[str]]], at: Optional[datetime] = None) -> None:
+        """Log (campaign_id, event_type, recipient) events and bump the rollups; the caller commits."""
+        at = at or datetime.utcnow()
+        rows = []
+        counts = defaultdict(Counter)
+        for campaign_id, event_type, recipient in events:
+            if campaign_id is None:
+                continue
+            if event_type not in EVENT_TYPES:
+                raise ValueError(f"Unknown campaign event type '{event_type}'")
+            rows.append({"campaign_id": campaign_id, "event_type": event_type, "recipient": recipient, "created_at": at})
+            counts[campaign_id][event_type] += 1
+        if not rows:
+            return
+
+        db.execute(insert(CampaignEvent), rows)
+        for by_type in counts.values():
+            for event_type, count in by_type.items():
+                campaign_events.labels(event_type=event_type).inc(count)
+        dialect_name = db.get_bind().dialect.name
+        start = bucket_start(at, self.bucket_minutes)
+        for campaign_id, by_type in counts.items():
+            db.execute(
+                update(Campaign)
+                .where(Campaign.id == campaign_id)
+                .values({
+                    COUNTER_COLUMNS[event_type]: func.coalesce(getattr(Campaign, COUNTER_COLUMNS[event_type]), 0) + count
+                    for event_type, count in by_type.items()
+                })
+                .execution_options(synchronize_session=False)
+            )
+            bucket = {name: by_type.get(name, 0) for name in EVENT_TYPES}
+            db.execute(
+                bucket_upsert_statement(dialect_name, by_type),
+                {"campaign_id": campaign_id, "bucket_start": start, **bucket},
+            )
+
+    def sent_since(self, db, since: datetime) -> Tuple[int, Optional[datetime]]:
+        """Messages sent by all campaigns in the buckets overlapping [since, now), and the oldest such bucket.
+
+        The bucket holding `since` counts whole, so the total errs high.
+        """
+        total, oldest = (
+            db.query(func.coalesce(func.sum(CampaignStatBucket.sent), 0), func.min(CampaignStatBucket.bucket_start))
+            .filter(
+                CampaignStatBucket.bucket_start >= bucket_start(since, self.bucket_minutes),
+                CampaignStatBucket.sent > 0,
+            )
+            .one()
+        )
+        return int(total), oldest
+
+    @staticmethod
+    def buckets(db, campaign_id: int, limit: int = 168) -> list:
+        """The most recent `limit` buckets, oldest first."""
+        rows = (
+            db.query(CampaignStatBucket)
+            .filter(CampaignStatBucket.campaign_id == campaign_id)
+            .order_by(CampaignStatBucket.bucket_start.desc())
+            .limit(limit)
+            .all()
+        )
+        return rows[::-1]
+
+
+campaign_stats = CampaignStats()
@@ -0,0 +1,144 @@
+"""Streaming CSV/XLSX contact import with batched upserts."""
+
+import csv
+import io
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterable, Iterator
+from sqlalchemy import func
+from app.core.utils import EmailValidator
+from app.models.contact import Contact
+
+BATCH_SIZE = 1000
+MAX_REJECTED_SAMPLES = 20
+COLUMN_ALIASES = {
+    "email": "email", "e-mail": "email", "email address": "email", "hr_email": "email", "hr email": "email",
+    "name": "name", "full name": "name", "hr name": "name",
+    "company": "company", "organization": "company", "organisation": "company",
+    "position": "position", "title": "position", "role": "position", "designation": "position",
+}
+FIELDS = ("name", "company", "position")
+EMAIL_HEADERS = sorted(alias for alias, column in COLUMN_ALIASES.items() if column == "email")
+
+
+@dataclass
+class ContactImportResult:
+    processed: int = 0
+    written: int = 0
+    skipped: int = 0  # already in the table and left as they were (update_existing=False)
+    rejected: int = 0
+    duplicates: int = 0
+    elapsed: float = 0.0
+    rejected_samples: list = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "processed": self.processed,
+            "written": self.written,
+            "skipped": self.skipped,
+            "rejected": self.rejected,
+            "duplicates": self.duplicates,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "rejected_samples": self.rejected_samples,
+        }
+
+
+def normalise_header(header: Iterable) -> list:
+    """Map header cells to contact fields; a file without an email column is refused."""
+    columns = [COLUMN_ALIASES.get(str(name or "").strip().lower()) for name in header]
+    if "email" not in columns:
+        raise ValueError(f"No email column found. Name one of the columns: {', '.join(EMAIL_HEADERS)}")
+    return columns
+
+
+def iter_csv_rows(stream: BinaryIO) -> Iterator[dict]:
+    """Yield one dict per CSV row without reading the whole file."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    reader = csv.reader(text)
+    header = normalise_header(next(reader, []))
+    for values in reader:
+        yield {key: value for key, value in zip(header, values) if key}
+
+
+def iter_xlsx_rows(stream: BinaryIO) -> Iterator[dict]:
+    """Yield one dict per row of the first sheet using openpyxl's read-only mode."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX import requires the 'openpyxl' package")
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = normalise_header(next(rows, ()))
+        for values in rows:
+            yield {key: value for key, value in zip(header, values) if key}
+    finally:
+        workbook.close()
+
+
+def upsert_statement(dialect_name: str, update_existing: bool):
+    """Multi-row INSERT .. ON CONFLICT(email) for SQLite and PostgreSQL."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Contact import does not support the '{dialect_name}' database")
+    stmt = insert(Contact)
+    # RETURNING gives one row per contact inserted or updated; rows DO NOTHING skipped are absent
+    if not update_existing:
+        return stmt.on_conflict_do_nothing(index_elements=[Contact.email]).returning(Contact.id)
+    # Keep existing values where the file leaves a column empty
+    return stmt.on_conflict_do_update(
+        index_elements=[Contact.email],
+        set_={
+            name: func.coalesce(getattr(stmt.excluded, name), getattr(Contact, name))
+            for name in FIELDS
+        },
+    ).returning(Contact.id)
+
+
+class ContactImporter:
+    def __init__(self, batch_size: int = BATCH_SIZE):
+        self.batch_size = batch_size
+
+    def import_rows(self, db, rows: Iterable[dict], update_existing: bool = True) -> ContactImportResult:
+        """Validate, dedupe and upsert rows in fixed-size batches, committing each batch."""
+        result = ContactImportResult()
+        stmt = upsert_statement(db.get_bind().dialect.name, update_existing)
+        started = time.perf_counter()
+        batch = {}
+        for line_number, row in enumerate(rows, start=2):
+            result.processed += 1
+            address = str(row.get("email") or "").strip().lower()
+            if not EmailValidator.is_valid(address):
+                result.rejected += 1
+                if len(result.rejected_samples) < MAX_REJECTED_SAMPLES:
+                    result.rejected_samples.append({"row": line_number, "email": address, "reason": "invalid email"})
+                continue
+            if address in batch:
+                result.duplicates += 1
+            batch[address] = {
+                "email": address,
+                **{name: (str(row[name]).strip()[:255] or None) if row.get(name) is not None else None for name in FIELDS},
+            }
+            if len(batch) >= self.batch_size:
+                self._flush(db, stmt, batch, result)
+        self._flush(db, stmt, batch, result)
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    @staticmethod
+    def _flush(db, stmt, batch: dict, result: ContactImportResult) -> None:
+        if not batch:
+            return
+        written = len(db.execute(stmt, list(batch.values())).all())
+        db.commit()
+        result.written += written
+        result.skipped += len(batch) - written
+        batch.clear()
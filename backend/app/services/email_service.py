@@ -1,63 +1,217 @@
+import logging
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import time
+from collections import OrderedDict
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from sqlalchemy import insert
 from app.core.config import get_settings
+from app.core.logging import Sampler
+from app.models.contact import Contact
+from app.models.sent_message import SentMessage
+from app.services.bounce_processing import is_dead_mailbox_error
+from app.services.message_builder import PreparedMessage
+from app.services.send_scheduler import SendDeferred, classify_failure
+from app.services.smtp_pool import get_smtp_pool
+from app.services.suppression import suppression_list
+
+logger = logging.getLogger(__name__)
+
+SUPPRESSED_ERROR = "Not sent: address is on the suppression list (earlier hard bounce)"
+# Distinct (subject, body) pairs kept serialised between batches; personalised bodies rarely repeat
+PREPARED_CACHE_SIZE = 32
+
+@dataclass
+class RecipientResult:
+    recipient: str
+    success: bool
+    error: Optional[str] = None
+    message_id: Optional[str] = None
+    suppressed: bool = False  # skipped without contacting the server
+    dead_mailbox: Optional[str] = None  # permanent rejection detail; the address should be suppressed
+    retry_after: Optional[float] = None  # temporary failure: seconds before it may be retried
+    deferred: bool = False  # held back by the rate limits without contacting the server
+
+@dataclass
+class BulkSendResult:
+    results: List[RecipientResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def sent_count(self) -> int:
+        return sum(1 for r in self.results if r.success)
+
+    @property
+    def failed_count(self) -> int:
+        return len(self.results) - self.sent_count
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.sent_count / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "sent": self.sent_count,
+            "failed": self.failed_count,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "messages_per_second": round(self.messages_per_second, 2),
+            "results": [r.__dict__ for r in self.results],
+        }
 
 class EmailService:
-    def __init__(self):
-        settings = get_settings()
+    """Sends over the shared SMTP pool.
+
+    Keep one instance across batches of the same campaign: it reuses its
+    sender threads and the messages it has already serialised. `close()`
+    stops the threads.
+    """
+
+    def __init__(self, settings=None):
+        # Explicit settings get their own pool; otherwise the shared one for the current settings
+        self.pinned_settings = settings
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._apply(settings or get_settings())
+
+    def _apply(self, settings) -> None:
         self.user = settings.EMAIL_USER
         self.password = settings.EMAIL_PASSWORD
         self.smtp_server = settings.SMTP_SERVER
         self.smtp_port = settings.SMTP_PORT
+        if self._executor is not None and self.send_workers != max(1, settings.SMTP_SEND_WORKERS):
+            self.close()
+        self.send_workers = max(1, settings.SMTP_SEND_WORKERS)
+        self.msgid_domain = self.user.rpartition('@')[2] or None
+        self.settings = settings
+        self.sent_log_sampler = Sampler(settings.LOG_SEND_SAMPLE_RATE)
+        # The sender address is part of the serialised headers
+        self._prepared: OrderedDict = OrderedDict()
 
-    def send_bulk_emails(self, recipients: list, subject: str, body: str) -> bool:
-        """Send bulk emails to recipients."""
-        if not recipients:
-            raise ValueError("No recipients provided")
-        
-        if not self.user or not self.password:
-            raise ValueError("Email credentials not configured. Please configure SMTP settings.")
-        
-        server = None
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def prepare(self, subject: str, body: str) -> PreparedMessage:
+        """The serialised message for this content, built once per instance."""
+        key = (subject, body)
+        prepared = self._prepared.get(key)
+        if prepared is None:
+            prepared = self._prepared[key] = PreparedMessage(self.user, subject, body, msgid_domain=self.msgid_domain)
+            if len(self._prepared) > PREPARED_CACHE_SIZE:
+                self._prepared.popitem(last=False)
+        else:
+            self._prepared.move_to_end(key)
+        return prepared
+
+    def _send_one(self, pool, prepared: PreparedMessage, recipient: str) -> RecipientResult:
         try:
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=10)
-            server.starttls()
-            server.login(self.user, self.password)
-
-            sent_count = 0
-            for recipient in recipients:
-                try:
-                    msg = MIMEMultipart()
-                    msg['From'] = self.user
-                    msg['To'] = recipient
-                    msg['Subject'] = subject
-                    msg.attach(MIMEText(body, 'plain'))
-                    server.send_message(msg)
-                    sent_count += 1
-                    print(f"Email sent to {recipient}")
-                except Exception as e:
-                    print(f"Failed to send to {recipient}: {e}")
-                    continue
-            
-            if sent_count == 0:
-                raise Exception("No emails sent successfully")
-            
-            print(f"Successfully sent {sent_count}/{len(recipients)} emails")
-            return True
-        except smtplib.SMTPAuthenticationError as e:
-            raise Exception("Email authentication failed. Check your credentials.")
-        except Exception as e:
-            print(f"Failed to send emails: {e}")
+            message_id, data = prepared.for_recipient(recipient)
+            pool.scheduler.acquire(recipient)
+            pool.sendmail(self.user, [recipient], data)
+            pool.scheduler.succeeded(recipient)
+            if self.sent_log_sampler.hit():
+                logger.info(
+                    "Email sent",
+                    extra={"recipient": recipient, "sampled_1_in": self.sent_log_sampler.every},
+                )
+            return RecipientResult(recipient, True, message_id=message_id)
+        except smtplib.SMTPAuthenticationError:
             raise
-        finally:
-            if server:
-                try:
-                    server.quit()
-                except:
-                    pass
-            if server:
-                try:
-                    server.quit()
-                except:
-                    pass
\ No newline at end of file
+        except SendDeferred as e:
+            return RecipientResult(recipient, False, str(e), retry_after=e.delay, deferred=True)
+        except Exception as e:
+            logger.warning("Failed to send: %s", e, extra={"recipient": recipient})
+            scope, transient = classify_failure(e, recipient)
+            if not transient:
+                return RecipientResult(recipient, False, str(e), dead_mailbox=is_dead_mailbox_error(e, recipient))
+            retry_after = pool.scheduler.throttled(recipient, scope) if scope else 0.0
+            return RecipientResult(recipient, False, str(e), retry_after=retry_after)
+
+    def send_many(self, recipients: list, subject: str, body: str) -> BulkSendResult:
+        """Deliver the same message to every recipient over the shared SMTP pool."""
+        return self.send_each([(recipient, subject, body) for recipient in recipients])
+
+    def send_each(self, messages: List[Tuple[str, str, str]]) -> BulkSendResult:
+        """Deliver (recipient, subject, body) messages in parallel over the shared SMTP pool."""
+        settings = self.pinned_settings or get_settings()
+        if settings is not self.settings:
+            # Reloaded since the last batch (e.g. new credentials saved in another worker)
+            self._apply(settings)
+        if not self.user or not self.password:
+            raise ValueError("Email credentials not configured. Please configure SMTP settings.")
+
+        pool = get_smtp_pool(self.pinned_settings)
+        started = time.perf_counter()
+        suppression_list.refresh()
+        results = [None] * len(messages)
+        jobs = []
+        for index, (recipient, subject, body) in enumerate(messages):
+            if recipient in suppression_list:
+                results[index] = RecipientResult(recipient, False, SUPPRESSED_ERROR, suppressed=True)
+                continue
+            try:
+                # Identical content (the common bulk case) is serialised only once
+                prepared = self.prepare(subject, body)
+            except Exception as e:
+                # Content that cannot be serialised (e.g. a line break in the subject) fails only this message
+                logger.warning("Failed to build message: %s", e, extra={"recipient": recipient})
+                results[index] = RecipientResult(recipient, False, str(e))
+                continue
+            jobs.append((index, prepared, recipient))
+        if jobs:
+            if self._executor is None:
+                # Threads start on demand, so a short batch does not start them all
+                self._executor = ThreadPoolExecutor(max_workers=self.send_workers, thread_name_prefix="smtp-send")
+            try:
+                with pool.lease():
+                    # Each job runs in a copy of the caller's context so its log lines keep the campaign fields
+                    sent = self._executor.map(
+                        lambda job: job[0].run(self._send_one, pool, job[2], job[3]),
+                        [(copy_context(), *job) for job in jobs],
+                    )
+                    for (index, _, _), result in zip(jobs, sent):
+                        results[index] = result
+            except smtplib.SMTPAuthenticationError:
+                raise Exception("Email authentication failed. Check your credentials.")
+
+        return BulkSendResult(results=results, elapsed=time.perf_counter() - started)
+
+    def record_sent(self, db, results: List[RecipientResult], campaign_id: Optional[int] = None) -> None:
+        """Index outbound Message-IDs so replies can be threaded back to them.
+
+        Rows are added to the caller's transaction; the caller commits.
+        """
+        delivered = [r for r in results if r.success and r.message_id]
+        if not delivered:
+            return
+        contact_ids = dict(
+            db.query(Contact.email, Contact.id)
+            .filter(Contact.email.in_({r.recipient for r in delivered}))
+            .all()
+        )
+        db.execute(insert(SentMessage), [
+            {
+                "message_id": r.message_id,
+                "recipient": r.recipient,
+                "campaign_id": campaign_id,
+                "contact_id": contact_ids.get(r.recipient),
+            }
+            for r in delivered
+        ])
+
+    def send_bulk_emails(self, recipients: list, subject: str, body: str) -> BulkSendResult:
+        """Send bulk emails to recipients, failing if none were delivered."""
+        if not recipients:
+            raise ValueError("No recipients provided")
+
+        result = self.send_many(recipients, subject, body)
+        if result.sent_count == 0:
+            raise Exception("No emails sent successfully")
+
+        logger.info(
+            "Sent %d/%d emails (%.1f msgs/sec)",
+            result.sent_count, len(recipients), result.messages_per_second,
+        )
+        return result
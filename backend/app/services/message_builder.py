@@ -0,0 +1,48 @@
+"""Builds bulk messages once and stamps per-recipient headers onto the bytes."""
+
+from email import policy
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
+from typing import Optional, Tuple
+
+# How smtplib.send_message flattens a message built with the legacy MIME classes
+WIRE_POLICY = policy.compat32.clone(linesep="\r\n")
+
+
+def build_mime(sender: str, recipient: Optional[str], subject: str, body: str) -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    if recipient is not None:
+        msg['To'] = recipient
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+
+class PreparedMessage:
+    """A message serialised once; only To, Message-ID and Date differ per recipient.
+
+    The shared headers and the encoded body parts are flattened to SMTP
+    (CRLF) bytes a single time, so each recipient costs a few byte
+    concatenations instead of a MIME tree build and flatten.
+    """
+
+    __slots__ = ("sender", "msgid_domain", "_head", "_tail")
+
+    def __init__(self, sender: str, subject: str, body: str, msgid_domain: Optional[str] = None):
+        self.sender = sender
+        self.msgid_domain = msgid_domain
+        data = build_mime(sender, None, subject, body).as_bytes(policy=WIRE_POLICY)
+        self._head, separator, rest = data.partition(b"\r\n\r\n")
+        self._tail = separator + rest
+
+    def for_recipient(self, recipient: str) -> Tuple[str, bytes]:
+        """Return (Message-ID, wire bytes) for one recipient."""
+        if not recipient.isascii() or "\r" in recipient or "\n" in recipient:
+            raise ValueError(f"Unsupported recipient address: {recipient!r}")
+        message_id = make_msgid(domain=self.msgid_domain)
+        headers = (
+            f"\r\nTo: {recipient}\r\nMessage-ID: {message_id}\r\nDate: {formatdate(usegmt=True)}"
+        ).encode("ascii")
+        return message_id, self._head + headers + self._tail
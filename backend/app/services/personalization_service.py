@@ -0,0 +1,209 @@
+"""Per-contact email personalisation that feeds the campaign queue as it goes.
+
+Recipients of a personalised campaign start out "drafting". Contacts are
+grouped several to a prompt, groups run with bounded concurrency, and each
+finished group is written back as "pending" with its own subject/body, so
+the queue workers deliver early groups while later ones are still being
+generated.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+from typing import Optional
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.models.campaign import Campaign
+from app.models.campaign_recipient import CampaignRecipient
+from app.models.contact import Contact
+from app.services.ai_service import AIService, ResponseCache, get_ai_service
+from app.services.campaign_queue import campaign_queue
+
+logger = logging.getLogger(__name__)
+
+CONTACT_FIELDS = ("name", "company", "position")
+PAGE_SIZE = 500
+JSON_ARRAY_PATTERN = re.compile(r'\[.*\]', re.DOTALL)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """True for Gemini quota/429 errors, which are worth retrying after a pause."""
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    return code == 429 or type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
+
+
+def build_batch_prompt(campaign: Campaign, instructions: str, contacts: list) -> str:
+    recipients = [
+        {"id": index, **{name: contact.get(name) or "" for name in CONTACT_FIELDS}}
+        for index, contact in enumerate(contacts)
+    ]
+    return (
+        "Personalise the outreach email below for each recipient.\n"
+        f"Instructions: {instructions or 'Keep the message and tone, adapt greeting and details to the recipient.'}\n\n"
+        f"Base subject: {campaign.subject}\n"
+        f"Base email:\n{campaign.body}\n\n"
+        f"Recipients (JSON): {json.dumps(recipients)}\n\n"
+        'Return only a JSON array with one object per recipient: {"id": <id>, "subject": "...", "body": "..."}.'
+    )
+
+
+def parse_batch_response(text: str, count: int) -> dict:
+    """Map recipient index -> {"subject", "body"}; malformed entries are skipped."""
+    match = JSON_ARRAY_PATTERN.search(text or "")
+    if not match:
+        return {}
+    try:
+        items = json.loads(match.group(0))
+    except ValueError:
+        return {}
+    variants = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        index = item.get("id")
+        if isinstance(index, int) and 0 <= index < count and item.get("body"):
+            variants[index] = {"subject": str(item.get("subject") or "")[:500], "body": str(item["body"])}
+    return variants
+
+
+class PersonalizationPipeline:
+    def __init__(self, ai_service: Optional[AIService] = None, session_factory=SessionLocal, queue=campaign_queue):
+        settings = get_settings()
+        self._ai_service = ai_service
+        self.session_factory = session_factory
+        self.queue = queue
+        self.batch_size = max(1, settings.PERSONALIZE_BATCH_SIZE)
+        self.concurrency = max(1, settings.PERSONALIZE_CONCURRENCY)
+        self.max_retries = settings.PERSONALIZE_MAX_RETRIES
+        self.cache = ResponseCache(maxsize=10000, ttl=settings.AI_CACHE_TTL_SECONDS)
+        self._tasks: set = set()
+
+    @property
+    def ai_service(self) -> AIService:
+        return self._ai_service or get_ai_service()
+
+    def start(self, campaign_id: int, instructions: str = "") -> None:
+        """Run personalisation for a campaign in the background on the current event loop."""
+        task = asyncio.get_running_loop().create_task(self.run(campaign_id, instructions))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def run(self, campaign_id: int, instructions: str = "") -> None:
+        campaign = await asyncio.to_thread(self._load_campaign, campaign_id)
+        template_key = hashlib.sha256(
+            "\x1f".join((campaign.subject, campaign.body, instructions or "")).encode("utf-8")
+        ).hexdigest()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        after_id = 0
+        while True:
+            page = await asyncio.to_thread(self._load_drafting_page, campaign_id, after_id)
+            if not page:
+                break
+            after_id = page[-1]["recipient_id"]
+            groups = [page[i:i + self.batch_size] for i in range(0, len(page), self.batch_size)]
+            await asyncio.gather(*(
+                self._personalise_group(semaphore, campaign, instructions, template_key, group)
+                for group in groups
+            ))
+        logger.info("Personalisation finished", extra={"campaign_id": campaign_id})
+
+    async def _personalise_group(self, semaphore, campaign, instructions: str, template_key: str, group: list) -> None:
+        variants = {}
+        missing = []
+        for index, contact in enumerate(group):
+            cached = self.cache.get(self._contact_key(template_key, contact))
+            if cached is not None:
+                variants[index] = json.loads(cached)
+            else:
+                missing.append(index)
+
+        if missing:
+            contacts = [group[index] for index in missing]
+            async with semaphore:
+                generated = await self._generate(build_batch_prompt(campaign, instructions, contacts), len(contacts))
+            for position, variant in generated.items():
+                index = missing[position]
+                variants[index] = variant
+                self.cache.set(self._contact_key(template_key, group[index]), json.dumps(variant))
+
+        # Contacts the model skipped still get the campaign's generic content
+        updates = [
+            {
+                "id": contact["recipient_id"],
+                "subject": variants.get(index, {}).get("subject") or None,
+                "body": variants.get(index, {}).get("body") or None,
+                "status": "pending",
+            }
+            for index, contact in enumerate(group)
+        ]
+        await asyncio.to_thread(self._store, updates)
+        self.queue.notify_drafted()
+
+    async def _generate(self, prompt: str, count: int) -> dict:
+        """Call the model with exponential backoff on rate limiting; {} if it keeps failing."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return parse_batch_response(await self.ai_service.complete(prompt), count)
+            except Exception as e:
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    logger.warning("Personalisation batch failed, using generic email: %s", e)
+                    return {}
+                await asyncio.sleep((2 ** attempt) + random.random())
+        return {}
+
+    @staticmethod
+    def _contact_key(template_key: str, contact: dict) -> str:
+        fields = "\x1f".join(str(contact.get(name) or "") for name in CONTACT_FIELDS)
+        return hashlib.sha256(f"{template_key}\x1f{fields}".encode("utf-8")).hexdigest()
+
+    def _load_campaign(self, campaign_id: int) -> Campaign:
+        db = self.session_factory()
+        try:
+            campaign = db.get(Campaign, campaign_id)
+            db.expunge(campaign)
+            return campaign
+        finally:
+            db.close()
+
+    def _load_drafting_page(self, campaign_id: int, after_id: int) -> list:
+        db = self.session_factory()
+        try:
+            rows = (
+                db.query(CampaignRecipient.id, CampaignRecipient.email, Contact.name, Contact.company, Contact.position)
+                .outerjoin(Contact, Contact.id == CampaignRecipient.contact_id)
+                .filter(
+                    CampaignRecipient.campaign_id == campaign_id,
+                    CampaignRecipient.status == "drafting",
+                    CampaignRecipient.id > after_id,
+                )
+                .order_by(CampaignRecipient.id)
+                .limit(PAGE_SIZE)
+                .all()
+            )
+            return [
+                {"recipient_id": row.id, "email": row.email, "name": row.name, "company": row.company, "position": row.position}
+                for row in rows
+            ]
+        finally:
+            db.close()
+
+    def _store(self, updates: list) -> None:
+        db = self.session_factory()
+        try:
+            # Only rows still drafting: the queue may have released them after a stall
+            for update in updates:
+                db.query(CampaignRecipient).filter(
+                    CampaignRecipient.id == update["id"], CampaignRecipient.status == "drafting"
+                ).update(
+                    {"subject": update["subject"], "body": update["body"], "status": "pending"},
+                    synchronize_session=False,
+                )
+            db.commit()
+        finally:
+            db.close()
+
+
+personalization_pipeline = PersonalizationPipeline()
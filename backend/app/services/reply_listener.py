@@ -0,0 +1,255 @@
+"""Long-lived IMAP IDLE listener that pushes HR replies into the event loop."""
+
+import asyncio
+import imaplib
+import logging
+import os
+import select
+import socket
+import ssl
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from app.core.config import get_settings, settings_registry
+from app.core.database import SessionLocal
+from app.models.mailbox_checkpoint import MailboxCheckpoint
+from app.services.reply_service import ReplyCheckerService
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 300
+
+
+class ReplyListener:
+    """Runs on its own thread: scan, IDLE until the mailbox changes, scan again.
+
+    IDLE is re-issued every `idle_seconds` (servers drop it after ~29
+    minutes), the connection is re-established with exponential backoff on
+    any error, and servers without IDLE fall back to a slow poll. Replies are
+    put on `events`, an asyncio.Queue owned by the app's event loop.
+
+    Every worker runs a listener, but only the one holding the lease on the
+    mailbox's checkpoint row opens a session; the others stand by and take
+    over once the lease runs out.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        settings = get_settings()
+        self.user = settings.EMAIL_USER
+        self.password = settings.EMAIL_PASSWORD
+        self.idle_seconds = settings.REPLY_IDLE_SECONDS
+        self.poll_seconds = settings.REPLY_POLL_SECONDS
+        self.lease = timedelta(seconds=settings.REPLY_LISTENER_LEASE_SECONDS)
+        self.renew_seconds = settings.REPLY_LISTENER_LEASE_SECONDS / 3
+        self.listener_id: Optional[str] = None
+        self._renew_at = 0.0
+        self.session_factory = session_factory
+        self.checker = ReplyCheckerService(session_factory=session_factory)
+        self.events: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._reconnect = threading.Event()
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._thread:
+            return
+        self._loop = loop
+        self.events = asyncio.Queue()
+        self._stop.clear()
+        # Set here rather than at import: gunicorn may fork after importing the app
+        self.listener_id = f"{socket.gethostname()}:{os.getpid()}"
+        settings_registry.subscribe(self._settings_changed)
+        self._thread = threading.Thread(target=self._run, name="reply-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        try:
+            self._release()
+        except Exception as e:
+            logger.warning("Could not release the reply listener lease: %s", e)
+
+    def _claim(self) -> bool:
+        """Take or renew the lease on this mailbox; False while another worker holds it."""
+        now = datetime.utcnow()
+        mailbox = self.checker.mailbox
+        db = self.session_factory()
+        try:
+            owned = (
+                MailboxCheckpoint.account == self.user,
+                MailboxCheckpoint.mailbox == mailbox,
+            )
+            if db.query(MailboxCheckpoint.id).filter(*owned).first() is None:
+                db.add(MailboxCheckpoint(account=self.user, mailbox=mailbox, last_uid=0))
+                try:
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()  # another worker created it first
+            claimed = (
+                db.query(MailboxCheckpoint)
+                .filter(*owned, or_(
+                    MailboxCheckpoint.listener_id.is_(None),
+                    MailboxCheckpoint.listener_id == self.listener_id,
+                    MailboxCheckpoint.listener_lease_until < now,
+                ))
+                .update(
+                    {"listener_id": self.listener_id, "listener_lease_until": now + self.lease},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+        finally:
+            db.close()
+        self._renew_at = time.monotonic() + self.renew_seconds
+        return bool(claimed)
+
+    def _release(self) -> None:
+        if self.listener_id is None:
+            return
+        db = self.session_factory()
+        try:
+            db.query(MailboxCheckpoint).filter(MailboxCheckpoint.listener_id == self.listener_id).update(
+                {"listener_id": None, "listener_lease_until": None}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _keep_lease(self) -> None:
+        """Renew the lease when due; a lost lease ends the session."""
+        get_settings()  # notices credentials saved by another worker, see _settings_changed
+        if time.monotonic() >= self._renew_at and not self._claim():
+            logger.warning("Reply listener lease taken over by another worker")
+            self._reconnect.set()
+
+    def _wait(self, seconds: float) -> bool:
+        """Sleep up to `seconds` while keeping the lease; False if interrupted."""
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if self._stop.wait(min(self.renew_seconds, deadline - time.monotonic())):
+                return False
+            self._keep_lease()
+            if self._reconnect.is_set():
+                return False
+        return True
+
+    def _settings_changed(self, settings) -> None:
+        """Log in again with new credentials saved in this or another worker."""
+        if (settings.EMAIL_USER, settings.EMAIL_PASSWORD) != (self.user, self.password):
+            self.user, self.password = settings.EMAIL_USER, settings.EMAIL_PASSWORD
+            self._reconnect.set()
+
+    def _publish(self, replies: list) -> None:
+        for reply in replies:
+            self._loop.call_soon_threadsafe(self.events.put_nowait, reply)
+
+    def _scan(self, mail: imaplib.IMAP4) -> None:
+        db = self.session_factory()
+        try:
+            replies = self.checker.scan_mailbox(mail, db, self.user)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        self._publish(replies)
+
+    def _run(self) -> None:
+        backoff = 1
+        while not self._stop.is_set():
+            mail = None
+            try:
+                self._reconnect.clear()
+                if not self._claim():
+                    # Another worker has the session; check again when its lease could have lapsed
+                    self._stop.wait(self.renew_seconds)
+                    continue
+                mail = self.checker.connect(self.user, self.password)
+                supports_idle = "IDLE" in mail.capabilities
+                self._scan(mail)
+                backoff = 1
+                while not self._stop.is_set() and not self._reconnect.is_set():
+                    if supports_idle:
+                        changed = self._idle(mail, self.idle_seconds)
+                    else:
+                        changed = self._wait(self.poll_seconds)
+                    if changed:
+                        self._scan(mail)
+                    elif supports_idle:
+                        mail.noop()
+            except Exception as e:
+                logger.warning("Reply listener error, reconnecting in %ss: %s", backoff, e)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+            finally:
+                if mail is not None:
+                    try:
+                        mail.logout()
+                    except Exception:
+                        pass
+
+    @staticmethod
+    def _buffered(mail: imaplib.IMAP4) -> bool:
+        """Whether imaplib's reader holds unread bytes, e.g. an EXISTS that came with "+ idling"."""
+        sock = mail.sock
+        timeout = sock.gettimeout()
+        # Non-blocking, so peeking an empty buffer cannot wait on the socket
+        sock.settimeout(0)
+        try:
+            return bool(mail.file.peek(1))
+        except (BlockingIOError, ssl.SSLWantReadError):
+            return False
+        finally:
+            sock.settimeout(timeout)
+
+    @classmethod
+    def _readable(cls, mail: imaplib.IMAP4, timeout: float) -> bool:
+        if cls._buffered(mail):
+            return True
+        pending = getattr(mail.sock, "pending", None)
+        if pending and pending():
+            return True
+        readable, _, _ = select.select([mail.sock], [], [], timeout)
+        return bool(readable)
+
+    def _idle(self, mail: imaplib.IMAP4, timeout: float) -> bool:
+        """Hold one IDLE command open; True once the server reports new mail."""
+        tag = mail._new_tag()
+        mail.send(tag + b" IDLE\r\n")
+        response = mail.readline()
+        if not response.startswith(b"+"):
+            raise imaplib.IMAP4.abort(f"IDLE rejected: {response!r}")
+
+        changed = False
+        deadline = time.monotonic() + timeout
+        while not self._stop.is_set() and not self._reconnect.is_set() and time.monotonic() < deadline:
+            if not self._readable(mail, 1.0):
+                self._keep_lease()
+                continue
+            line = mail.readline()
+            if not line or line.startswith(b"* BYE"):
+                raise imaplib.IMAP4.abort("connection closed during IDLE")
+            if line.rstrip().endswith(b"EXISTS"):
+                changed = True
+                break
+
+        mail.send(b"DONE\r\n")
+        while True:
+            line = mail.readline()
+            if not line:
+                raise imaplib.IMAP4.abort("connection closed while leaving IDLE")
+            if line.startswith(tag):
+                break
+            if line.rstrip().endswith(b"EXISTS"):
+                changed = True
+        return changed
+
+
+reply_listener = ReplyListener()
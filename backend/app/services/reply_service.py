@@ -1,42 +1,314 @@
 import imaplib
 import email
+import logging
+import re
+from email.utils import parseaddr
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.core.metrics import imap_operation_seconds
+from app.models.mailbox_checkpoint import MailboxCheckpoint
+from app.services.bounce_processing import (
+    bounce_processor, delivery_status_bytes, is_delivery_report, is_hard_bounce, parse_delivery_status,
+)
+from app.services.reply_tracking import ReplyTracker
+
+logger = logging.getLogger(__name__)
+
+FETCH_CHUNK_SIZE = 500
+SNIPPET_BYTES = 2048
+REPLY_HEADER_FIELDS = (
+    "FROM SUBJECT DATE MESSAGE-ID IN-REPLY-TO REFERENCES CONTENT-TYPE CONTENT-TRANSFER-ENCODING"
+)
+# Headers plus the MIME headers and first 2KB of part 1: enough for a snippet, never attachments
+HEADERS_FETCH_ITEMS = (
+    f"(UID BODY.PEEK[HEADER.FIELDS ({REPLY_HEADER_FIELDS})] "
+    f"BODY.PEEK[1.MIME] BODY.PEEK[1]<0.{SNIPPET_BYTES}>)"
+)
+FULL_FETCH_ITEMS = "(UID RFC822)"
+# Part 2 of a multipart/report DSN is the machine-readable delivery status
+DELIVERY_STATUS_FETCH_ITEMS = "(UID BODY.PEEK[2]<0.8192>)"
+UID_PATTERN = re.compile(rb'UID (\d+)')
+MESSAGE_START_PATTERN = re.compile(rb'^\s*\d+ \(')
+
+
+def uid_set(uids: list) -> str:
+    """Compress sorted UIDs into an IMAP sequence set, e.g. 1:4,9,12:13."""
+    ranges = []
+    start = prev = None
+    for uid in uids:
+        if start is None:
+            start = prev = uid
+        elif uid == prev + 1:
+            prev = uid
+        else:
+            ranges.append(f"{start}:{prev}" if start != prev else str(start))
+            start = prev = uid
+    if start is not None:
+        ranges.append(f"{start}:{prev}" if start != prev else str(start))
+    return ",".join(ranges)
+
+
+def parse_fetch_response(data: list) -> dict:
+    """Group a multi-message UID FETCH response into {uid: {section: bytes}}.
+
+    Sections are keyed as "header", "mime", "partial", "status" or "full". The UID may
+    arrive before or after the literals, so it is looked up in both.
+    """
+    messages = {}
+    current = None
+    uid = None
+
+    def flush():
+        if current is not None and uid is not None:
+            messages[uid] = current
+
+    for item in data:
+        prefix = item[0] if isinstance(item, tuple) else item
+        if not isinstance(prefix, bytes):
+            continue
+        if MESSAGE_START_PATTERN.match(prefix):
+            flush()
+            current, uid = {}, None
+        if current is None:
+            continue
+        match = UID_PATTERN.search(prefix)
+        if match:
+            uid = int(match.group(1))
+        if not isinstance(item, tuple):
+            continue
+        if b"HEADER.FIELDS" in prefix:
+            current["header"] = item[1]
+        elif b"BODY[1.MIME]" in prefix:
+            current["mime"] = item[1]
+        elif b"BODY[1]" in prefix:
+            current["partial"] = item[1]
+        elif b"BODY[2]" in prefix:
+            current["status"] = item[1]
+        elif b"RFC822" in prefix:
+            current["full"] = item[1]
+    flush()
+    return messages
+
+
+def decode_partial_body(headers, mime_headers: bytes, partial: bytes) -> str:
+    """Best-effort text from a truncated first body part."""
+    if not partial:
+        return ""
+    part_headers = mime_headers if mime_headers and mime_headers.strip() else b""
+    if not part_headers:
+        # Single-part message: the top-level headers describe the body
+        part_headers = "".join(
+            f"{name}: {headers[name]}\r\n"
+            for name in ("Content-Type", "Content-Transfer-Encoding")
+            if headers[name]
+        ).encode()
+    msg = email.message_from_bytes(part_headers.rstrip(b"\r\n") + b"\r\n\r\n" + partial)
+    return extract_body_text(msg)
+
+
+def extract_body_text(msg) -> str:
+    """Return the first text/plain payload of a message."""
+    body = ""
+    if msg.is_multipart():
+        for part in msg.walk():
+            if part.get_content_type() == "text/plain":
+                payload = part.get_payload(decode=True)
+                if payload: body = payload.decode(errors='ignore')
+                break
+    else:
+        payload = msg.get_payload(decode=True)
+        if payload: body = payload.decode(errors='ignore')
+    return body
+
 
 class ReplyCheckerService:
-    def __init__(self):
-        self.host = "imap.gmail.com"
+    """Scans the inbox for HR replies, resuming from a persisted UID checkpoint.
+
+    Each pass only looks at messages whose UID is above the stored
+    checkpoint (reset when UIDVALIDITY changes), and on CONDSTORE servers
+    an unchanged HIGHESTMODSEQ skips the pass without any SEARCH at all.
+    New messages are fetched in UID-range batches; by default only their
+    headers and the first 2KB of the first body part are transferred.
+    Delivery status notifications among them are handed to the bounce
+    processor instead of reply matching.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        settings = get_settings()
+        self.host = settings.IMAP_SERVER
+        self.port = settings.IMAP_PORT
+        self.use_ssl = settings.IMAP_USE_SSL
+        self.mailbox = settings.IMAP_MAILBOX
+        self.fetch_mode = settings.REPLY_FETCH_MODE
+        self.session_factory = session_factory
+        self.tracker = ReplyTracker()
+
+    def connect(self, user_email: str, app_password: str) -> imaplib.IMAP4:
+        mail_class = imaplib.IMAP4_SSL if self.use_ssl else imaplib.IMAP4
+        with imap_operation_seconds.labels(operation="login").time():
+            mail = mail_class(self.host, self.port)
+            mail.login(user_email, app_password)
+        return mail
 
-    def check_for_replies(self, user_email: str, app_password: str, known_hr_emails: list):
+    def check_for_replies(self, user_email: str, app_password: str, known_hr_emails: list = ()):
         replies = []
+        db = self.session_factory()
         try:
-            mail = imaplib.IMAP4_SSL(self.host)
-            mail.login(user_email, app_password)
-            mail.select("inbox")
-
-            for hr_email in known_hr_emails:
-                status, messages = mail.search(None, f'(FROM "{hr_email}")')
-                if status == "OK":
-                    for num in messages[0].split():
-                        _, data = mail.fetch(num, "(RFC822)")
-                        msg = email.message_from_bytes(data[0][1])
-                        
-                        # Fix: Safely get snippet even if multipart
-                        body = ""
-                        if msg.is_multipart():
-                            for part in msg.walk():
-                                if part.get_content_type() == "text/plain":
-                                    payload = part.get_payload(decode=True)
-                                    if payload: body = payload.decode(errors='ignore')
-                                    break
-                        else:
-                            payload = msg.get_payload(decode=True)
-                            if payload: body = payload.decode(errors='ignore')
-
-                        replies.append({
-                            "from": hr_email,
-                            "subject": msg['subject'],
-                            "snippet": body[:100] if body else "No content preview available"
-                        })
-            mail.logout()
+            mail = self.connect(user_email, app_password)
+            try:
+                replies = self.scan_mailbox(mail, db, user_email, known_hr_emails)
+            finally:
+                mail.logout()
         except Exception as e:
-            print(f"Error checking mail: {e}")
-        return replies
\ No newline at end of file
+            db.rollback()
+            logger.exception("Error checking mail")
+        finally:
+            db.close()
+        return replies
+
+    def scan_mailbox(self, mail: imaplib.IMAP4, db, account: str, known_hr_emails: list = ()) -> list:
+        """Fetch messages newer than the checkpoint, then store and return the replies among them.
+
+        Replies are recognised by threading headers against our sent
+        Message-IDs or by a sender that is a stored contact;
+        `known_hr_emails` adds further sender addresses to accept.
+        """
+        condstore = "CONDSTORE" in mail.capabilities
+        if condstore and "ENABLE" in mail.capabilities:
+            try:
+                mail.enable("CONDSTORE")
+            except imaplib.IMAP4.error:
+                condstore = False
+
+        with imap_operation_seconds.labels(operation="select").time():
+            status, _ = mail.select(self.mailbox, readonly=True)
+        if status != "OK":
+            raise imaplib.IMAP4.error(f"Cannot select {self.mailbox}")
+        uidvalidity = self._response_int(mail, "UIDVALIDITY")
+        uidnext = self._response_int(mail, "UIDNEXT")
+        modseq = self._response_int(mail, "HIGHESTMODSEQ") if condstore else None
+
+        checkpoint = self._load_checkpoint(db, account)
+        if checkpoint.uidvalidity != uidvalidity:
+            # UIDs from the old epoch are meaningless; start over for this mailbox
+            checkpoint.uidvalidity = uidvalidity
+            checkpoint.last_uid = 0
+            checkpoint.highest_modseq = None
+
+        unchanged = (
+            (modseq is not None and checkpoint.highest_modseq == modseq)
+            or (uidnext is not None and uidnext <= checkpoint.last_uid + 1)
+        )
+        if unchanged:
+            db.commit()
+            return []
+
+        new_uids = self._search_new_uids(mail, checkpoint.last_uid)
+        replies = []
+        for start in range(0, len(new_uids), FETCH_CHUNK_SIZE):
+            chunk = new_uids[start:start + FETCH_CHUNK_SIZE]
+            messages = self._fetch_messages(mail, chunk)
+            reports = [message for message in messages if "delivery_status" in message]
+            if reports:
+                self._process_bounces(db, reports)
+            matched = self.tracker.match(
+                db, [message for message in messages if "delivery_status" not in message], known_hr_emails
+            )
+            self.tracker.save(db, matched)
+            replies.extend(matched)
+
+        if new_uids:
+            checkpoint.last_uid = new_uids[-1]
+        checkpoint.highest_modseq = modseq
+        db.commit()
+        return replies
+
+    def _load_checkpoint(self, db, account: str) -> MailboxCheckpoint:
+        checkpoint = (
+            db.query(MailboxCheckpoint)
+            .filter(MailboxCheckpoint.account == account, MailboxCheckpoint.mailbox == self.mailbox)
+            .first()
+        )
+        if checkpoint is None:
+            checkpoint = MailboxCheckpoint(account=account, mailbox=self.mailbox, last_uid=0)
+            db.add(checkpoint)
+        return checkpoint
+
+    @staticmethod
+    def _response_int(mail: imaplib.IMAP4, code: str):
+        _, data = mail.response(code)
+        if data and data[-1]:
+            try:
+                return int(data[-1])
+            except (TypeError, ValueError):
+                return None
+        return None
+
+    @staticmethod
+    def _search_new_uids(mail: imaplib.IMAP4, last_uid: int) -> list:
+        with imap_operation_seconds.labels(operation="search").time():
+            status, data = mail.uid("SEARCH", None, f"UID {last_uid + 1}:*")
+        if status != "OK" or not data or not data[0]:
+            return []
+        # "n:*" always matches the highest UID, even when it is below n
+        return sorted(uid for uid in map(int, data[0].split()) if uid > last_uid)
+
+    def _fetch_messages(self, mail: imaplib.IMAP4, uids: list) -> list:
+        """Fetch a UID range in one round-trip and build reply summaries."""
+        items = FULL_FETCH_ITEMS if self.fetch_mode == "full" else HEADERS_FETCH_ITEMS
+        with imap_operation_seconds.labels(operation="fetch").time():
+            status, data = mail.uid("FETCH", uid_set(uids), items)
+        if status != "OK":
+            return []
+        messages = []
+        pending_reports = {}
+        for uid, sections in sorted(parse_fetch_response(data).items()):
+            if "full" in sections:
+                msg = email.message_from_bytes(sections["full"])
+                body = extract_body_text(msg)
+            else:
+                msg = email.message_from_bytes(sections.get("header", b""))
+                body = decode_partial_body(msg, sections.get("mime"), sections.get("partial"))
+            summary = self._summarise(uid, msg, body)
+            if is_delivery_report(msg):
+                if "full" in sections:
+                    summary["delivery_status"] = parse_delivery_status(delivery_status_bytes(msg))
+                else:
+                    pending_reports[uid] = summary
+            messages.append(summary)
+
+        if pending_reports:
+            # Headers mode: one extra round-trip for just the status parts of the DSNs
+            with imap_operation_seconds.labels(operation="fetch_delivery_status").time():
+                status, data = mail.uid("FETCH", uid_set(sorted(pending_reports)), DELIVERY_STATUS_FETCH_ITEMS)
+            sections_by_uid = parse_fetch_response(data) if status == "OK" else {}
+            for uid, summary in pending_reports.items():
+                summary["delivery_status"] = parse_delivery_status(sections_by_uid.get(uid, {}).get("status"))
+        return messages
+
+    @staticmethod
+    def _process_bounces(db, reports: list) -> None:
+        bounces = [
+            {"recipient": entry["recipient"], "detail": entry["diagnostic"] or entry["status"]}
+            for report in reports
+            for entry in report["delivery_status"]
+            if is_hard_bounce(entry)
+        ]
+        added = bounce_processor.process(db, bounces)
+        if bounces:
+            logger.info(
+                "Processed %d delivery reports: %d hard bounces, %d newly suppressed", len(reports), len(bounces), added
+            )
+
+    @staticmethod
+    def _summarise(uid: int, msg, body: str) -> dict:
+        return {
+            "uid": uid,
+            "from": parseaddr(msg.get("From", ""))[1].lower(),
+            "subject": msg['subject'],
+            "date": msg['date'],
+            "message_id": (msg['message-id'] or "").strip() or None,
+            "in_reply_to": msg['in-reply-to'],
+            "references": msg['references'],
+            "snippet": body.strip()[:100] if body.strip() else "No content preview available"
+        }
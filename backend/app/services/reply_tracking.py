@@ -0,0 +1,124 @@
+"""Attributes inbound messages to our outbound mail and stores them as replies."""
+
+import hashlib
+import re
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Optional
+from app.models.contact import Contact
+from app.models.reply import Reply
+from app.models.sent_message import SentMessage
+from app.services.campaign_stats import campaign_stats
+
+MESSAGE_ID_PATTERN = re.compile(r'<[^<>\s]+>')
+# Length of the replies.message_id and in_reply_to columns
+STORED_ID_LENGTH = 255
+
+
+def thread_ids(message: dict) -> list:
+    """Message-IDs a message answers, most specific first (In-Reply-To, then References newest-first)."""
+    ids = MESSAGE_ID_PATTERN.findall(message.get("in_reply_to") or "")
+    ids += reversed(MESSAGE_ID_PATTERN.findall(message.get("references") or ""))
+    return list(dict.fromkeys(ids))
+
+
+def stored_id(message_id: Optional[str]) -> Optional[str]:
+    """A Message-ID as the replies table keeps it: as is, or shortened to a stable unique form if too long."""
+    if not message_id or len(message_id) <= STORED_ID_LENGTH:
+        return message_id
+    digest = hashlib.sha256(message_id.encode("utf-8", "surrogateescape")).hexdigest()
+    return f"{message_id[:STORED_ID_LENGTH - len(digest) - 1]}#{digest}"
+
+
+def parse_date(value: Optional[str]):
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).replace(tzinfo=None)
+    except (TypeError, ValueError):
+        return None
+
+
+class ReplyTracker:
+    """Matches scanned messages in batches with two indexed IN lookups.
+
+    A message is a reply when its In-Reply-To/References point at a
+    `SentMessage`, or failing that when its sender is a known `Contact`.
+    """
+
+    def match(self, db, messages: list, extra_senders: Iterable[str] = ()) -> list:
+        """Return the subset of `messages` that are replies, annotated with their ids."""
+        if not messages:
+            return []
+        wanted_ids = {mid for message in messages for mid in thread_ids(message)}
+        sent_by_id = {}
+        if wanted_ids:
+            sent_by_id = {
+                sent.message_id: sent
+                for sent in db.query(SentMessage).filter(SentMessage.message_id.in_(wanted_ids))
+            }
+        senders = {message["from"] for message in messages if message.get("from")}
+        contact_ids = dict(
+            db.query(Contact.email, Contact.id).filter(Contact.email.in_(senders)).all()
+        ) if senders else {}
+        extra = {address.lower() for address in extra_senders}
+
+        replies = []
+        for message in messages:
+            sent = next((sent_by_id[mid] for mid in thread_ids(message) if mid in sent_by_id), None)
+            contact_id = sent.contact_id if sent and sent.contact_id else contact_ids.get(message.get("from"))
+            if sent is None and contact_id is None and message.get("from") not in extra:
+                continue
+            replies.append({
+                **message,
+                "sent_message_id": sent.id if sent else None,
+                "campaign_id": sent.campaign_id if sent else None,
+                "contact_id": contact_id,
+            })
+        return replies
+
+    def save(self, db, replies: list) -> list:
+        """Insert replies not stored yet (deduped on Message-ID); the caller commits.
+
+        Over-long header values are shortened rather than failing the
+        insert, which would hold the mailbox checkpoint on this batch.
+        """
+        message_ids = {stored_id(reply["message_id"]) for reply in replies if reply.get("message_id")}
+        existing = set()
+        if message_ids:
+            existing = {
+                mid for (mid,) in db.query(Reply.message_id).filter(Reply.message_id.in_(message_ids))
+            }
+        # Only a recipient's first reply counts towards the campaign's reply rollups
+        sent_ids = {reply["sent_message_id"] for reply in replies if reply.get("sent_message_id")}
+        answered = set()
+        if sent_ids:
+            answered = {
+                sid for (sid,) in db.query(Reply.sent_message_id).filter(Reply.sent_message_id.in_(sent_ids))
+            }
+        events = []
+        saved = []
+        for reply in replies:
+            message_id = stored_id(reply.get("message_id"))
+            if message_id and message_id in existing:
+                continue
+            in_reply_to = thread_ids({"in_reply_to": reply.get("in_reply_to")})
+            row = Reply(
+                message_id=message_id,
+                in_reply_to=stored_id(in_reply_to[0]) if in_reply_to else None,
+                from_email=reply["from"][:255],
+                subject=(reply.get("subject") or "")[:500],
+                snippet=reply.get("snippet"),
+                sent_message_id=reply.get("sent_message_id"),
+                contact_id=reply.get("contact_id"),
+                campaign_id=reply.get("campaign_id"),
+                received_at=parse_date(reply.get("date")),
+            )
+            db.add(row)
+            saved.append(row)
+            if message_id:
+                existing.add(message_id)
+            if row.campaign_id and row.sent_message_id not in answered:
+                answered.add(row.sent_message_id)
+                events.append((row.campaign_id, "replied", row.from_email))
+        campaign_stats.record(db, events)
+        return saved
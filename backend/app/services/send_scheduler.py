@@ -0,0 +1,244 @@
+"""Outbound pacing: token buckets per sending account and per recipient domain.
+
+Each send takes a token from the account bucket and from the recipient
+domain's bucket. Short waits are slept through; a send that would wait
+longer than `max_wait` is deferred instead, and the campaign queue retries
+it later, so one slow domain never ties up the sender threads.
+
+Throttling replies (421/454 for the account, 450/451/452 for a domain)
+halve the affected bucket's rate and pause it briefly; every success then
+adds back a small step until the configured rate is reached again
+(additive increase, multiplicative decrease).
+
+Limits are per process: the campaign queue runs in every web worker, so
+with N workers configure 1/N of the provider's ceiling.
+"""
+
+import logging
+import random
+import smtplib
+import socket
+import threading
+import time
+from collections import deque
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+smtp_throttles = Counter("smtp_throttles", "Throttling replies that slowed sending down", ("scope",))
+smtp_deferred = Counter("smtp_deferred", "Sends deferred to the retry queue by the rate limits")
+
+# Replies that mean the provider is throttling the whole account
+ACCOUNT_THROTTLE_SMTP_CODES = {421, 454}
+# Replies that mean one receiving domain/mailbox wants us to slow down
+DOMAIN_THROTTLE_SMTP_CODES = {450, 451, 452}
+
+
+class SMTPPoolClosed(RuntimeError):
+    """The pool was replaced (e.g. new credentials); the send can be retried on the new one."""
+
+
+TRANSIENT_ERRORS = (smtplib.SMTPServerDisconnected, socket.timeout, ConnectionError, SMTPPoolClosed)
+
+THROTTLE_PAUSE_SECONDS = 30
+RECOVERY_SECONDS = 300  # quiet period after which an unlimited bucket is unlimited again
+MIN_RATE = 0.05  # never slow below one message per 20s
+
+
+class SendDeferred(Exception):
+    """The send would have to wait too long for a token; retry after `delay` seconds."""
+
+    def __init__(self, delay: float, scope: str):
+        super().__init__(f"Rate limited ({scope}), retry in {delay:.0f}s")
+        self.delay = delay
+        self.scope = scope
+
+
+class TokenBucket:
+    """Token bucket kept as a theoretical arrival time (GCRA); not locked, the owner serialises access.
+
+    `rate` tokens per second with room for `burst` back-to-back sends;
+    a rate of 0 means unlimited.
+    """
+
+    def __init__(self, rate: float = 0, burst: int = 1):
+        self.burst = max(1, int(burst))
+        self.rate = 0.0
+        self._tat = 0.0
+        self.set_rate(rate)
+
+    def set_rate(self, rate: float) -> None:
+        self.rate = max(0.0, rate or 0.0)
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.rate if self.rate else 0.0
+
+    def delay(self, now: float) -> float:
+        """Seconds from `now` until a token is available."""
+        if not self.rate:
+            return max(0.0, self._tat - now)
+        tolerance = (self.burst - 1) * self.interval
+        return max(0.0, self._tat - tolerance - now)
+
+    def consume(self, at: float) -> None:
+        """Take a token for a send happening at `at`."""
+        self._tat = max(self._tat, at) + self.interval
+
+    def pause(self, until: float) -> None:
+        self._tat = max(self._tat, until)
+
+    def wait(self) -> None:
+        """Block until a token is available and take it (for single-owner buckets)."""
+        now = time.monotonic()
+        delay = self.delay(now)
+        self.consume(now + delay)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class AdaptiveBucket(TokenBucket):
+    """TokenBucket whose rate drops on throttling and creeps back on success."""
+
+    def __init__(self, rate: float = 0, burst: int = 1):
+        super().__init__(rate, burst)
+        self.base_rate = self.rate
+        self.throttled_at = 0.0
+        self.throttle_count = 0
+        self._recent = deque(maxlen=200)
+
+    def succeeded(self, now: float) -> None:
+        self._recent.append(now)
+        if self.rate == self.base_rate:
+            return
+        if not self.base_rate:
+            # Unlimited by configuration: lift the limit after a quiet period
+            if now - self.throttled_at >= RECOVERY_SECONDS:
+                self.set_rate(0)
+            else:
+                self.set_rate(self.rate * 1.01)
+            return
+        self.set_rate(min(self.base_rate, self.rate + self.base_rate * 0.02))
+
+    def throttled(self, now: float, pause: float = THROTTLE_PAUSE_SECONDS) -> float:
+        """Halve the rate and pause; returns when sending may resume.
+
+        Replies to sends already in flight when the first throttle arrived
+        do not cut the rate again.
+        """
+        if self.throttle_count and now - self.throttled_at < pause:
+            return self.throttled_at + pause
+        current = self.rate or self.observed_rate(now) or 1.0
+        self.set_rate(max(MIN_RATE, current / 2))
+        self.throttled_at = now
+        self.throttle_count += 1
+        self.pause(now + pause)
+        return now + pause
+
+    def observed_rate(self, now: float, window: float = 10.0) -> float:
+        recent = sum(1 for at in self._recent if now - at <= window)
+        return recent / window
+
+
+class SendScheduler:
+    """Paces one account's sends across its own bucket and one bucket per recipient domain."""
+
+    def __init__(
+        self,
+        account_rate: float = 0,
+        account_burst: int = 1,
+        domain_rate: float = 0,
+        domain_burst: int = 1,
+        max_wait: float = 5,
+    ):
+        self.account = AdaptiveBucket(account_rate, account_burst)
+        self.domain_rate = domain_rate
+        self.domain_burst = domain_burst
+        self.max_wait = max_wait
+        self._domains: dict = {}
+        self._lock = threading.Lock()
+        self.deferred = 0
+
+    @staticmethod
+    def domain_of(recipient: str) -> str:
+        return recipient.rpartition("@")[2].lower()
+
+    def _domain_bucket(self, domain: str) -> AdaptiveBucket:
+        bucket = self._domains.get(domain)
+        if bucket is None:
+            bucket = self._domains[domain] = AdaptiveBucket(self.domain_rate, self.domain_burst)
+        return bucket
+
+    def acquire(self, recipient: str) -> None:
+        """Wait for both tokens, or raise SendDeferred when that would exceed `max_wait`."""
+        with self._lock:
+            now = time.monotonic()
+            domain = self._domain_bucket(self.domain_of(recipient))
+            account_delay = self.account.delay(now)
+            domain_delay = domain.delay(now)
+            delay = max(account_delay, domain_delay)
+            if delay > self.max_wait:
+                self.deferred += 1
+                smtp_deferred.inc()
+                raise SendDeferred(delay, "account" if account_delay >= domain_delay else "domain")
+            self.account.consume(now + delay)
+            domain.consume(now + delay)
+        if delay > 0:
+            time.sleep(delay)
+
+    def succeeded(self, recipient: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.account.succeeded(now)
+            self._domain_bucket(self.domain_of(recipient)).succeeded(now)
+
+    def throttled(self, recipient: str, scope: str) -> float:
+        """Slow down the account or the recipient's domain; returns seconds until it may resume."""
+        with self._lock:
+            now = time.monotonic()
+            bucket = self.account if scope == "account" else self._domain_bucket(self.domain_of(recipient))
+            throttles = bucket.throttle_count
+            resume_at = bucket.throttled(now)
+            if bucket.throttle_count > throttles:
+                smtp_throttles.labels(scope=scope).inc()
+            logger.warning(
+                "SMTP throttling, slowing %s to %.2f msg/s", scope, bucket.rate,
+                extra={"recipient": recipient, "scope": scope},
+            )
+            return resume_at - now
+
+    def stats(self) -> dict:
+        with self._lock:
+            throttled_domains = {
+                domain: round(bucket.rate, 3)
+                for domain, bucket in self._domains.items()
+                if bucket.throttle_count
+            }
+            return {
+                "account_rate": round(self.account.rate, 3),
+                "account_base_rate": self.account.base_rate,
+                "account_throttles": self.account.throttle_count,
+                "domains": len(self._domains),
+                "throttled_domains": throttled_domains,
+                "deferred": self.deferred,
+            }
+
+
+def classify_failure(error: Exception, recipient: str):
+    """Map a send error to (scope, transient): scope is "account", "domain" or None."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        code = (error.recipients.get(recipient) or (0, b""))[0]
+    elif isinstance(error, smtplib.SMTPResponseException):
+        code = error.smtp_code
+    else:
+        return None, isinstance(error, TRANSIENT_ERRORS)
+    if code in ACCOUNT_THROTTLE_SMTP_CODES:
+        return "account", True
+    if code in DOMAIN_THROTTLE_SMTP_CODES:
+        return "domain", True
+    return None, 400 <= code < 500
+
+
+def retry_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter for the given (1-based) attempt."""
+    return random.uniform(0.5, 1.0) * min(cap, base * (2 ** max(0, attempt - 1)))
@@ -0,0 +1,290 @@
+"""Bounded pool of authenticated SMTP connections shared across requests."""
+
+import queue
+import smtplib
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+from prometheus_client import Gauge
+from app.core.config import settings_registry
+from app.core.metrics import register_collector, smtp_errors, smtp_operation_seconds
+from app.services.send_scheduler import SMTPPoolClosed, SendScheduler, TokenBucket
+
+smtp_pool_idle_connections = Gauge(
+    "smtp_pool_idle_connections", "Connections waiting in the pool", multiprocess_mode="livesum",
+)
+smtp_send_rate_limit = Gauge(
+    "smtp_send_rate_limit", "Current adaptive send rate of each worker, messages/s (0 = unlimited)",
+    ("scope", "domain"), multiprocess_mode="liveall",
+)
+
+# Replies after which the session is dropped; the send itself is retried later by the
+# campaign queue, since an immediate resend into a throttling server only makes it worse
+RECONNECT_SMTP_CODES = {421}
+
+
+@contextmanager
+def _timed(operation: str):
+    """Time an SMTP step and count its failures by reply code."""
+    try:
+        with smtp_operation_seconds.labels(operation=operation).time():
+            yield
+    except Exception as e:
+        code = getattr(e, "smtp_code", 0)
+        if isinstance(e, smtplib.SMTPRecipientsRefused) and e.recipients:
+            code = next(iter(e.recipients.values()))[0]
+        smtp_errors.labels(operation=operation, code=code).inc()
+        raise
+
+
+class PooledConnection:
+    """A logged-in SMTP session plus its own send-rate bucket."""
+
+    def __init__(self, pool: "SMTPConnectionPool"):
+        self.pool = pool
+        self.server: Optional[smtplib.SMTP] = None
+        self.limiter = TokenBucket(pool.per_connection_rate)
+        self.last_used = 0.0
+
+    def connect(self) -> None:
+        """Open and authenticate the underlying SMTP session."""
+        self.close()
+        with _timed("connect"):
+            server = smtplib.SMTP(self.pool.host, self.pool.port, timeout=self.pool.timeout)
+        try:
+            with _timed("login"):
+                if self.pool.use_tls:
+                    server.starttls()
+                if self.pool.user:
+                    server.login(self.pool.user, self.pool.password)
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+            raise
+        self.server = server
+        self.last_used = time.monotonic()
+
+    def ensure_healthy(self) -> None:
+        """Reconnect if the session is missing or fails a NOOP after idling."""
+        if self.server is None:
+            self.connect()
+            return
+        if time.monotonic() - self.last_used < self.pool.health_check_interval:
+            return
+        try:
+            code, _ = self.server.noop()
+        except (smtplib.SMTPException, OSError):
+            code = None
+        if code != 250:
+            self.connect()
+
+    def close(self) -> None:
+        """Quit the session, ignoring errors from an already dead socket."""
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except Exception:
+            try:
+                self.server.close()
+            except Exception:
+                pass
+        self.server = None
+
+
+class SMTPConnectionPool:
+    """Hands out at most `size` logged-in SMTP connections to concurrent senders."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        size: int = 4,
+        timeout: float = 10,
+        use_tls: bool = True,
+        per_connection_rate: float = 0,
+        global_rate: float = 0,
+        global_burst: int = 1,
+        domain_rate: float = 0,
+        domain_burst: int = 1,
+        max_schedule_wait: float = 5,
+        health_check_interval: float = 30,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.use_tls = use_tls
+        self.per_connection_rate = per_connection_rate
+        self.health_check_interval = health_check_interval
+        # Account- and domain-level pacing; senders call scheduler.acquire() per recipient
+        self.scheduler = SendScheduler(
+            account_rate=global_rate,
+            account_burst=global_burst,
+            domain_rate=domain_rate,
+            domain_burst=domain_burst,
+            max_wait=max_schedule_wait,
+        )
+        self._idle: "queue.LifoQueue[PooledConnection]" = queue.LifoQueue()
+        for _ in range(self.size):
+            self._idle.put(PooledConnection(self))
+        self._closed = False
+        self._leases = 0
+        self._lease_lock = threading.Lock()
+
+    @contextmanager
+    def lease(self):
+        """Keep the pool usable for a batch of sends even if close() is called meanwhile.
+
+        The connections are quit when the last lease ends, so a reload that
+        replaces the pool never cuts off a send_each in progress.
+        """
+        with self._lease_lock:
+            self._leases += 1
+        try:
+            yield self
+        finally:
+            with self._lease_lock:
+                self._leases -= 1
+                drain = self._closed and self._leases == 0
+            if drain:
+                self._close_idle()
+
+    @property
+    def draining(self) -> bool:
+        """Closed, with no lease left that still needs the connections."""
+        return self._closed and self._leases == 0
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledConnection:
+        """Take a healthy connection from the pool, connecting lazily."""
+        if self.draining:
+            raise SMTPPoolClosed("SMTP pool is closed")
+        conn = self._idle.get(timeout=timeout)
+        try:
+            conn.ensure_healthy()
+        except Exception:
+            conn.close()
+            self._idle.put(conn)
+            raise
+        return conn
+
+    def release(self, conn: PooledConnection, discard: bool = False) -> None:
+        """Return a connection; `discard` drops the session so it reconnects next time."""
+        if discard or self.draining:
+            conn.close()
+        self._idle.put(conn)
+
+    def send_message(self, msg, retries: int = 1) -> None:
+        """Send an email.message.Message (flattened by smtplib)."""
+        self._send(lambda server: server.send_message(msg), retries)
+
+    def sendmail(self, from_addr: str, to_addrs: list, data: bytes, retries: int = 1) -> None:
+        """Send pre-encoded message bytes as-is."""
+        self._send(lambda server: server.sendmail(from_addr, to_addrs, data), retries)
+
+    def _send(self, operation, retries: int) -> None:
+        """Run one send on a pooled connection, retrying on a dropped connection.
+
+        A 421 reply discards the session but is raised, not retried here.
+        """
+        attempt = 0
+        while True:
+            conn = self.acquire()
+            try:
+                conn.limiter.wait()
+                with _timed("send"):
+                    operation(conn.server)
+                conn.last_used = time.monotonic()
+                self.release(conn)
+                return
+            except smtplib.SMTPResponseException as e:
+                self.release(conn, discard=e.smtp_code in RECONNECT_SMTP_CODES)
+                raise
+            except (smtplib.SMTPServerDisconnected, socket.timeout, ConnectionError):
+                self.release(conn, discard=True)
+                if attempt >= retries:
+                    raise
+            except Exception:
+                self.release(conn)
+                raise
+            attempt += 1
+
+    def close(self) -> None:
+        """Stop handing out connections once no lease is held, then quit them."""
+        with self._lease_lock:
+            self._closed = True
+            drain = self._leases == 0
+        if drain:
+            self._close_idle()
+
+    def _close_idle(self) -> None:
+        """Quit every idle connection; in-flight ones are closed on release."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+
+
+# Everything the pool is built from; a reload that changes any of these replaces it
+POOL_SETTINGS = (
+    "SMTP_SERVER",
+    "SMTP_PORT",
+    "EMAIL_USER",
+    "EMAIL_PASSWORD",
+    "SMTP_USE_TLS",
+    "SMTP_TIMEOUT",
+    "SMTP_POOL_SIZE",
+    "SMTP_RATE_PER_CONNECTION",
+    "SMTP_GLOBAL_RATE",
+    "SMTP_GLOBAL_BURST",
+    "SMTP_DOMAIN_RATE",
+    "SMTP_DOMAIN_BURST",
+    "SMTP_MAX_SCHEDULE_WAIT",
+)
+
+
+def _build_pool(settings) -> SMTPConnectionPool:
+    return SMTPConnectionPool(
+        host=settings.SMTP_SERVER,
+        port=settings.SMTP_PORT,
+        user=settings.EMAIL_USER,
+        password=settings.EMAIL_PASSWORD,
+        size=settings.SMTP_POOL_SIZE,
+        timeout=settings.SMTP_TIMEOUT,
+        use_tls=settings.SMTP_USE_TLS,
+        per_connection_rate=settings.SMTP_RATE_PER_CONNECTION,
+        global_rate=settings.SMTP_GLOBAL_RATE,
+        global_burst=settings.SMTP_GLOBAL_BURST,
+        domain_rate=settings.SMTP_DOMAIN_RATE,
+        domain_burst=settings.SMTP_DOMAIN_BURST,
+        max_schedule_wait=settings.SMTP_MAX_SCHEDULE_WAIT,
+    )
+
+
+def get_smtp_pool(settings=None) -> SMTPConnectionPool:
+    """Return the process-wide pool for the configured account, rebuilt when its settings change."""
+    return settings_registry.client("smtp_pool", POOL_SETTINGS, _build_pool, SMTPConnectionPool.close, settings)
+
+
+def collect_smtp_metrics():
+    pool = settings_registry.peek("smtp_pool")
+    smtp_pool_idle_connections.set(pool._idle.qsize() if pool is not None else 0)
+    if pool is None:
+        return
+    stats = pool.scheduler.stats()
+    smtp_send_rate_limit.labels(scope="account", domain="").set(stats["account_rate"])
+    for domain, rate in stats["throttled_domains"].items():
+        smtp_send_rate_limit.labels(scope="domain", domain=domain).set(rate)
+
+
+register_collector(collect_smtp_metrics)
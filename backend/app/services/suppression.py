@@ -0,0 +1,123 @@
+"""Addresses we never send to again: hard bounces and permanent SMTP rejections.
+
+The list lives in the `suppressed_addresses` table and is mirrored in an
+in-memory set, so the check before every send is a set lookup. Each
+process loads the whole list at startup and then, at most every
+SUPPRESSION_REFRESH_SECONDS, pulls the rows created since shortly before
+the newest one it has seen, which keeps gunicorn workers in step without
+a per-send query. The overlap catches rows that commit after rows created
+later (ids are no watermark either: PostgreSQL hands out sequence values
+before commit), and a periodic full reload catches anything slower.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.core.utils import EmailValidator
+from app.models.suppressed_address import SuppressedAddress
+
+# Longer than any transaction that inserts suppressions takes to commit
+REFRESH_OVERLAP = timedelta(minutes=5)
+FULL_RELOAD_SECONDS = 3600
+
+
+def insert_ignore_statement(dialect_name: str):
+    """INSERT .. ON CONFLICT(email) DO NOTHING for SQLite and PostgreSQL."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Suppression list does not support the '{dialect_name}' database")
+    return insert(SuppressedAddress).on_conflict_do_nothing(index_elements=[SuppressedAddress.email])
+
+
+class SuppressionList:
+    def __init__(self, session_factory=SessionLocal, refresh_seconds: Optional[float] = None):
+        self.session_factory = session_factory
+        self.refresh_seconds = (
+            get_settings().SUPPRESSION_REFRESH_SECONDS if refresh_seconds is None else refresh_seconds
+        )
+        self._addresses: set = set()
+        self._since: Optional[datetime] = None
+        self._refreshed_at = 0.0
+        self._reloaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._addresses)
+
+    def __contains__(self, address: str) -> bool:
+        return EmailValidator.normalise(address) in self._addresses
+
+    def load(self) -> int:
+        """Read the full list (startup); returns the number of suppressed addresses."""
+        with self._lock:
+            self._addresses = set()
+            self._since = None
+        self.refresh(force=True)
+        return len(self._addresses)
+
+    def refresh(self, force: bool = False) -> None:
+        """Pick up rows added by other processes since the last refresh."""
+        now = time.monotonic()
+        if not force and now - self._refreshed_at < self.refresh_seconds:
+            return
+        full = self._since is None or now - self._reloaded_at >= FULL_RELOAD_SECONDS
+        db = self.session_factory()
+        try:
+            query = db.query(SuppressedAddress.email, SuppressedAddress.created_at)
+            if not full:
+                query = query.filter(SuppressedAddress.created_at >= self._since)
+            rows = query.all()
+        finally:
+            db.close()
+        newest = max((created_at for _, created_at in rows if created_at is not None), default=None)
+        with self._lock:
+            # Rows are never removed, so a full reload only adds too
+            self._addresses.update(email for email, _ in rows)
+            if newest is not None:
+                self._since = max(self._since or datetime.min, newest - REFRESH_OVERLAP)
+            if full:
+                self._reloaded_at = now
+            self._refreshed_at = now
+
+    def add(self, db, entries: Iterable[Tuple[str, str, Optional[str], Optional[int]]]) -> List[str]:
+        """Suppress (email, reason, detail, campaign_id) entries; the caller commits.
+
+        Returns the addresses that were not suppressed before, checked
+        against the table as well as this process's copy of it.
+        """
+        rows = {}
+        for address, reason, detail, campaign_id in entries:
+            address = EmailValidator.normalise(address)
+            if address and address not in rows:
+                rows[address] = {
+                    "email": address,
+                    "reason": reason,
+                    "detail": (detail or "")[:1000] or None,
+                    "campaign_id": campaign_id,
+                }
+        new = {address: row for address, row in rows.items() if address not in self._addresses}
+        if new:
+            # Added by another process since our last refresh
+            known = {
+                email for (email,) in
+                db.query(SuppressedAddress.email).filter(SuppressedAddress.email.in_(list(new)))
+            }
+            with self._lock:
+                self._addresses.update(known)
+            new = {address: row for address, row in new.items() if address not in known}
+        if not new:
+            return []
+        db.execute(insert_ignore_statement(db.get_bind().dialect.name), list(new.values()))
+        # Applied before the caller commits: erring towards not sending is the safe side
+        with self._lock:
+            self._addresses.update(new)
+        return list(new)
+
+
+suppression_list = SuppressionList()
@@ -0,0 +1,106 @@
+"""Mail-merge rendering for EmailTemplate subjects and bodies.
+
+Templates use `{field}` placeholders (`{{`/`}}` for literal braces). Each
+template is parsed once into a plain format string that only references
+whitelisted contact fields, so rendering a recipient is a single
+`str.format_map` call.
+"""
+
+import threading
+from string import Formatter
+from typing import Iterable, Optional
+
+MERGE_FIELDS = frozenset({"name", "first_name", "company", "position", "email"})
+
+
+class TemplateSyntaxError(ValueError):
+    pass
+
+
+class _Values(dict):
+    """Missing or empty fields render as empty strings."""
+
+    def __missing__(self, key):
+        return ""
+
+
+def compile_text(text: str, fields: Iterable[str] = MERGE_FIELDS) -> str:
+    """Validate placeholders and return an equivalent, safe format string."""
+    allowed = frozenset(fields)
+    parts = []
+    try:
+        parsed = list(Formatter().parse(text or ""))
+    except ValueError as e:
+        raise TemplateSyntaxError(f"Invalid template: {e}")
+    for literal, field, format_spec, conversion in parsed:
+        parts.append(literal.replace("{", "{{").replace("}", "}}"))
+        if field is None:
+            continue
+        if field not in allowed:
+            # Also rejects attribute/index access such as {name.__class__}
+            raise TemplateSyntaxError(f"Unknown template field '{{{field}}}'")
+        if format_spec or conversion:
+            raise TemplateSyntaxError(f"Formatting options are not supported in '{{{field}}}'")
+        parts.append("{" + field + "}")
+    return "".join(parts)
+
+
+def contact_values(contact) -> dict:
+    """Merge values for a Contact row (or any object/dict with the same fields)."""
+    get = contact.get if isinstance(contact, dict) else lambda key: getattr(contact, key, None)
+    name = get("name") or ""
+    return _Values(
+        name=name,
+        first_name=name.split()[0] if name else "",
+        company=get("company") or "",
+        position=get("position") or "",
+        email=get("email") or "",
+    )
+
+
+class CompiledTemplate:
+    __slots__ = ("subject_format", "body_format")
+
+    def __init__(self, subject: str, body: str):
+        self.subject_format = compile_text(subject)
+        self.body_format = compile_text(body)
+
+    def render(self, values: dict) -> tuple:
+        if not isinstance(values, _Values):
+            values = _Values(values)
+        return self.subject_format.format_map(values), self.body_format.format_map(values)
+
+    def render_contact(self, contact) -> tuple:
+        return self.render(contact_values(contact))
+
+
+class TemplateEngine:
+    """Caches compiled templates per id, recompiling when `updated_at` changes."""
+
+    def __init__(self):
+        self._compiled: dict = {}
+        self._lock = threading.Lock()
+
+    def compile(self, template) -> CompiledTemplate:
+        key = getattr(template, "id", None)
+        version = getattr(template, "updated_at", None)
+        if key is not None:
+            with self._lock:
+                cached = self._compiled.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+        compiled = CompiledTemplate(template.subject, template.body)
+        if key is not None:
+            with self._lock:
+                self._compiled[key] = (version, compiled)
+        return compiled
+
+    def invalidate(self, template_id: Optional[int] = None) -> None:
+        with self._lock:
+            if template_id is None:
+                self._compiled.clear()
+            else:
+                self._compiled.pop(template_id, None)
+
+
+template_engine = TemplateEngine()
@@ -0,0 +1,56 @@
+"""Micro-benchmark: per-address validation vs EmailValidator.validate_batch.
+
+Run from the backend directory:
+    python -m benchmarks.bench_email_validation [count]
+"""
+
+import random
+import sys
+import time
+from pydantic import EmailStr, TypeAdapter
+from app.core.utils import EmailValidator
+
+
+def legacy_is_valid(email: str) -> bool:
+    """The previous implementation: re-import and recompile on every call."""
+    import re
+    pattern = r'^[^\s@]+@[^\s@]+\.[^\s@]+$'
+    return re.match(pattern, email) is not None
+
+
+def legacy_pipeline(emails: list) -> bool:
+    """What BulkEmailRequest used to do: EmailStr on every item, then validate_list."""
+    adapter = TypeAdapter(list[EmailStr])
+    validated = adapter.validate_python(emails)
+    return all(legacy_is_valid(email) for email in validated)
+
+
+def make_addresses(count: int) -> list:
+    rng = random.Random(42)
+    domains = [f"company{i}.com" for i in range(200)] + ["gmail.com", "outlook.com", "Yahoo.COM"]
+    addresses = [f"  HR.Person{rng.randrange(count)}@{rng.choice(domains)} " for _ in range(count)]
+    return [address.strip() for address in addresses]
+
+
+def measure(label: str, fn, emails: list) -> float:
+    started = time.perf_counter()
+    fn(emails)
+    elapsed = time.perf_counter() - started
+    rate = len(emails) / elapsed
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  {rate:12,.0f} addresses/sec")
+    return rate
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    emails = make_addresses(count)
+    print(f"Validating {count:,} addresses")
+    before = measure("legacy (EmailStr + re)", legacy_pipeline, emails)
+    measure("legacy is_valid only", lambda items: [legacy_is_valid(e) for e in items], emails)
+    EmailValidator.is_valid_domain.cache_clear()
+    after = measure("validate_batch", EmailValidator.validate_batch, emails)
+    print(f"speedup vs legacy pipeline: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
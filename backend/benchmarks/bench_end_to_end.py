@@ -0,0 +1,261 @@
+"""Benchmark: bulk sends and reply scans end to end against the in-process fakes.
+
+Run from the backend directory:
+    python -m benchmarks.bench_end_to_end [--messages 2000] [--mailbox-sizes 100,1000,5000]
+    python -m benchmarks.bench_end_to_end --output after.json --compare before.json
+
+Uses a throwaway SQLite database and the servers in benchmarks.fakes, so no
+real account is touched. Results are printed (and optionally written) as
+JSON; --compare prints the relative change of every metric against an
+earlier run.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+_workdir = tempfile.mkdtemp(prefix="email-tracker-bench-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_workdir}/bench.db",
+    "EMAIL_USER": "me@example.com",
+    "EMAIL_PASSWORD": "bench",
+    "SMTP_USE_TLS": "false",
+    "IMAP_USE_SSL": "false",
+    "CAMPAIGN_QUEUE_POLL_SECONDS": "0.2",
+})
+
+from sqlalchemy import insert  # noqa: E402
+from app.core.config import get_settings, reload_settings  # noqa: E402
+from app.core.database import SessionLocal, create_tables  # noqa: E402
+from app.models import Campaign, SentMessage  # noqa: E402
+from app.services.campaign_queue import CampaignQueue  # noqa: E402
+from app.services.email_service import EmailService  # noqa: E402
+from app.services.reply_service import ReplyCheckerService  # noqa: E402
+from benchmarks.fakes import FakeIMAPServer, FakeSMTPServer, jittered, synthetic_mailbox  # noqa: E402
+
+SUBJECT = "Application for the Software Engineer role"
+BODY = "Hi there,\n\nI'd love to be considered for the role; my resume is attached.\n\nBest,\nAlex\n" * 4
+
+SEND_SCENARIOS = {
+    "baseline": {},
+    "latency_5ms": {"latency": jittered(0.005)},
+    "transient_failures_5pct": {"failure_rate": 0.05, "failure_code": 451},
+    "hard_bounces": {"fail": {"bounce": 550}},
+    "throttled_200_per_sec": {"max_rate": 200},
+}
+
+
+def percentile(values: list, pct: float):
+    """Nearest-rank percentile, None for no samples."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def settings_for(smtp: FakeSMTPServer):
+    # A distinct port per scenario also gives each one a fresh pool and scheduler
+    return get_settings().model_copy(update={"SMTP_SERVER": smtp.host, "SMTP_PORT": smtp.port})
+
+
+class TimedEmailService(EmailService):
+    """EmailService that records how long each recipient's send took."""
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.latencies = []
+
+    def _send_one(self, pool, prepared, recipient):
+        started = time.perf_counter()
+        result = super()._send_one(pool, prepared, recipient)
+        if result.success:
+            self.latencies.append(time.perf_counter() - started)
+        return result
+
+
+def recipients(count: int) -> list:
+    return [
+        f"bounce{i}@company{i % 200}.com" if i % 50 == 7 else f"person{i}@company{i % 200}.com"
+        for i in range(count)
+    ]
+
+
+def bench_send(name: str, options: dict, count: int) -> dict:
+    with FakeSMTPServer(**options) as smtp:
+        service = TimedEmailService(settings_for(smtp))
+        result = service.send_each([(recipient, SUBJECT, BODY) for recipient in recipients(count)])
+    return {
+        "messages": count,
+        "sent": result.sent_count,
+        "failed": sum(1 for r in result.results if not r.success and r.retry_after is None),
+        "retryable": sum(1 for r in result.results if r.retry_after is not None),
+        "elapsed_seconds": round(result.elapsed, 4),
+        "sends_per_second": round(result.messages_per_second, 1),
+        "latency_p50_ms": _ms(percentile(service.latencies, 50)),
+        "latency_p99_ms": _ms(percentile(service.latencies, 99)),
+        "server_throttled": smtp.throttled,
+    }
+
+
+def bench_campaign_queue(count: int) -> dict:
+    """Queue a campaign and time the worker until every recipient has an outcome."""
+    with FakeSMTPServer() as smtp:
+        # The queue builds its own EmailService from the global settings
+        os.environ.update({"SMTP_SERVER": smtp.host, "SMTP_PORT": str(smtp.port)})
+        reload_settings()
+        queue = CampaignQueue(workers=1)
+        db = SessionLocal()
+        try:
+            campaign = queue.enqueue(db, recipients(count), SUBJECT, BODY, name="bench")
+            started = time.perf_counter()
+            queue.start()
+            while True:
+                db.expire_all()
+                campaign = db.get(Campaign, campaign.id)
+                if campaign.status in ("sent", "failed"):
+                    break
+                time.sleep(0.05)
+            elapsed = time.perf_counter() - started
+            return {
+                "messages": count,
+                "sent": campaign.sent_count,
+                "failed": campaign.failed_count,
+                "elapsed_seconds": round(elapsed, 4),
+                "sends_per_second": round(campaign.sent_count / elapsed, 1),
+            }
+        finally:
+            queue.stop()
+            db.close()
+
+
+def bench_reply_scan(size: int, mode: str) -> dict:
+    """Cold scan of a `size`-message mailbox, then the no-change rescan."""
+    reply_ids = [f"<bench-{mode}-{size}-{i}@example.com>" for i in range(max(1, size // 20))]
+    db = SessionLocal()
+    try:
+        db.execute(insert(SentMessage), [
+            {"message_id": mid, "recipient": f"recruiter{i}@company.com"} for i, mid in enumerate(reply_ids)
+        ])
+        db.commit()
+        with FakeIMAPServer(synthetic_mailbox(size, reply_to=reply_ids)) as imap:
+            service = ReplyCheckerService(session_factory=SessionLocal)
+            service.host, service.port, service.use_ssl = imap.host, imap.port, False
+            service.fetch_mode = mode
+            account = f"bench-{mode}-{size}@example.com"
+            mail = service.connect(account, "bench")
+            try:
+                started = time.perf_counter()
+                replies = service.scan_mailbox(mail, db, account)
+                cold = time.perf_counter() - started
+                started = time.perf_counter()
+                service.scan_mailbox(mail, db, account)
+                rescan = time.perf_counter() - started
+            finally:
+                mail.logout()
+    finally:
+        db.close()
+    return {
+        "mailbox_size": size,
+        "fetch_mode": mode,
+        "replies_found": len(replies),
+        "replies_expected": len(reply_ids),
+        "scan_seconds": round(cold, 4),
+        "messages_per_second": round(size / cold, 1),
+        "rescan_unchanged_ms": _ms(rescan),
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def run(messages: int, mailbox_sizes: list) -> dict:
+    create_tables()
+    report = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "commit": _git_commit(),
+            "messages": messages,
+            "mailbox_sizes": mailbox_sizes,
+        },
+        "send": {},
+        "campaign_queue": {},
+        "reply_scan": {},
+    }
+    # Failed sends log a warning each; keep the output for the JSON report
+    logging.disable(logging.WARNING)
+    try:
+        for name, options in SEND_SCENARIOS.items():
+            report["send"][name] = bench_send(name, options, messages)
+        report["campaign_queue"] = bench_campaign_queue(messages)
+        for size in mailbox_sizes:
+            for mode in ("headers", "full"):
+                report["reply_scan"][f"{mode}/{size}"] = bench_reply_scan(size, mode)
+    finally:
+        logging.disable(logging.NOTSET)
+    return report
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(report: dict, prefix: str = "") -> dict:
+    metrics = {}
+    for key, value in report.items():
+        if key == "meta":
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[name] = value
+    return metrics
+
+
+def compare(previous: dict, current: dict) -> None:
+    before, after = flatten(previous), flatten(current)
+    print(f"\n{'metric':<58} {'before':>12} {'after':>12} {'change':>8}", file=sys.stderr)
+    for name, value in after.items():
+        old = before.get(name)
+        if old is None:
+            continue
+        change = f"{(value - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{name:<58} {old:>12} {value:>12} {change:>8}", file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--mailbox-sizes", default="100,1000,5000")
+    parser.add_argument("--output", help="also write the JSON report here")
+    parser.add_argument("--compare", help="earlier JSON report to diff against (printed to stderr)")
+    args = parser.parse_args()
+
+    report = run(args.messages, [int(size) for size in args.mailbox_sizes.split(",") if size])
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(text + "\n")
+    if args.compare:
+        with open(args.compare) as handle:
+            compare(json.load(handle), report)
+
+
+if __name__ == "__main__":
+    main()
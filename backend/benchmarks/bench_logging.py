@@ -0,0 +1,111 @@
+"""Benchmark: logging overhead of a bulk send against the fake SMTP server.
+
+Run from the backend directory:
+    python -m benchmarks.bench_logging [recipients]
+
+Sends the same batch with logging off, with the old print-per-recipient
+line, and through the queued JSON pipeline with and without sampling,
+then times the log statement alone in each mode. Log output goes to a
+temporary file, as it would to a redirected stdout.
+"""
+
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import time
+
+_workdir = tempfile.mkdtemp(prefix="email-tracker-bench-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_workdir}/bench.db",
+    "EMAIL_USER": "me@example.com",
+    "EMAIL_PASSWORD": "bench",
+    "SMTP_USE_TLS": "false",
+})
+
+from app.core.config import get_settings  # noqa: E402
+from app.core.database import create_tables  # noqa: E402
+from app.core.logging import Sampler, configure_logging, shutdown_logging  # noqa: E402
+from app.services.email_service import EmailService  # noqa: E402
+from benchmarks.fakes import FakeSMTPServer  # noqa: E402
+
+SUBJECT = "Application for the Software Engineer role"
+BODY = "Hi there,\n\nI'd love to be considered for the role; my resume is attached.\n\nBest,\nAlex\n"
+
+
+class PrintingEmailService(EmailService):
+    """The pre-logging behaviour: one synchronous stdout write per recipient."""
+
+    def _send_one(self, pool, prepared, recipient):
+        result = super()._send_one(pool, prepared, recipient)
+        print(f"Email sent to {recipient}" if result.success else f"Failed to send to {recipient}: {result.error}")
+        return result
+
+
+def run(mode: str, smtp: FakeSMTPServer, recipients: list, output) -> float:
+    settings = get_settings().model_copy(update={
+        "SMTP_SERVER": smtp.host,
+        "SMTP_PORT": smtp.port,
+        "LOG_FORMAT": "json",
+        "LOG_SEND_SAMPLE_RATE": 1.0 if mode == "json, every recipient" else 0.01,
+        "LOG_LEVEL": "CRITICAL" if mode in ("off", "print") else "INFO",
+    })
+    with contextlib.redirect_stdout(output):
+        configure_logging(settings)
+        service = (PrintingEmailService if mode == "print" else EmailService)(settings)
+        started = time.perf_counter()
+        result = service.send_each([(recipient, SUBJECT, BODY) for recipient in recipients])
+        elapsed = time.perf_counter() - started
+        # Time to drain the queue is not on the send path; flush it outside the timing
+        shutdown_logging()
+    assert result.sent_count == len(recipients), result.sent_count
+    return elapsed
+
+
+def per_call_cost(mode: str, recipients: list, output) -> float:
+    """Microseconds the sending thread spends on one recipient's log line, without SMTP."""
+    settings = get_settings().model_copy(update={
+        "LOG_FORMAT": "json",
+        "LOG_LEVEL": "CRITICAL" if mode in ("off", "print") else "INFO",
+    })
+    sampler = Sampler(1.0 if mode == "json, every recipient" else 0.01)
+    logger = logging.getLogger("app.services.email_service")
+    with contextlib.redirect_stdout(output):
+        configure_logging(settings)
+        started = time.perf_counter()
+        for recipient in recipients:
+            if mode == "print":
+                print(f"Email sent to {recipient}")
+            elif mode != "off" and sampler.hit():
+                logger.info("Email sent", extra={"recipient": recipient, "sampled_1_in": sampler.every})
+        elapsed = time.perf_counter() - started
+        shutdown_logging()
+    return elapsed / len(recipients) * 1e6
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    repeats = 3
+    recipients = [f"person{i}@company{i % 200}.com" for i in range(count)]
+    create_tables()
+
+    modes = ["off", "print", "json, every recipient", "json, sampled 1%"]
+    timings = {mode: [] for mode in modes}
+    with FakeSMTPServer() as smtp, tempfile.TemporaryFile("w+") as output:
+        run("off", smtp, recipients[:500], output)  # warm up connections and imports
+        # Interleaved and best-of so drift in the fake server hits every mode alike
+        for _ in range(repeats):
+            for mode in modes:
+                timings[mode].append(run(mode, smtp, recipients, output))
+        per_call = {mode: per_call_cost(mode, recipients, output) for mode in modes}
+
+    print(f"{count} recipients, best of {repeats}")
+    print(f"  {'mode':<24} {'send':>8} {'msgs/sec':>9} {'log call':>12}")
+    for mode in modes:
+        elapsed = min(timings[mode])
+        print(f"  {mode:<24} {elapsed:7.3f}s {count / elapsed:9.0f} {per_call[mode]:9.2f} us")
+    logging.getLogger().handlers.clear()
+
+if __name__ == "__main__":
+    main()
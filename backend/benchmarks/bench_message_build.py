@@ -0,0 +1,133 @@
+"""Benchmark: per-recipient MIME build vs. a pre-serialised message.
+
+Run from the backend directory:
+    python -m benchmarks.bench_message_build [count]
+
+First builds `count` messages directly, then delivers a campaign of the
+same size through the campaign queue's batches (SMTP_SEND_WORKERS
+recipients each) to the fake SMTP server, once with the message prepared
+and the sender threads started for every batch and once with both kept
+across batches.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from email.utils import make_msgid
+
+_workdir = tempfile.mkdtemp(prefix="email-tracker-bench-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_workdir}/bench.db",
+    "EMAIL_USER": "me@example.com",
+    "EMAIL_PASSWORD": "bench",
+    "SMTP_USE_TLS": "false",
+})
+
+from app.core.config import get_settings  # noqa: E402
+from app.core.database import SessionLocal, create_tables  # noqa: E402
+from app.services.campaign_queue import CampaignQueue  # noqa: E402
+from app.services.email_service import EmailService  # noqa: E402
+from app.services.message_builder import WIRE_POLICY, PreparedMessage, build_mime  # noqa: E402
+from benchmarks.fakes import FakeSMTPServer  # noqa: E402
+
+SENDER = "alex@example.com"
+SUBJECT = "Application for the Software Engineer role"
+BODY = (
+    "Hi there,\n\n"
+    "I came across the Software Engineer opening and would love to be considered. "
+    "Over the last three years I have shipped production React and FastAPI services.\n\n"
+    "My resume is attached; happy to share more detail whenever convenient.\n\n"
+    "Best regards,\nAlex\n"
+) * 4
+
+
+class CountingEmailService(EmailService):
+    """Counts and times message preparation."""
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.prepared = 0
+        self.prepare_seconds = 0.0
+
+    def prepare(self, subject, body):
+        self.prepared += (subject, body) not in self._prepared
+        started = time.perf_counter()
+        try:
+            return super().prepare(subject, body)
+        finally:
+            self.prepare_seconds += time.perf_counter() - started
+
+
+class PerBatchEmailService(CountingEmailService):
+    """The previous behaviour: nothing survives from one send_each to the next."""
+
+    def send_each(self, messages):
+        self._prepared.clear()
+        try:
+            return super().send_each(messages)
+        finally:
+            self.close()
+
+
+def deliver(service: EmailService, recipients: list) -> float:
+    queue = CampaignQueue(workers=1)
+    db = SessionLocal()
+    try:
+        queue.enqueue(db, recipients, SUBJECT, BODY, name="bench")
+        campaign_id = queue._claim_next(db)
+        started = time.perf_counter()
+        queue._deliver(db, campaign_id, service)
+        elapsed = time.perf_counter() - started
+        service.close()
+        return elapsed
+    finally:
+        db.close()
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    recipients = [f"person{i}@company{i % 500}.com" for i in range(count)]
+
+    # What smtplib.send_message does for every recipient
+    started = time.perf_counter()
+    for recipient in recipients:
+        msg = build_mime(SENDER, recipient, SUBJECT, BODY)
+        msg['Message-ID'] = make_msgid()
+        msg.as_bytes(policy=WIRE_POLICY)
+    mime_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    prepared = PreparedMessage(SENDER, SUBJECT, BODY)
+    for recipient in recipients:
+        prepared.for_recipient(recipient)
+    prepared_seconds = time.perf_counter() - started
+
+    print(f"Building {count:,} messages ({len(BODY):,} byte body)")
+    print(f"MIMEMultipart per recipient   {mime_seconds * 1000:10.1f} ms  {count / mime_seconds:12,.0f} msgs/sec")
+    print(f"pre-serialised + headers      {prepared_seconds * 1000:10.1f} ms  {count / prepared_seconds:12,.0f} msgs/sec")
+    print(f"speedup                       {mime_seconds / prepared_seconds:10.1f}x")
+
+    create_tables()
+    campaign_size = min(count, 5_000)
+    with FakeSMTPServer() as smtp:
+        settings = get_settings().model_copy(update={"SMTP_SERVER": smtp.host, "SMTP_PORT": smtp.port})
+        deliver(EmailService(settings), recipients[:200])  # warm up the pool's connections
+        print(f"\nCampaign queue, {campaign_size:,} recipients in batches of {settings.SMTP_SEND_WORKERS}")
+        print(f"  {'':<28} {'builds':>8} {'build ms':>10} {'deliver s':>10} {'msgs/sec':>10}")
+        for label, service_class in (
+            ("prepared per batch", PerBatchEmailService),
+            ("kept across batches", CountingEmailService),
+        ):
+            service = service_class(settings)
+            # Fresh addresses per run: the queue skips nothing, every recipient is sent
+            batch = [f"{label.split()[0]}-{recipient}" for recipient in recipients[:campaign_size]]
+            elapsed = deliver(service, batch)
+            print(
+                f"  {label:<28} {service.prepared:>8,} {service.prepare_seconds * 1000:>10.1f} "
+                f"{elapsed:>10.3f} {campaign_size / elapsed:>10,.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
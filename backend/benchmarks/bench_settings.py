@@ -0,0 +1,34 @@
+"""Benchmark: per-request cost of reading settings and getting the shared clients.
+
+Run from the backend directory:
+    python -m benchmarks.bench_settings [iterations]
+
+Compares building Settings from the environment (what a reload costs)
+with the cached paths request handlers use.
+"""
+
+import sys
+import timeit
+from app.core.config import load_settings, get_settings
+from app.services.ai_service import get_ai_service
+from app.services.email_service import EmailService
+from app.services.smtp_pool import get_smtp_pool
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    cases = {
+        "load_settings() (reload)": (load_settings, max(1, iterations // 100)),
+        "get_settings()": (get_settings, iterations),
+        "get_smtp_pool()": (get_smtp_pool, iterations),
+        "get_ai_service()": (get_ai_service, iterations),
+        "EmailService()": (EmailService, iterations // 10),
+    }
+    for name, (call, number) in cases.items():
+        call()  # first call builds the client
+        seconds = timeit.timeit(call, number=number)
+        print(f"{name:<26} {seconds / number * 1e6:10.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Check: EXPLAIN the app's hot queries and flag any that scan a whole table.
+
+Runs against the configured DATABASE_URL (apply migrations first):
+    alembic upgrade head
+    python -m benchmarks.check_query_plans
+
+Exits with status 1 when a query has no index path, or does not use the
+index listed for it in EXPECTED_INDEXES. On PostgreSQL sequential scans
+are disabled for the session, so a "Seq Scan" in the plan means no usable
+index exists rather than the table merely being small.
+"""
+
+import json
+import sys
+from datetime import datetime
+from sqlalchemy import func, or_, select
+from app.core.database import engine
+from app.core.utils import page_statement
+from app.models import Campaign, CampaignRecipient, CampaignStatBucket, Contact, MailboxCheckpoint, Reply, Resume, SentMessage
+from app.schemas.resume import ResumeListItem
+from app.services.campaign_queue import campaign_queue
+
+EMAILS = ["hr@company.com", "jobs@company.com"]
+MESSAGE_IDS = ["<1@mail.example.com>", "<2@mail.example.com>"]
+
+QUERIES = {
+    "resume duplicate name": select(Resume.id).where(Resume.name == "Backend resume").limit(1),
+    "resume list page": page_statement(Resume, 100, cursor=100, columns=ResumeListItem.model_fields),
+    "contacts by email": select(Contact.email, Contact.id).where(Contact.email.in_(EMAILS)),
+    "sent messages by Message-ID": select(SentMessage).where(SentMessage.message_id.in_(MESSAGE_IDS)),
+    "known reply Message-IDs": select(Reply.message_id).where(Reply.message_id.in_(MESSAGE_IDS)),
+    "earlier replies to sent messages": select(Reply.sent_message_id).where(Reply.sent_message_id.in_([1, 2])),
+    "replies for a campaign": select(Reply).where(Reply.campaign_id == 1).order_by(Reply.id.desc()).limit(100),
+    "queue claim": select(Campaign.id).where(campaign_queue._claimable(datetime.utcnow())).order_by(Campaign.id).limit(1),
+    "pending recipients batch": (
+        select(CampaignRecipient)
+        .where(
+            CampaignRecipient.campaign_id == 1,
+            CampaignRecipient.status == "pending",
+            or_(CampaignRecipient.next_attempt_at.is_(None), CampaignRecipient.next_attempt_at <= datetime.utcnow()),
+        )
+        .order_by(CampaignRecipient.id)
+        .limit(50)
+    ),
+    "daily send quota": select(func.sum(CampaignStatBucket.sent), func.min(CampaignStatBucket.bucket_start)).where(
+        CampaignStatBucket.bucket_start >= datetime(2026, 1, 1), CampaignStatBucket.sent > 0
+    ),
+    "campaigns by status": (
+        select(Campaign.id, Campaign.name)
+        .where(Campaign.status == "sent", Campaign.created_at >= datetime(2026, 1, 1))
+        .order_by(Campaign.created_at.desc())
+    ),
+    "campaign list page": page_statement(Campaign, 50, cursor=1000, descending=True),
+    "mailbox checkpoint": select(MailboxCheckpoint).where(
+        MailboxCheckpoint.account == "me@example.com", MailboxCheckpoint.mailbox == "INBOX"
+    ),
+}
+
+
+# Queries that must use one particular index, not just any index
+EXPECTED_INDEXES = {
+    # Every other campaign index also covers the finished campaigns
+    "queue claim": "ix_campaigns_active",
+}
+
+
+def driver_sql(statement, dialect):
+    compiled = statement.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.construct_params()
+    if compiled.positional:
+        return str(compiled), tuple(params[name] for name in compiled.positiontup)
+    return str(compiled), params
+
+
+def sqlite_plan(connection, sql, params):
+    """Returns (plan lines, problems)."""
+    lines = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)]
+    return lines, [line for line in lines if line.startswith("SCAN ")]
+
+
+def postgresql_plan(connection, sql, params):
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    (plan,) = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", params).one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    lines, problems = [], []
+
+    def walk(node, depth=0):
+        names = " ".join(node[key] for key in ("Relation Name", "Index Name") if node.get(key))
+        line = f"{'  ' * depth}{node['Node Type']} {names}".rstrip()
+        lines.append(line)
+        if node["Node Type"] == "Seq Scan":
+            problems.append(line.strip())
+        for child in node.get("Plans", []):
+            walk(child, depth + 1)
+
+    walk(plan[0]["Plan"])
+    return lines, problems
+
+
+def main() -> int:
+    dialect = engine.dialect
+    explain = {"sqlite": sqlite_plan, "postgresql": postgresql_plan}.get(dialect.name)
+    if explain is None:
+        print(f"EXPLAIN check not implemented for {dialect.name}")
+        return 0
+
+    slow = 0
+    with engine.connect() as connection:
+        for name, statement in QUERIES.items():
+            sql, params = driver_sql(statement, dialect)
+            with connection.begin():
+                lines, problems = explain(connection, sql, params)
+            expected = EXPECTED_INDEXES.get(name)
+            if expected and not any(expected in line for line in lines):
+                problems.append(f"does not use {expected}")
+            slow += bool(problems)
+            print(f"[{'SLOW' if problems else ' ok '}] {name}")
+            for line in lines:
+                print(f"         {line}")
+            for problem in problems:
+                if problem not in lines:
+                    print(f"         !! {problem}")
+    print(f"\n{len(QUERIES) - slow}/{len(QUERIES)} queries use an index")
+    return 1 if slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,406 @@
+"""In-process SMTP and IMAP stand-ins for benchmarks and local runs.
+
+Both servers listen on 127.0.0.1 with an ephemeral port, serve each client
+on its own thread and speak just enough of the protocol for smtplib and
+imaplib as the app uses them. They are plain socketserver servers rather
+than aiosmtpd so the benchmarks need nothing beyond the app's requirements.
+
+    with FakeSMTPServer(latency=0.005, fail={"bad@": 550}) as smtp:
+        ...  # point SMTP_SERVER/SMTP_PORT at smtp.host/smtp.port
+
+    with FakeIMAPServer(synthetic_mailbox(1000, reply_to=message_ids)) as imap:
+        ...
+"""
+
+import email
+import random
+import re
+import socketserver
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+class _ThreadedServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _FakeServer:
+    handler_class = None
+
+    def __init__(self):
+        self._server = _ThreadedServer(("127.0.0.1", 0), self.handler_class)
+        self._server.fake = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def _sleep(latency) -> None:
+    delay = latency() if callable(latency) else latency
+    if delay:
+        time.sleep(delay)
+
+
+def jittered(mean: float, spread: float = 0.5) -> Callable[[], float]:
+    """Latency source uniformly spread +/- `spread` around `mean` seconds."""
+    return lambda: random.uniform(mean * (1 - spread), mean * (1 + spread))
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self) -> None:
+        fake: FakeSMTPServer = self.server.fake
+        self.reply("220 fake-smtp ready")
+        recipients: List[str] = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii", "replace").strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250-fake-smtp")
+                self.reply("250-AUTH PLAIN LOGIN")
+                self.reply("250 8BITMIME")
+            elif verb == "AUTH":
+                self.reply("235 2.7.0 Authentication successful")
+            elif verb == "MAIL":
+                recipients = []
+                code = fake._admit()
+                if code:
+                    self.reply(f"{code} {fake.reply_text(code)}")
+                    if code == 421:
+                        return
+                else:
+                    self.reply("250 2.1.0 OK")
+            elif verb == "RCPT":
+                address = command.partition(":")[2].strip().strip("<>").lower()
+                code = fake._recipient_code(address)
+                if code:
+                    self.reply(f"{code} {fake.reply_text(code)}")
+                else:
+                    recipients.append(address)
+                    self.reply("250 2.1.5 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk in (b".\r\n", b".\n"):
+                        break
+                    size += len(chunk)
+                _sleep(fake.latency)
+                fake._delivered(recipients, size)
+                self.reply("250 2.0.0 OK queued")
+            elif verb == "RSET":
+                recipients = []
+                self.reply("250 2.0.0 OK")
+            elif verb == "QUIT":
+                self.reply("221 2.0.0 Bye")
+                return
+            else:
+                self.reply("250 2.0.0 OK")
+
+
+class FakeSMTPServer(_FakeServer):
+    """SMTP sink with injectable latency, throttling and per-recipient failures.
+
+    latency      seconds (or a callable returning seconds) spent on each DATA
+    fail         {address substring: reply code} applied at RCPT
+    fail_times   how many times each `fail` pattern rejects before accepting
+                 (None = every time)
+    failure_rate probability of answering a RCPT with `failure_code`
+    max_rate     messages/second accepted before MAIL is answered with
+                 `throttle_code` (421 also drops the connection)
+    """
+
+    handler_class = _SMTPHandler
+    REPLY_TEXT = {
+        421: "4.7.0 Try again later, closing connection",
+        450: "4.2.1 The user you are trying to contact is receiving mail too quickly",
+        451: "4.3.0 Temporary server error",
+        452: "4.5.3 Too many recipients",
+        454: "4.7.0 Too many login attempts, please try again later",
+        550: "5.1.1 The email account that you tried to reach does not exist",
+        552: "5.2.2 Mailbox full",
+        554: "5.7.1 Message rejected",
+    }
+
+    def __init__(
+        self,
+        latency=0.0,
+        fail: Optional[Dict[str, int]] = None,
+        fail_times: Optional[int] = None,
+        failure_rate: float = 0.0,
+        failure_code: int = 451,
+        max_rate: float = 0.0,
+        throttle_code: int = 421,
+    ):
+        super().__init__()
+        self.latency = latency
+        self.fail = {pattern.lower(): code for pattern, code in (fail or {}).items()}
+        self.fail_times = fail_times
+        self._failures: Dict[str, int] = {}
+        self.failure_rate = failure_rate
+        self.failure_code = failure_code
+        self.max_rate = max_rate
+        self.throttle_code = throttle_code
+        self.delivered = 0
+        self.delivered_bytes = 0
+        self.rejected = 0
+        self.throttled = 0
+        self._window: List[float] = []
+        self._lock = threading.Lock()
+
+    def reply_text(self, code: int) -> str:
+        return self.REPLY_TEXT.get(code, "Injected failure")
+
+    def _admit(self) -> Optional[int]:
+        """Sliding one-second window for `max_rate`; returns a reply code when over it."""
+        if not self.max_rate:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            self._window = [at for at in self._window if now - at < 1.0]
+            if len(self._window) >= self.max_rate:
+                self.throttled += 1
+                return self.throttle_code
+            self._window.append(now)
+        return None
+
+    def _recipient_code(self, address: str) -> Optional[int]:
+        pattern, code = next(((pattern, code) for pattern, code in self.fail.items() if pattern in address), (None, None))
+        if code is not None and self.fail_times is not None:
+            with self._lock:
+                failures = self._failures[pattern] = self._failures.get(pattern, 0) + 1
+            if failures > self.fail_times:
+                code = None
+        if code is None and self.failure_rate and random.random() < self.failure_rate:
+            code = self.failure_code
+        if code:
+            with self._lock:
+                self.rejected += 1
+        return code
+
+    def _delivered(self, recipients: list, size: int) -> None:
+        with self._lock:
+            self.delivered += len(recipients)
+            self.delivered_bytes += size
+
+
+class FakeMessage:
+    """A stored message with the FETCH sections the reply scanner asks for, precomputed."""
+
+    __slots__ = ("raw", "headers", "part1_mime", "part1", "part2")
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        msg = email.message_from_bytes(raw)
+        self.headers = msg
+        self.part1_mime = b""
+        self.part2 = b""
+        if msg.is_multipart():
+            parts = msg.get_payload()
+            self.part1_mime, _, self.part1 = self._split(parts[0].as_bytes())
+            self.part1_mime += b"\r\n"
+            if len(parts) > 1:
+                self.part2 = self._split(parts[1].as_bytes())[2]
+        else:
+            self.part1 = self._split(raw)[2]
+
+    @staticmethod
+    def _split(data: bytes):
+        data = data.replace(b"\r\n", b"\n").replace(b"\n", b"\r\n")
+        return data.partition(b"\r\n\r\n")
+
+    def header_fields(self, names: Sequence[str]) -> bytes:
+        lines = [f"{name}: {self.headers[name]}\r\n" for name in names if self.headers[name] is not None]
+        return "".join(lines).encode() + b"\r\n"
+
+
+FETCH_HEADER_FIELDS = re.compile(r"BODY\.PEEK\[HEADER\.FIELDS \(([^)]*)\)\]")
+FETCH_PARTIAL = re.compile(r"BODY\.PEEK\[(\d)\]<0\.(\d+)>")
+
+
+class _IMAPHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+
+    def send(self, data) -> None:
+        self.wfile.write(data if isinstance(data, bytes) else data.encode() + b"\r\n")
+
+    def handle(self) -> None:
+        fake: FakeIMAPServer = self.server.fake
+        self.send("* OK fake-imap ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            tag, _, rest = line.decode("utf-8", "replace").rstrip("\r\n").partition(" ")
+            command, _, args = rest.partition(" ")
+            command = command.upper()
+            _sleep(fake.latency)
+            if command == "CAPABILITY":
+                self.send("* CAPABILITY IMAP4rev1 " + " ".join(fake.capabilities))
+                self.send(f"{tag} OK CAPABILITY completed")
+            elif command == "LOGIN":
+                self.send(f"{tag} OK LOGIN completed")
+            elif command == "ENABLE":
+                self.send("* ENABLED CONDSTORE")
+                self.send(f"{tag} OK ENABLE completed")
+            elif command in ("SELECT", "EXAMINE"):
+                with fake.lock:
+                    self.send(f"* {len(fake.messages)} EXISTS")
+                    self.send(f"* OK [UIDVALIDITY {fake.uidvalidity}] UIDs valid")
+                    self.send(f"* OK [UIDNEXT {fake.uidnext}] Predicted next UID")
+                    if "CONDSTORE" in fake.capabilities:
+                        self.send(f"* OK [HIGHESTMODSEQ {fake.modseq}] Highest")
+                self.send(f"{tag} OK [READ-ONLY] {command} completed")
+            elif command == "UID":
+                self.uid_command(fake, tag, args)
+            elif command == "LOGOUT":
+                self.send("* BYE fake-imap logging out")
+                self.send(f"{tag} OK LOGOUT completed")
+                return
+            else:
+                self.send(f"{tag} OK {command} completed")
+
+    def uid_command(self, fake: "FakeIMAPServer", tag: str, args: str) -> None:
+        sub, _, args = args.partition(" ")
+        sub = sub.upper()
+        if sub == "SEARCH":
+            match = re.search(r"UID (\S+)", args)
+            uids = fake.uids_in(match.group(1)) if match else fake.uids_in("1:*")
+            self.send("* SEARCH " + " ".join(map(str, uids)))
+        elif sub == "FETCH":
+            sequence, _, items = args.partition(" ")
+            for seq, uid in enumerate(fake.uids_in(sequence), start=1):
+                self.send(self.fetch_response(seq, uid, fake.messages[uid], items))
+        else:
+            self.send(f"{tag} BAD unsupported UID {sub}")
+            return
+        self.send(f"{tag} OK UID {sub} completed")
+
+    @staticmethod
+    def fetch_response(seq: int, uid: int, message: FakeMessage, items: str) -> bytes:
+        def literal(name: bytes, data: bytes) -> bytes:
+            return name + b" {%d}\r\n" % len(data) + data
+
+        parts = [b"UID %d" % uid]
+        match = FETCH_HEADER_FIELDS.search(items)
+        if match:
+            parts.append(literal(
+                b"BODY[HEADER.FIELDS (" + match.group(1).encode() + b")]",
+                message.header_fields(match.group(1).split()),
+            ))
+        if "BODY.PEEK[1.MIME]" in items:
+            parts.append(literal(b"BODY[1.MIME]", message.part1_mime))
+        for part, length in FETCH_PARTIAL.findall(items):
+            data = message.part1 if part == "1" else message.part2 if part == "2" else b""
+            parts.append(literal(b"BODY[%s]<0>" % part.encode(), data[:int(length)]))
+        if "RFC822" in items and "HEADER" not in items:
+            parts.append(literal(b"RFC822", message.raw))
+        return b"* %d FETCH (" % seq + b" ".join(parts) + b")\r\n"
+
+
+class FakeIMAPServer(_FakeServer):
+    """Read-only IMAP mailbox seeded with raw messages; supports CONDSTORE and UID SEARCH/FETCH."""
+
+    handler_class = _IMAPHandler
+
+    def __init__(self, messages: Sequence[bytes] = (), latency=0.0, condstore: bool = True):
+        super().__init__()
+        self.latency = latency
+        self.capabilities = ["CONDSTORE", "ENABLE"] if condstore else []
+        self.uidvalidity = 1
+        self.modseq = 1
+        self.messages: Dict[int, FakeMessage] = {}
+        self.lock = threading.Lock()
+        self.add(messages)
+
+    @property
+    def uidnext(self) -> int:
+        return max(self.messages, default=0) + 1
+
+    def add(self, messages: Sequence[bytes]) -> None:
+        with self.lock:
+            for raw in messages:
+                self.messages[self.uidnext] = FakeMessage(raw)
+                self.modseq += 1
+
+    def uids_in(self, sequence: str) -> List[int]:
+        highest = max(self.messages, default=0)
+        wanted = set()
+        for item in sequence.split(","):
+            low, _, high = item.partition(":")
+            low = highest if low == "*" else int(low)
+            high = low if not high else highest if high == "*" else int(high)
+            wanted.update(range(min(low, high), max(low, high) + 1))
+        return sorted(uid for uid in wanted if uid in self.messages)
+
+
+def synthetic_message(sender: str, subject: str, body: str, in_reply_to: Optional[str] = None) -> bytes:
+    msg = MIMEMultipart()
+    msg["From"] = sender
+    msg["To"] = "me@example.com"
+    msg["Subject"] = subject
+    msg["Date"] = formatdate(usegmt=True)
+    msg["Message-ID"] = make_msgid(domain="mail.example.com")
+    if in_reply_to:
+        msg["In-Reply-To"] = in_reply_to
+        msg["References"] = in_reply_to
+    msg.attach(MIMEText(body, "plain"))
+    return msg.as_bytes()
+
+
+def synthetic_mailbox(size: int, reply_to: Sequence[str] = (), seed: int = 0) -> List[bytes]:
+    """`size` messages: one reply per Message-ID in `reply_to`, spread evenly, the rest newsletters."""
+    rng = random.Random(seed)
+    reply_at = {round(i * size / len(reply_to)): mid for i, mid in enumerate(reply_to)} if reply_to else {}
+    messages = []
+    for i in range(size):
+        if i in reply_at:
+            messages.append(synthetic_message(
+                f"recruiter{i}@company{i % 97}.com",
+                "Re: Application for the Software Engineer role",
+                "Thanks for reaching out, could you share your availability next week?\n",
+                in_reply_to=reply_at[i],
+            ))
+        else:
+            messages.append(synthetic_message(
+                f"news{rng.randrange(50)}@newsletter.example",
+                f"Weekly digest #{i}",
+                "Lorem ipsum dolor sit amet. " * rng.randrange(5, 60),
+            ))
+    return messages
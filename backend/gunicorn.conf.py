@@ -0,0 +1,23 @@
+"""gunicorn hooks; read automatically when gunicorn starts from this directory.
+
+Workers write their Prometheus samples to PROMETHEUS_MULTIPROC_DIR so that
+/metrics can add up every worker, not just the one that answers.
+"""
+
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "email-tracker-metrics"))
+
+
+def on_starting(server):
+    # Samples left by a previous run would be added to this one's
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,78 @@
+"""Baseline: the tables create_all() used to build on startup
+
+Databases created before migrations existed already have these tables, so
+each one is only created when missing.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "resumes" not in existing:
+        op.create_table(
+            "resumes",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(255), nullable=False, unique=True),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_resumes_id", "resumes", ["id"])
+
+    if "contacts" not in existing:
+        op.create_table(
+            "contacts",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("email", sa.String(255), nullable=False, unique=True),
+            sa.Column("name", sa.String(255), nullable=True),
+            sa.Column("company", sa.String(255), nullable=True),
+            sa.Column("position", sa.String(255), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_contacts_id", "contacts", ["id"])
+
+    if "campaigns" not in existing:
+        op.create_table(
+            "campaigns",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(255), nullable=False),
+            sa.Column("subject", sa.String(500), nullable=False),
+            sa.Column("body", sa.Text(), nullable=False),
+            sa.Column("recipient_count", sa.Integer(), nullable=True),
+            sa.Column("sent_count", sa.Integer(), nullable=True),
+            sa.Column("status", sa.String(50), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("sent_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_campaigns_id", "campaigns", ["id"])
+
+    if "email_templates" not in existing:
+        op.create_table(
+            "email_templates",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(255), nullable=False, unique=True),
+            sa.Column("subject", sa.String(500), nullable=False),
+            sa.Column("body", sa.Text(), nullable=False),
+            sa.Column("category", sa.String(100), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_email_templates_id", "email_templates", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("email_templates")
+    op.drop_table("campaigns")
+    op.drop_table("contacts")
+    op.drop_table("resumes")
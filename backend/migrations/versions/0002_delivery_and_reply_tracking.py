@@ -0,0 +1,107 @@
+"""Delivery queue, sent-message and reply tracking tables
+
+Adds the campaign queue columns and the campaign_recipients,
+sent_messages, replies and mailbox_checkpoints tables. Databases where
+create_all() already created some of these are patched, not recreated.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+
+    campaign_columns = {column["name"] for column in inspector.get_columns("campaigns")}
+    with op.batch_alter_table("campaigns") as batch:
+        if "failed_count" not in campaign_columns:
+            batch.add_column(sa.Column("failed_count", sa.Integer(), nullable=True))
+        if "locked_until" not in campaign_columns:
+            batch.add_column(sa.Column("locked_until", sa.DateTime(), nullable=True))
+
+    if "campaign_recipients" not in existing:
+        op.create_table(
+            "campaign_recipients",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("email", sa.String(255), nullable=False),
+            sa.Column("contact_id", sa.Integer(), sa.ForeignKey("contacts.id", ondelete="SET NULL"), nullable=True),
+            sa.Column("subject", sa.String(500), nullable=True),
+            sa.Column("body", sa.Text(), nullable=True),
+            sa.Column("status", sa.String(20), nullable=False),
+            sa.Column("error", sa.Text(), nullable=True),
+            sa.Column("sent_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_campaign_recipients_id", "campaign_recipients", ["id"])
+        op.create_index(
+            "ix_campaign_recipients_campaign_status", "campaign_recipients", ["campaign_id", "status", "id"]
+        )
+
+    if "mailbox_checkpoints" not in existing:
+        op.create_table(
+            "mailbox_checkpoints",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("account", sa.String(255), nullable=False),
+            sa.Column("mailbox", sa.String(255), nullable=False),
+            sa.Column("uidvalidity", sa.BigInteger(), nullable=True),
+            sa.Column("last_uid", sa.BigInteger(), nullable=False),
+            sa.Column("highest_modseq", sa.BigInteger(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.UniqueConstraint("account", "mailbox", name="uq_mailbox_checkpoints_account_mailbox"),
+        )
+        op.create_index("ix_mailbox_checkpoints_id", "mailbox_checkpoints", ["id"])
+
+    if "sent_messages" not in existing:
+        op.create_table(
+            "sent_messages",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("message_id", sa.String(255), nullable=False),
+            sa.Column("recipient", sa.String(255), nullable=False),
+            sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id", ondelete="SET NULL"), nullable=True),
+            sa.Column("contact_id", sa.Integer(), sa.ForeignKey("contacts.id", ondelete="SET NULL"), nullable=True),
+            sa.Column("sent_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_sent_messages_id", "sent_messages", ["id"])
+        op.create_index("ix_sent_messages_message_id", "sent_messages", ["message_id"], unique=True)
+        op.create_index("ix_sent_messages_recipient", "sent_messages", ["recipient"])
+        op.create_index("ix_sent_messages_campaign_id", "sent_messages", ["campaign_id"])
+        op.create_index("ix_sent_messages_contact_id", "sent_messages", ["contact_id"])
+
+    if "replies" not in existing:
+        op.create_table(
+            "replies",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("message_id", sa.String(255), nullable=True, unique=True),
+            sa.Column("in_reply_to", sa.String(255), nullable=True),
+            sa.Column("from_email", sa.String(255), nullable=False),
+            sa.Column("subject", sa.String(500), nullable=True),
+            sa.Column("snippet", sa.Text(), nullable=True),
+            sa.Column("sent_message_id", sa.Integer(), sa.ForeignKey("sent_messages.id", ondelete="SET NULL"), nullable=True),
+            sa.Column("contact_id", sa.Integer(), sa.ForeignKey("contacts.id", ondelete="SET NULL"), nullable=True),
+            sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id", ondelete="SET NULL"), nullable=True),
+            sa.Column("received_at", sa.DateTime(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_replies_id", "replies", ["id"])
+        op.create_index("ix_replies_from_email", "replies", ["from_email"])
+        op.create_index("ix_replies_contact_id", "replies", ["contact_id"])
+        op.create_index("ix_replies_campaign_id", "replies", ["campaign_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("replies")
+    op.drop_table("sent_messages")
+    op.drop_table("mailbox_checkpoints")
+    op.drop_table("campaign_recipients")
+    with op.batch_alter_table("campaigns") as batch:
+        batch.drop_column("locked_until")
+        batch.drop_column("failed_count")
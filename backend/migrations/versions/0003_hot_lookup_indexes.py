@@ -0,0 +1,36 @@
+"""Indexes for campaign dashboards and queue polling
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+ACTIVE_PREDICATE = sa.text("status IN ('queued', 'sending')")
+
+
+def upgrade() -> None:
+    existing = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("campaigns")}
+    if "ix_campaigns_status_created_at" not in existing:
+        # Dashboards filter by status and sort/filter by creation time
+        op.create_index("ix_campaigns_status_created_at", "campaigns", ["status", "created_at"])
+    if "ix_campaigns_active" not in existing:
+        # Queue workers poll for queued/sending campaigns; finished ones never enter this index
+        op.create_index(
+            "ix_campaigns_active",
+            "campaigns",
+            ["id"],
+            sqlite_where=ACTIVE_PREDICATE,
+            postgresql_where=ACTIVE_PREDICATE,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_campaigns_active", table_name="campaigns")
+    op.drop_index("ix_campaigns_status_created_at", table_name="campaigns")
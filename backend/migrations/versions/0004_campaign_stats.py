@@ -0,0 +1,70 @@
+"""Campaign event log and rollup counters
+
+Adds campaign_events, campaign_stat_buckets and the bounced/replied
+counters on campaigns. replied_count is backfilled from the replies
+already tracked (one per answered sent message).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+
+    campaign_columns = {column["name"] for column in inspector.get_columns("campaigns")}
+    with op.batch_alter_table("campaigns") as batch:
+        if "bounced_count" not in campaign_columns:
+            batch.add_column(sa.Column("bounced_count", sa.Integer(), nullable=True))
+        if "replied_count" not in campaign_columns:
+            batch.add_column(sa.Column("replied_count", sa.Integer(), nullable=True))
+
+    if "campaign_events" not in existing:
+        op.create_table(
+            "campaign_events",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("event_type", sa.String(20), nullable=False),
+            sa.Column("recipient", sa.String(255), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        )
+        op.create_index("ix_campaign_events_id", "campaign_events", ["id"])
+        op.create_index(
+            "ix_campaign_events_campaign_type_created", "campaign_events", ["campaign_id", "event_type", "created_at"]
+        )
+
+    if "campaign_stat_buckets" not in existing:
+        op.create_table(
+            "campaign_stat_buckets",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("bucket_start", sa.DateTime(), nullable=False),
+            sa.Column("sent", sa.Integer(), nullable=False),
+            sa.Column("failed", sa.Integer(), nullable=False),
+            sa.Column("bounced", sa.Integer(), nullable=False),
+            sa.Column("replied", sa.Integer(), nullable=False),
+            sa.UniqueConstraint("campaign_id", "bucket_start", name="uq_campaign_stat_buckets_campaign_bucket"),
+        )
+        op.create_index("ix_campaign_stat_buckets_id", "campaign_stat_buckets", ["id"])
+
+    op.execute(
+        "UPDATE campaigns SET bounced_count = COALESCE(bounced_count, 0), replied_count = ("
+        "SELECT COUNT(DISTINCT replies.sent_message_id) FROM replies WHERE replies.campaign_id = campaigns.id)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("campaign_stat_buckets")
+    op.drop_table("campaign_events")
+    with op.batch_alter_table("campaigns") as batch:
+        batch.drop_column("replied_count")
+        batch.drop_column("bounced_count")
@@ -0,0 +1,32 @@
+"""Suppression list for hard-bounced addresses
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if "suppressed_addresses" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "suppressed_addresses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False, unique=True),
+        sa.Column("reason", sa.String(50), nullable=False),
+        sa.Column("detail", sa.Text(), nullable=True),
+        sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_suppressed_addresses_id", "suppressed_addresses", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("suppressed_addresses")
@@ -0,0 +1,33 @@
+"""Retry bookkeeping for campaign recipients and the send-quota index
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columns = {column["name"] for column in inspector.get_columns("campaign_recipients")}
+    with op.batch_alter_table("campaign_recipients") as batch:
+        if "attempts" not in columns:
+            batch.add_column(sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"))
+        if "next_attempt_at" not in columns:
+            batch.add_column(sa.Column("next_attempt_at", sa.DateTime(), nullable=True))
+    indexes = {index["name"] for index in inspector.get_indexes("campaign_stat_buckets")}
+    if "ix_campaign_stat_buckets_bucket_start" not in indexes:
+        op.create_index("ix_campaign_stat_buckets_bucket_start", "campaign_stat_buckets", ["bucket_start"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_campaign_stat_buckets_bucket_start", table_name="campaign_stat_buckets")
+    with op.batch_alter_table("campaign_recipients") as batch:
+        batch.drop_column("next_attempt_at")
+        batch.drop_column("attempts")
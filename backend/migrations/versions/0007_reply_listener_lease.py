@@ -0,0 +1,29 @@
+"""Lease so only one worker holds the IMAP IDLE session per mailbox
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columns = {column["name"] for column in inspector.get_columns("mailbox_checkpoints")}
+    with op.batch_alter_table("mailbox_checkpoints") as batch:
+        if "listener_id" not in columns:
+            batch.add_column(sa.Column("listener_id", sa.String(length=255), nullable=True))
+        if "listener_lease_until" not in columns:
+            batch.add_column(sa.Column("listener_lease_until", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("mailbox_checkpoints") as batch:
+        batch.drop_column("listener_lease_until")
+        batch.drop_column("listener_id")
@@ -0,0 +1,24 @@
+"""Index the suppression list's refresh watermark
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    indexes = {index["name"] for index in inspector.get_indexes("suppressed_addresses")}
+    if "ix_suppressed_addresses_created_at" not in indexes:
+        op.create_index("ix_suppressed_addresses_created_at", "suppressed_addresses", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_suppressed_addresses_created_at", table_name="suppressed_addresses")
@@ -0,0 +1,41 @@
+"""Key the active-campaign partial index by status so the queue claim uses it
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+ACTIVE_PREDICATE = sa.text("status IN ('queued', 'sending')")
+
+
+def recreate_active_index(columns) -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing = {index["name"]: index["column_names"] for index in inspector.get_indexes("campaigns")}
+    if existing.get("ix_campaigns_active") == columns:
+        return
+    if "ix_campaigns_active" in existing:
+        op.drop_index("ix_campaigns_active", table_name="campaigns")
+    op.create_index(
+        "ix_campaigns_active",
+        "campaigns",
+        columns,
+        sqlite_where=ACTIVE_PREDICATE,
+        postgresql_where=ACTIVE_PREDICATE,
+    )
+
+
+def upgrade() -> None:
+    # Keyed by id alone, the index lost to ix_campaigns_status_created_at whenever the
+    # planner had no statistics; leading with status it matches the same IN lookup
+    recreate_active_index(["status", "id"])
+
+
+def downgrade() -> None:
+    recreate_active_index(["id"])
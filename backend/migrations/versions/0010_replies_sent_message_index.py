@@ -0,0 +1,24 @@
+"""Index replies by the sent message they answer
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    indexes = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("replies")}
+    if "ix_replies_sent_message_id" not in indexes:
+        # Every saved batch looks up which sent messages already have a reply
+        op.create_index("ix_replies_sent_message_id", "replies", ["sent_message_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_replies_sent_message_id", table_name="replies")
@@ -0,0 +1,22 @@
+"""Point the app at a throwaway database and account before anything imports it."""
+
+import os
+import tempfile
+
+import pytest
+
+_workdir = tempfile.mkdtemp(prefix="email-tracker-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_workdir}/test.db",
+    "EMAIL_USER": "me@example.com",
+    "EMAIL_PASSWORD": "test",
+    "SMTP_USE_TLS": "false",
+    "IMAP_USE_SSL": "false",
+    "LOG_LEVEL": "WARNING",
+})
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    from app.core.database import create_tables
+    create_tables()
@@ -0,0 +1,79 @@
+import tracemalloc
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import admin
+from app.core.config import get_settings
+from app.core.profiling import profile_lock
+from app.main import app
+
+client = TestClient(app)
+TOKEN = "s3cret-admin"
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    settings = get_settings().model_copy(update={"ADMIN_TOKEN": TOKEN})
+    monkeypatch.setattr(admin, "get_settings", lambda: settings)
+    return {admin.ADMIN_TOKEN_HEADER: TOKEN}
+
+
+def test_profiling_is_hidden_without_an_admin_token():
+    assert not get_settings().ADMIN_TOKEN
+    assert client.get("/api/v1/admin/profile/cpu", headers={admin.ADMIN_TOKEN_HEADER: ""}).status_code == 404
+    # ?profile=1 is ignored and the request is served as usual
+    response = client.get("/health", params={"profile": "1"})
+    assert response.status_code == 200 and "X-Profiled-Status" not in response.headers
+
+
+def test_wrong_or_missing_token_is_forbidden(admin_token):
+    assert client.get("/api/v1/admin/profile/cpu", params={"seconds": 0.05}).status_code == 403
+    response = client.get(
+        "/api/v1/admin/profile/memory", params={"seconds": 0}, headers={admin.ADMIN_TOKEN_HEADER: "guess"},
+    )
+    assert response.status_code == 403
+
+
+def test_cpu_profile(admin_token):
+    response = client.get(
+        "/api/v1/admin/profile/cpu",
+        params={"seconds": 0.2, "interval_ms": 2, "format": "text", "include_idle": True},
+        headers=admin_token,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].endswith('.txt"')
+    assert "sampled every 2ms" in response.text
+    assert "Busy samples by thread" in response.text
+
+    folded = client.get("/api/v1/admin/profile/cpu", params={"seconds": 0.1, "include_idle": True}, headers=admin_token)
+    # thread;frame;...;frame count
+    assert folded.status_code == 200 and folded.text
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded.text.splitlines())
+
+
+def test_memory_profile(admin_token, tmp_path):
+    response = client.get("/api/v1/admin/profile/memory", params={"seconds": 0.05}, headers=admin_token)
+    assert response.status_code == 200
+    assert "allocated during the 0.05s window" in response.text
+    # tracemalloc is only on while the snapshot is taken
+    assert not tracemalloc.is_tracing()
+
+    raw = client.get("/api/v1/admin/profile/memory", params={"seconds": 0, "format": "raw"}, headers=admin_token)
+    assert raw.headers["content-type"] == "application/octet-stream"
+    path = tmp_path / "snapshot"
+    path.write_bytes(raw.content)
+    assert isinstance(tracemalloc.Snapshot.load(str(path)), tracemalloc.Snapshot)
+
+
+def test_one_profile_at_a_time(admin_token):
+    with profile_lock:
+        response = client.get("/api/v1/admin/profile/memory", params={"seconds": 0}, headers=admin_token)
+    assert response.status_code == 409
+
+
+def test_profile_query_parameter_returns_the_request_profile(admin_token):
+    response = client.get("/health", params={"profile": "1"}, headers=admin_token)
+    assert response.status_code == 200
+    assert response.headers["X-Profiled-Status"] == "200"
+    assert "thread samples" in response.text
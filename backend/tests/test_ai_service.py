@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.ai_service import AIService
+
+
+class SlowModel:
+    """Stands in for the blocking Gemini client."""
+
+    def __init__(self, seconds: float = 0.2, fail: bool = False):
+        self.seconds = seconds
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.seconds)
+        if self.fail:
+            raise RuntimeError("upstream failed")
+        return SimpleNamespace(text=f"Draft for: {prompt[-20:]}")
+
+
+def test_identical_requests_share_one_call_without_blocking_the_loop():
+    model = SlowModel()
+    service = AIService(model=model, model_name="fake")
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        drafts = await asyncio.gather(*(service.generate_email("Write to HR", "resume") for _ in range(5)))
+        ticking.cancel()
+        return drafts, ticks
+
+    drafts, ticks = asyncio.run(scenario())
+    assert len(set(drafts)) == 1
+    assert model.calls == 1
+    assert (service.misses, service.coalesced) == (1, 4)
+    # The loop kept running while the model call was in progress
+    assert ticks >= 5
+    service.close()
+
+
+def test_cancelling_the_first_request_does_not_fail_the_others():
+    model = SlowModel()
+    service = AIService(model=model, model_name="fake")
+
+    async def scenario():
+        first = asyncio.create_task(service.generate_email("Follow up", ""))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(service.generate_email("Follow up", ""))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()).startswith("Draft for")
+    assert model.calls == 1
+    service.close()
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    model = SlowModel(seconds=0.05, fail=True)
+    service = AIService(model=model, model_name="fake")
+
+    async def scenario():
+        return await asyncio.gather(*(service.generate_email("Thanks", "") for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(scenario()))
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.generate_email("Thanks", ""))
+    assert model.calls == 2
+    service.close()
@@ -0,0 +1,127 @@
+import email
+import smtplib
+from datetime import datetime, timedelta
+
+from app.core.database import SessionLocal
+from app.models.campaign import Campaign
+from app.models.campaign_event import CampaignEvent
+from app.models.suppressed_address import SuppressedAddress
+from app.services.bounce_processing import (
+    BounceProcessor,
+    delivery_status_bytes,
+    is_dead_mailbox_error,
+    is_delivery_report,
+    is_hard_bounce,
+    parse_delivery_status,
+)
+from app.services.suppression import SuppressionList
+
+DSN = (
+    b"From: Mail Delivery Subsystem <mailer-daemon@googlemail.com>\r\n"
+    b"Subject: Delivery Status Notification (Failure)\r\n"
+    b"MIME-Version: 1.0\r\n"
+    b'Content-Type: multipart/report; report-type=delivery-status; boundary="b1"\r\n'
+    b"\r\n"
+    b"--b1\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"\r\n"
+    b"Your message wasn't delivered.\r\n"
+    b"--b1\r\n"
+    b"Content-Type: message/delivery-status\r\n"
+    b"\r\n"
+    b"Reporting-MTA: dns; googlemail.com\r\n"
+    b"\r\n"
+    b"Final-Recipient: rfc822; Gone@Acme.io\r\n"
+    b"Action: failed\r\n"
+    b"Status: 5.1.1\r\n"
+    b"Diagnostic-Code: smtp; 550 5.1.1 The email account does not exist\r\n"
+    b"\r\n"
+    b"Original-Recipient: rfc822;later@acme.io\r\n"
+    b"Action: delayed\r\n"
+    b"Status: 4.4.7\r\n"
+    b"--b1--\r\n"
+)
+
+
+def test_delivery_report_yields_one_entry_per_recipient():
+    msg = email.message_from_bytes(DSN)
+    assert is_delivery_report(msg)
+    entries = parse_delivery_status(delivery_status_bytes(msg))
+    assert entries == [
+        {
+            "recipient": "gone@acme.io",
+            "action": "failed",
+            "status": "5.1.1",
+            "diagnostic": "smtp; 550 5.1.1 The email account does not exist",
+        },
+        {"recipient": "later@acme.io", "action": "delayed", "status": "4.4.7", "diagnostic": ""},
+    ]
+    assert [is_hard_bounce(entry) for entry in entries] == [True, False]
+
+
+def test_ordinary_mail_is_not_a_delivery_report():
+    msg = email.message_from_bytes(b"Content-Type: multipart/mixed; boundary=x\r\n\r\n--x--\r\n")
+    assert not is_delivery_report(msg)
+    assert parse_delivery_status(b"") == []
+
+
+def test_only_dead_mailbox_rejections_count():
+    def refused(code, text):
+        return smtplib.SMTPRecipientsRefused({"a@acme.io": (code, text)})
+
+    assert is_dead_mailbox_error(refused(550, b"5.1.1 No such user"), "a@acme.io") == "550 5.1.1 No such user"
+    assert is_dead_mailbox_error(refused(553, b"mailbox name not allowed"), "a@acme.io")
+    # Full mailbox, policy blocks and temporary failures leave the address alone
+    assert is_dead_mailbox_error(refused(552, b"5.2.2 Mailbox full"), "a@acme.io") is None
+    assert is_dead_mailbox_error(refused(550, b"5.7.1 Message rejected as spam"), "a@acme.io") is None
+    assert is_dead_mailbox_error(refused(450, b"4.2.1 Try later"), "a@acme.io") is None
+    assert is_dead_mailbox_error(refused(550, b"5.1.1 No such user"), "b@acme.io") is None
+    assert is_dead_mailbox_error(smtplib.SMTPServerDisconnected(), "a@acme.io") is None
+
+
+def bounced_events(db, campaign_id: int) -> int:
+    return db.query(CampaignEvent).filter_by(campaign_id=campaign_id, event_type="bounced").count()
+
+
+def test_repeated_bounces_count_once():
+    db = SessionLocal()
+    try:
+        campaign = Campaign(name="Bounces", subject="Hi", body="Hello")
+        db.add(campaign)
+        db.commit()
+        processor = BounceProcessor(suppressions=SuppressionList(refresh_seconds=0))
+        bounce = {"recipient": "Gone@Example.com", "detail": "5.1.1 no such user", "campaign_id": campaign.id}
+
+        assert processor.process(db, [bounce, dict(bounce, recipient="gone@example.com")]) == 1
+        db.commit()
+        # The same DSN read again, in this process and in another one with its own list
+        assert processor.process(db, [bounce]) == 0
+        assert BounceProcessor(suppressions=SuppressionList(refresh_seconds=0)).process(db, [bounce]) == 0
+        db.commit()
+
+        db.refresh(campaign)
+        assert bounced_events(db, campaign.id) == 1
+        assert campaign.bounced_count == 1
+    finally:
+        db.close()
+
+
+def test_refresh_picks_up_rows_that_commit_out_of_order():
+    suppressions = SuppressionList(refresh_seconds=0)
+    suppressions.load()
+    db = SessionLocal()
+    try:
+        created = datetime.utcnow()
+        # On PostgreSQL a transaction can commit after one that took a later id
+        db.add(SuppressedAddress(id=1_000_000, email="later@order.io", reason="hard_bounce", created_at=created))
+        db.commit()
+        suppressions.refresh()
+        assert "later@order.io" in suppressions
+        db.add(SuppressedAddress(
+            id=999_999, email="earlier@order.io", reason="hard_bounce", created_at=created - timedelta(seconds=2),
+        ))
+        db.commit()
+        suppressions.refresh()
+        assert "earlier@order.io" in suppressions
+    finally:
+        db.close()
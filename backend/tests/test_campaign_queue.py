@@ -0,0 +1,170 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.models.campaign import Campaign
+from app.models.campaign_recipient import CampaignRecipient
+from app.services.campaign_queue import CampaignQueue
+from app.services.campaign_stats import campaign_stats
+from app.services.email_service import EmailService
+from benchmarks.fakes import FakeSMTPServer
+
+
+def service_for(smtp: FakeSMTPServer) -> EmailService:
+    return EmailService(get_settings().model_copy(update={"SMTP_SERVER": smtp.host, "SMTP_PORT": smtp.port}))
+
+
+def test_waiting_for_drafts_leaves_idle_workers_wakeup_alone():
+    queue = CampaignQueue(workers=1)
+    queue.stall_seconds = 60
+    db = SessionLocal()
+    with FakeSMTPServer() as smtp:
+        try:
+            campaign = queue.enqueue(db, ["drafted@company.com"], "Hi", "Hello", drafting=True)
+            campaign_id = queue._claim_next(db)
+            delivering = threading.Thread(target=queue._deliver, args=(db, campaign_id, service_for(smtp)))
+            delivering.start()
+
+            # A campaign queued for the idle workers while this one waits for its drafts
+            queue._wakeup.clear()
+            queue.notify()
+            time.sleep(1.2)
+            assert queue._wakeup.is_set()
+
+            # Personalisation finishing wakes the delivering worker straight away
+            other = SessionLocal()
+            other.query(CampaignRecipient).filter_by(campaign_id=campaign.id).update({"status": "pending"})
+            other.commit()
+            other.close()
+            queue.notify_drafted()
+            delivering.join(timeout=0.5)
+            assert not delivering.is_alive()
+            db.expire_all()
+            assert db.get(Campaign, campaign.id).status == "sent"
+        finally:
+            queue._stop.set()
+            queue.notify_drafted()
+            db.close()
+
+
+def deliver(queue: CampaignQueue, smtp: FakeSMTPServer, recipients: list) -> int:
+    db = SessionLocal()
+    try:
+        campaign = queue.enqueue(db, recipients, "Hi", "Hello")
+        assert queue._claim_next(db) == campaign.id
+        service = service_for(smtp)
+        queue._deliver(db, campaign.id, service)
+        service.close()
+        return campaign.id
+    finally:
+        db.close()
+
+
+def outcomes(campaign_id: int) -> dict:
+    db = SessionLocal()
+    try:
+        rows = db.query(CampaignRecipient).filter_by(campaign_id=campaign_id).all()
+        return {row.email: (row.status, row.attempts) for row in rows}
+    finally:
+        db.close()
+
+
+def fast_retry_queue(max_attempts: int) -> CampaignQueue:
+    queue = CampaignQueue(workers=1)
+    queue.max_attempts = max_attempts
+    queue.retry_base = queue.retry_cap = 0.01
+    return queue
+
+
+def test_temporary_failure_is_retried_until_it_goes_through():
+    # The server rejects the first attempt only
+    with FakeSMTPServer(fail={"flaky@": 447}, fail_times=1) as smtp:
+        campaign_id = deliver(fast_retry_queue(max_attempts=3), smtp, ["flaky@retry.io", "fine@retry.io"])
+    assert outcomes(campaign_id) == {"flaky@retry.io": ("sent", 1), "fine@retry.io": ("sent", 0)}
+    db = SessionLocal()
+    campaign = db.get(Campaign, campaign_id)
+    assert (campaign.status, campaign.sent_count, campaign.failed_count) == ("sent", 2, 0)
+    db.close()
+
+
+def test_retries_stop_after_max_attempts():
+    with FakeSMTPServer(fail={"down@": 447}) as smtp:
+        campaign_id = deliver(fast_retry_queue(max_attempts=2), smtp, ["down@giveup.io", "up@giveup.io"])
+        assert smtp.delivered == 1
+    assert outcomes(campaign_id) == {"down@giveup.io": ("failed", 2), "up@giveup.io": ("sent", 0)}
+    db = SessionLocal()
+    campaign = db.get(Campaign, campaign_id)
+    assert (campaign.status, campaign.sent_count, campaign.failed_count) == ("sent", 1, 1)
+    db.close()
+
+
+def test_retry_far_ahead_frees_the_worker_until_then():
+    queue = fast_retry_queue(max_attempts=3)
+    queue.retry_base = queue.retry_cap = 600
+    with FakeSMTPServer(fail={"later@": 447}) as smtp:
+        campaign_id = deliver(queue, smtp, ["later@hold.io"])
+    db = SessionLocal()
+    try:
+        campaign = db.get(Campaign, campaign_id)
+        row = db.query(CampaignRecipient).filter_by(campaign_id=campaign_id).one()
+        assert (row.status, row.attempts) == ("pending", 1)
+        # Still the worker's campaign, but leased until the retry is due
+        assert campaign.status == "sending"
+        assert campaign.locked_until == row.next_attempt_at
+        assert queue._claim_next(db) is None
+    finally:
+        db.close()
+
+
+def test_database_errors_requeue_the_campaign_and_others_fail_it():
+    queue = CampaignQueue(workers=1)
+    db = SessionLocal()
+    try:
+        campaign = queue.enqueue(db, ["someone@locked.io"], "Hi", "Hello")
+        assert queue._claim_next(db) == campaign.id
+        queue._abort(db, campaign.id, OperationalError("UPDATE campaigns", {}, Exception("database is locked")))
+        db.expire_all()
+        assert campaign.status == "queued"
+        assert campaign.locked_until > datetime.utcnow()
+        # Backing off: no worker picks it up until the lease runs out
+        assert queue._claim_next(db) is None
+        campaign.locked_until = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+        assert queue._claim_next(db) == campaign.id
+
+        queue._abort(db, campaign.id, Exception("Email authentication failed. Check your credentials."))
+        db.expire_all()
+        assert (campaign.status, campaign.locked_until) == ("failed", None)
+        assert outcomes(campaign.id) == {"someone@locked.io": ("pending", 0)}
+    finally:
+        db.close()
+
+
+def test_daily_quota_caps_sends_and_holds_the_rest():
+    queue = CampaignQueue(workers=1)
+    db = SessionLocal()
+    try:
+        already_sent, _ = campaign_stats.sent_since(db, datetime.utcnow() - timedelta(days=1))
+    finally:
+        db.close()
+    queue.daily_quota = already_sent + 3
+    with FakeSMTPServer() as smtp:
+        campaign_id = deliver(queue, smtp, [f"person{i}@quota.io" for i in range(5)])
+        assert smtp.delivered == 3
+    assert sorted(status for status, _ in outcomes(campaign_id).values()) == ["pending"] * 2 + ["sent"] * 3
+
+    db = SessionLocal()
+    try:
+        campaign = db.get(Campaign, campaign_id)
+        assert campaign.status == "sending"
+        # Held until the oldest counted sends leave the 24-hour window
+        assert campaign.locked_until > datetime.utcnow() + timedelta(hours=23)
+        assert queue._quota_allowance(db, 4)[0] == 0
+        queue.daily_quota += 2
+        assert queue._quota_allowance(db, 4) == (2, None)
+    finally:
+        db.close()
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.database import SessionLocal
+from app.models.campaign import Campaign
+from app.models.campaign_event import CampaignEvent
+from app.services.campaign_stats import CampaignStats, bucket_start
+
+
+def new_campaign(db, name: str) -> Campaign:
+    campaign = Campaign(name=name, subject="Hi", body="Hello")
+    db.add(campaign)
+    db.commit()
+    return campaign
+
+
+def test_bucket_start_aligns_to_midnight():
+    assert bucket_start(datetime(2026, 3, 1, 13, 59, 30), 60) == datetime(2026, 3, 1, 13, 0)
+    assert bucket_start(datetime(2026, 3, 1, 13, 59, 30), 15) == datetime(2026, 3, 1, 13, 45)
+    assert bucket_start(datetime(2026, 3, 1, 0, 7), 1440) == datetime(2026, 3, 1)
+    # 50 does not divide a day, so the default hour is used
+    assert CampaignStats(bucket_minutes=50).bucket_minutes == 60
+
+
+def test_events_roll_up_into_counters_and_buckets():
+    stats = CampaignStats(bucket_minutes=60)
+    db = SessionLocal()
+    try:
+        first, second = new_campaign(db, "Rollup A"), new_campaign(db, "Rollup B")
+        stats.record(db, [
+            (first.id, "sent", "a@rollup.io"),
+            (first.id, "sent", "b@rollup.io"),
+            (first.id, "failed", "c@rollup.io"),
+            (second.id, "sent", "d@rollup.io"),
+            (None, "replied", "stranger@rollup.io"),
+        ], at=datetime(2026, 3, 1, 9, 10))
+        db.commit()
+        # Same hour: added to the existing bucket; next hour: a new one
+        stats.record(db, [(first.id, "sent", "e@rollup.io"), (first.id, "replied", "a@rollup.io")],
+                     at=datetime(2026, 3, 1, 9, 50))
+        stats.record(db, [(first.id, "bounced", "b@rollup.io")], at=datetime(2026, 3, 1, 10, 5))
+        db.commit()
+
+        db.refresh(first)
+        db.refresh(second)
+        assert (first.sent_count, first.failed_count, first.bounced_count, first.replied_count) == (3, 1, 1, 1)
+        assert (second.sent_count, second.failed_count) == (1, 0)
+        assert [
+            (b.bucket_start.hour, b.sent, b.failed, b.bounced, b.replied) for b in stats.buckets(db, first.id)
+        ] == [(9, 3, 1, 0, 1), (10, 0, 0, 1, 0)]
+        assert db.query(CampaignEvent).filter_by(campaign_id=first.id).count() == 6
+        # Events without a campaign are dropped
+        assert db.query(CampaignEvent).filter_by(recipient="stranger@rollup.io").count() == 0
+    finally:
+        db.close()
+
+
+def test_unknown_event_type_is_rejected():
+    db = SessionLocal()
+    try:
+        campaign = new_campaign(db, "Rollup C")
+        with pytest.raises(ValueError):
+            CampaignStats().record(db, [(campaign.id, "opened", "a@rollup.io")])
+    finally:
+        db.rollback()
+        db.close()
@@ -0,0 +1,40 @@
+import io
+
+from fastapi.testclient import TestClient
+
+from app.core.database import SessionLocal
+from app.main import app
+from app.services.contact_import import ContactImporter, iter_csv_rows
+
+
+def csv_rows(text: str):
+    return iter_csv_rows(io.BytesIO(text.encode()))
+
+
+def test_existing_contacts_left_alone_are_reported_as_skipped():
+    db = SessionLocal()
+    try:
+        first = ContactImporter(batch_size=2).import_rows(
+            db, csv_rows("email,name\nann@acme.io,Ann\nbob@acme.io,Bob\nnot-an-email,X\n")
+        )
+        assert (first.processed, first.written, first.skipped, first.rejected) == (3, 2, 0, 1)
+
+        again = ContactImporter(batch_size=2).import_rows(
+            db, csv_rows("hr_email,name\nann@acme.io,Ann\ncid@acme.io,Cid\nbob@acme.io,Bob\n"), update_existing=False
+        )
+        assert (again.processed, again.written, again.skipped) == (3, 1, 2)
+
+        updated = ContactImporter().import_rows(db, csv_rows("email,company\nann@acme.io,Acme\n"))
+        assert (updated.written, updated.skipped) == (1, 0)
+    finally:
+        db.close()
+
+
+def test_file_without_an_email_column_is_refused():
+    response = TestClient(app).post(
+        "/api/v1/contacts/import",
+        files={"file": ("people.csv", b"name,company\nAnn,Acme\n", "text/csv")},
+    )
+    assert response.status_code == 400
+    assert "email column" in response.json()["detail"]
+    assert "hr_email" in response.json()["detail"]
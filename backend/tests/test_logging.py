@@ -0,0 +1,59 @@
+import io
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+from contextvars import copy_context
+
+from app.core.logging import ContextQueueHandler, JsonFormatter, Sampler, log_context
+
+
+def queued_logger(name: str):
+    """A logger wired like configure_logging's, writing JSON lines to a buffer."""
+    output = io.StringIO()
+    handler = logging.StreamHandler(output)
+    handler.setFormatter(JsonFormatter())
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(ContextQueueHandler(log_queue))
+    return logger, listener, output
+
+
+def test_records_carry_context_extra_fields_and_tracebacks():
+    logger, listener, output = queued_logger("tests.logging.fields")
+    listener.start()
+    try:
+        recipients = ["a@ctx.io"]
+        with log_context(campaign_id=7):
+            logger.info("Sending to %s", recipients, extra={"batch": 2})
+            # Work handed to another thread with the context copied keeps the fields
+            worker = threading.Thread(target=copy_context().run, args=(logger.warning, "From a sender thread"))
+            worker.start()
+            worker.join()
+        # Arguments are merged when the call is made, not when the writer gets to it
+        recipients.append("b@ctx.io")
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            logger.exception("Outside the block")
+    finally:
+        listener.stop()
+
+    first, second, third = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert first["msg"] == "Sending to ['a@ctx.io']"
+    assert (first["level"], first["logger"], first["campaign_id"], first["batch"]) == ("info", "tests.logging.fields", 7, 2)
+    assert (second["msg"], second["campaign_id"]) == ("From a sender thread", 7)
+    assert "campaign_id" not in third
+    assert "RuntimeError: boom" in third["exc"]
+
+
+def test_sampler_lets_one_in_every_n_through():
+    sampler = Sampler(0.25)
+    assert sampler.every == 4
+    assert [sampler.hit() for _ in range(8)] == [True, False, False, False] * 2
+    assert not any(Sampler(0).hit() for _ in range(3))
+    assert all(Sampler(1).hit() for _ in range(3))
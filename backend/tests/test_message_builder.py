@@ -0,0 +1,52 @@
+from email import message_from_bytes
+
+from app.core.config import get_settings
+from app.services.email_service import EmailService
+from app.services.message_builder import WIRE_POLICY, PreparedMessage, build_mime
+from benchmarks.fakes import FakeSMTPServer
+
+
+def split_message(data: bytes):
+    head, _, rest = data.partition(b"\r\n\r\n")
+    return sorted(head.split(b"\r\n")), rest
+
+
+def reference_bytes(prepared_bytes: bytes, sender: str, recipient: str, subject: str, body: str) -> bytes:
+    """What smtplib.send_message sends for the same message, with the per-send values copied over."""
+    parsed = message_from_bytes(prepared_bytes)
+    msg = build_mime(sender, recipient, subject, body)
+    msg['Message-ID'] = parsed['Message-ID']
+    msg['Date'] = parsed['Date']
+    msg.set_boundary(parsed.get_boundary())
+    return msg.as_bytes(policy=WIRE_POLICY)
+
+
+def test_prepared_bytes_match_the_mime_path():
+    sender = "me@example.com"
+    for subject, body in (
+        ("Application for the Software Engineer role", "Hi there,\n\nPlease find my resume attached.\n"),
+        ("Candidature – ingénieur logiciel", "Bonjour,\n\nMerci pour votre temps. ☺\n"),
+        ("A" * 120, "x" * 5000),
+    ):
+        prepared = PreparedMessage(sender, subject, body, msgid_domain="example.com")
+        for recipient in ("hr@company.com", "jobs@other.org"):
+            message_id, data = prepared.for_recipient(recipient)
+            assert message_from_bytes(data)['Message-ID'] == message_id
+            assert message_id.endswith("@example.com>")
+            assert split_message(data) == split_message(reference_bytes(data, sender, recipient, subject, body))
+
+
+def test_unserialisable_subject_fails_only_its_own_recipient():
+    with FakeSMTPServer() as smtp:
+        service = EmailService(get_settings().model_copy(update={"SMTP_SERVER": smtp.host, "SMTP_PORT": smtp.port}))
+        try:
+            result = service.send_each([
+                ("victim@company.com", "Hello\r\nBcc: evil@example.com", "body"),
+                ("fine@company.com", "Hello", "body"),
+            ])
+        finally:
+            service.close()
+        assert smtp.delivered == 1
+    injected, fine = result.results
+    assert not injected.success and not injected.retry_after and not injected.dead_mailbox
+    assert fine.success
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+# Each snippet runs as its own process, like two gunicorn workers sharing PROMETHEUS_MULTIPROC_DIR
+SERVE = """
+from fastapi.testclient import TestClient
+from app.main import app
+assert TestClient(app).get("/health/db").status_code == 200
+"""
+SCRAPE = """
+from fastapi.testclient import TestClient
+from app.main import app
+response = TestClient(app).get("/metrics")
+assert response.status_code == 200
+print(response.text)
+"""
+
+
+def run(code: str, env: dict) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_any_worker_serves_every_workers_samples(tmp_path):
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    run(SERVE, env)
+    scrape = run(SCRAPE, env)
+
+    # Recorded by the other process
+    assert 'http_request_duration_seconds_count{method="GET",route="/health/db",status="200"} 1.0' in scrape
+    # Copied into gauges by the collectors
+    assert 'db_pool_connections{engine="sync",state="idle"}' in scrape
+    assert "smtp_pool_idle_connections " in scrape
+    assert "campaign_queue_workers " in scrape
@@ -0,0 +1,23 @@
+from fastapi.testclient import TestClient
+
+from app.core.utils import NEXT_CURSOR_HEADER
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_resume_list_is_unpaged_unless_asked():
+    created = [
+        client.post("/api/v1/resumes/", json={"name": f"Paging resume {i}", "content": "..."}).json()["id"]
+        for i in range(3)
+    ]
+
+    everything = client.get("/api/v1/resumes/")
+    assert everything.status_code == 200
+    assert NEXT_CURSOR_HEADER not in everything.headers
+    assert set(created) <= {resume["id"] for resume in everything.json()}
+
+    first = client.get("/api/v1/resumes/", params={"limit": 2, "cursor": created[0] - 1})
+    assert [resume["id"] for resume in first.json()] == created[:2]
+    rest = client.get("/api/v1/resumes/", params={"cursor": first.headers[NEXT_CURSOR_HEADER]})
+    assert [resume["id"] for resume in rest.json()][:1] == created[2:]
@@ -0,0 +1,49 @@
+import socket
+from datetime import timedelta
+from types import SimpleNamespace
+
+from app.services.reply_listener import ReplyListener
+
+
+def listener(listener_id: str, lease_seconds: float = 60) -> ReplyListener:
+    worker = ReplyListener()
+    worker.user = "lease@example.com"
+    worker.listener_id = listener_id
+    worker.lease = timedelta(seconds=lease_seconds)
+    return worker
+
+
+def test_only_one_worker_holds_the_mailbox():
+    first, second = listener("host:1"), listener("host:2")
+    assert first._claim()
+    assert not second._claim()
+    # Renewing your own lease keeps it
+    assert first._claim()
+    first._release()
+    assert second._claim()
+    second._release()
+
+
+def test_an_expired_lease_is_taken_over():
+    first, second = listener("host:3", lease_seconds=-1), listener("host:4")
+    assert first._claim()
+    assert second._claim()
+    second._release()
+
+
+def test_lines_already_buffered_count_as_readable():
+    server, client = socket.socketpair()
+    try:
+        mail = SimpleNamespace(sock=client, file=client.makefile("rb"))
+        # Both lines arrive in one read; readline() consumes the first and buffers the second
+        server.sendall(b"+ idling\r\n* 3 EXISTS\r\n")
+        assert mail.file.readline() == b"+ idling\r\n"
+        assert ReplyListener._readable(mail, 0.1)
+        assert mail.file.readline() == b"* 3 EXISTS\r\n"
+        assert not ReplyListener._readable(mail, 0.1)
+        server.sendall(b"* 4 EXISTS\r\n")
+        assert ReplyListener._readable(mail, 1.0)
+        assert mail.file.readline() == b"* 4 EXISTS\r\n"
+    finally:
+        server.close()
+        client.close()
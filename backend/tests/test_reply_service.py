@@ -0,0 +1,36 @@
+from app.services.reply_service import parse_fetch_response, uid_set
+
+
+def test_fetch_response_is_grouped_by_uid_wherever_the_uid_appears():
+    data = [
+        (b"1 (UID 11 BODY[HEADER.FIELDS (FROM SUBJECT IN-REPLY-TO)] {24}", b"From: hr@acme.io\r\n\r\n"),
+        (b" BODY[1.MIME] {30}", b"Content-Type: text/plain\r\n\r\n"),
+        (b" BODY[1]<0> {5}", b"Thank"),
+        b")",
+        # Some servers send the UID after the literals
+        (b"2 (BODY[HEADER.FIELDS (FROM SUBJECT IN-REPLY-TO)] {20}", b"From: mailer@x.io\r\n"),
+        (b" BODY[2] {40}", b"Final-Recipient: rfc822; gone@acme.io\r\n"),
+        b" UID 12)",
+        (b"3 (UID 13 RFC822 {8}", b"raw mail"),
+        b")",
+    ]
+    assert parse_fetch_response(data) == {
+        11: {"header": b"From: hr@acme.io\r\n\r\n", "mime": b"Content-Type: text/plain\r\n\r\n", "partial": b"Thank"},
+        12: {"header": b"From: mailer@x.io\r\n", "status": b"Final-Recipient: rfc822; gone@acme.io\r\n"},
+        13: {"full": b"raw mail"},
+    }
+
+
+def test_messages_without_a_uid_and_stray_lines_are_dropped():
+    data = [
+        b"* 5 EXISTS",
+        (b"4 (BODY[HEADER.FIELDS (FROM)] {5}", b"From:"),
+        b")",
+        None,
+    ]
+    assert parse_fetch_response(data) == {}
+
+
+def test_uid_set_collapses_sorted_runs():
+    assert uid_set([1, 2, 3, 5, 6, 7, 9]) == "1:3,5:7,9"
+    assert uid_set([]) == ""
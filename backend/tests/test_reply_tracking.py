@@ -0,0 +1,34 @@
+from app.core.database import SessionLocal
+from app.models.reply import Reply
+from app.services.reply_tracking import STORED_ID_LENGTH, ReplyTracker, stored_id
+
+
+def test_long_message_ids_are_shortened_consistently():
+    long_id = "<" + "a" * 300 + "@mail.example.com>"
+    shortened = stored_id(long_id)
+    assert len(shortened) == STORED_ID_LENGTH
+    assert stored_id(long_id) == shortened
+    assert stored_id(long_id.replace("a@", "b@")) != shortened
+    assert stored_id("<1@mail.example.com>") == "<1@mail.example.com>"
+    assert stored_id(None) is None
+
+
+def test_replies_with_over_long_headers_are_saved_once():
+    long_id = "<" + "x" * 400 + "@long.example.com>"
+    reply = {
+        "message_id": long_id,
+        "in_reply_to": "<" + "y" * 400 + "@long.example.com>",
+        "from": "hr@long.example.com",
+        "subject": "Re: Application",
+    }
+    tracker = ReplyTracker()
+    db = SessionLocal()
+    try:
+        (row,) = tracker.save(db, [reply])
+        db.commit()
+        assert len(row.message_id) == len(row.in_reply_to) == STORED_ID_LENGTH
+        # The same message scanned again is recognised by its shortened id
+        assert tracker.save(db, [reply]) == []
+        assert db.query(Reply).filter_by(message_id=stored_id(long_id)).count() == 1
+    finally:
+        db.close()
@@ -0,0 +1,118 @@
+import smtplib
+import socket
+
+import pytest
+
+from app.services.send_scheduler import (
+    MIN_RATE,
+    RECOVERY_SECONDS,
+    THROTTLE_PAUSE_SECONDS,
+    AdaptiveBucket,
+    SendDeferred,
+    SendScheduler,
+    TokenBucket,
+    classify_failure,
+    retry_delay,
+)
+
+
+def test_rate_never_drops_below_the_floor():
+    bucket = AdaptiveBucket(rate=0.08)
+    bucket.throttled(0.0)
+    assert bucket.rate == MIN_RATE
+
+
+def test_burst_goes_through_then_sends_are_spaced():
+    bucket = TokenBucket(rate=10, burst=3)
+    for _ in range(3):
+        assert bucket.delay(100.0) == 0
+        bucket.consume(100.0)
+    assert bucket.delay(100.0) == pytest.approx(0.1)
+    # Tokens come back at the configured rate
+    assert bucket.delay(100.1) == pytest.approx(0.0)
+
+
+def test_unlimited_bucket_only_waits_out_a_pause():
+    bucket = TokenBucket(rate=0)
+    for _ in range(100):
+        bucket.consume(5.0)
+    assert bucket.delay(5.0) == 0
+    bucket.pause(8.0)
+    assert bucket.delay(5.0) == pytest.approx(3.0)
+
+
+def test_throttling_halves_the_rate_once_per_pause_and_success_restores_it():
+    bucket = AdaptiveBucket(rate=10)
+    assert bucket.throttled(0.0) == THROTTLE_PAUSE_SECONDS
+    assert bucket.rate == 5
+    assert bucket.delay(0.0) == pytest.approx(THROTTLE_PAUSE_SECONDS)
+    # Replies to sends already in flight do not cut it again
+    bucket.throttled(1.0)
+    assert (bucket.rate, bucket.throttle_count) == (5, 1)
+
+    for step in range(24):
+        bucket.succeeded(40.0 + step)
+    assert bucket.rate == pytest.approx(9.8)
+    bucket.succeeded(70.0)
+    bucket.succeeded(71.0)
+    assert bucket.rate == 10
+
+
+def test_unlimited_bucket_is_limited_after_throttling_until_a_quiet_period():
+    bucket = AdaptiveBucket(rate=0)
+    # Nothing sent recently to measure: assume 1 msg/s and halve it
+    bucket.throttled(0.0)
+    assert bucket.rate == 0.5
+    bucket.succeeded(60.0)
+    assert bucket.rate == pytest.approx(0.505)
+    bucket.succeeded(RECOVERY_SECONDS + 1)
+    assert bucket.rate == 0
+
+
+def test_a_slow_domain_is_deferred_without_holding_up_others():
+    scheduler = SendScheduler(domain_rate=0.1, domain_burst=1, max_wait=0.5)
+    scheduler.acquire("a@slow.com")
+    with pytest.raises(SendDeferred) as deferred:
+        scheduler.acquire("b@slow.com")
+    assert deferred.value.scope == "domain"
+    assert deferred.value.delay == pytest.approx(10, abs=0.1)
+    scheduler.acquire("c@fast.com")
+    assert scheduler.deferred == 1
+
+
+def test_domain_throttling_leaves_the_account_rate_alone():
+    scheduler = SendScheduler(account_rate=20, domain_rate=4)
+    assert scheduler.throttled("a@busy.com", "domain") == pytest.approx(THROTTLE_PAUSE_SECONDS, abs=0.1)
+    stats = scheduler.stats()
+    assert stats["throttled_domains"] == {"busy.com": 2}
+    assert stats["account_rate"] == 20
+
+
+@pytest.mark.parametrize("code, expected", [
+    (421, ("account", True)),
+    (454, ("account", True)),
+    (450, ("domain", True)),
+    (451, ("domain", True)),
+    (452, ("domain", True)),
+    (447, (None, True)),
+    (550, (None, False)),
+    (554, (None, False)),
+])
+def test_reply_codes_map_to_scope_and_retryability(code, expected):
+    refused = smtplib.SMTPRecipientsRefused({"a@x.com": (code, b"reply")})
+    assert classify_failure(refused, "a@x.com") == expected
+    assert classify_failure(smtplib.SMTPResponseException(code, b"reply"), "a@x.com") == expected
+
+
+def test_connection_errors_are_retryable_and_others_are_not():
+    assert classify_failure(smtplib.SMTPServerDisconnected(), "a@x.com") == (None, True)
+    assert classify_failure(socket.timeout(), "a@x.com") == (None, True)
+    assert classify_failure(ConnectionResetError(), "a@x.com") == (None, True)
+    assert classify_failure(ValueError("bad address"), "a@x.com") == (None, False)
+
+
+def test_retry_delay_backs_off_exponentially_with_jitter_up_to_the_cap():
+    for attempt, ceiling in ((1, 60), (2, 120), (3, 240), (10, 3600)):
+        delays = [retry_delay(attempt, 60, 3600) for _ in range(200)]
+        assert all(ceiling / 2 <= delay <= ceiling for delay in delays)
+        assert len(set(delays)) > 1
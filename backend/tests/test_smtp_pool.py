@@ -0,0 +1,39 @@
+import threading
+
+import pytest
+
+from app.core.config import get_settings
+from app.services.email_service import EmailService
+from app.services.send_scheduler import SMTPPoolClosed, classify_failure
+from app.services.smtp_pool import get_smtp_pool
+from benchmarks.fakes import FakeSMTPServer
+
+
+def test_closing_the_pool_lets_a_running_send_finish():
+    recipients = [f"person{i}@company{i % 5}.com" for i in range(40)]
+    with FakeSMTPServer(latency=0.01) as smtp:
+        settings = get_settings().model_copy(update={"SMTP_SERVER": smtp.host, "SMTP_PORT": smtp.port})
+        pool = get_smtp_pool(settings)
+        # What a credentials reload does to the old pool mid-campaign
+        threading.Timer(0.05, pool.close).start()
+        result = EmailService(settings).send_each([(r, "hi", "body") for r in recipients])
+        assert result.sent_count == len(recipients)
+        assert smtp.delivered == len(recipients)
+        # Once the last lease ends the connections are quit and the pool refuses new work
+        assert pool._idle.qsize() == 0
+        with pytest.raises(SMTPPoolClosed):
+            pool.acquire()
+
+
+def test_closed_pool_is_a_transient_failure():
+    assert classify_failure(SMTPPoolClosed("SMTP pool is closed"), "a@example.com") == (None, True)
+
+
+def test_send_on_a_drained_pool_is_retried_not_failed():
+    with FakeSMTPServer() as smtp:
+        settings = get_settings().model_copy(update={"SMTP_SERVER": smtp.host, "SMTP_PORT": smtp.port})
+        pool = get_smtp_pool(settings)
+        pool.close()
+        result = EmailService(settings)._send_one(pool, EmailService(settings).prepare("hi", "body"), "a@example.com")
+    assert not result.success
+    assert result.retry_after is not None
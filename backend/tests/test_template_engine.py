@@ -0,0 +1,41 @@
+import pytest
+
+from app.services.template_engine import CompiledTemplate, TemplateSyntaxError, compile_text
+
+
+def test_fields_and_escaped_braces_survive_compilation():
+    compiled = compile_text("Hi {first_name}, {{not a field}} at {company}")
+    assert compiled == "Hi {first_name}, {{not a field}} at {company}"
+    assert compiled.format(first_name="Ann", company="Acme") == "Hi Ann, {not a field} at Acme"
+
+
+def test_text_without_placeholders_is_unchanged():
+    assert compile_text("Plain text") == "Plain text"
+    assert compile_text("") == ""
+    assert compile_text(None) == ""
+
+
+@pytest.mark.parametrize("text", [
+    "Hi {salary}",
+    "Hi {name.__class__}",
+    "Hi {name[0]}",
+    "Hi {name:>20}",
+    "Hi {name!r}",
+    "Hi {name",
+    "Hi name}",
+])
+def test_unsafe_or_malformed_placeholders_are_rejected(text):
+    with pytest.raises(TemplateSyntaxError):
+        compile_text(text)
+
+
+def test_field_list_can_be_narrowed():
+    with pytest.raises(TemplateSyntaxError):
+        compile_text("Hi {email}", fields={"name"})
+
+
+def test_missing_contact_fields_render_empty():
+    template = CompiledTemplate("{position} at {company}", "Dear {first_name},\n{name} <{email}>")
+    subject, body = template.render_contact({"name": "Ann Lee", "email": "ann@acme.io"})
+    assert subject == " at "
+    assert body == "Dear Ann,\nAnn Lee <ann@acme.io>"
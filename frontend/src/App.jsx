@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { FiSend, FiMenu, FiX, FiArrowRight, FiEdit2, FiSettings } from 'react-icons/fi';
-import { emailService, resumeService } from './api/apiClient';
+import { emailService, resumeService, campaignService, CAMPAIGN_DONE_STATUSES } from './api/apiClient';
 
 import HRTable from './components/HRTable';
 import AIPrompt from './components/AIPrompt';
@@ -27,6 +27,7 @@ function App() {
   const [composeStep, setComposeStep] = useState('select'); // 'select' | 'generate' | 'edit' | 'preview'
   const [emailDraft, setEmailDraft] = useState({ subject: '', body: '' });
   const [isGenerating, setIsGenerating] = useState(false);
+  const [streamingText, setStreamingText] = useState('');
   const [isSending, setIsSending] = useState(false);
   const [toast, setToast] = useState(null);
 
@@ -47,6 +48,10 @@ function App() {
 
   useEffect(() => {
     loadResumes();
+    // Pick up sends that were still being delivered when the page was closed
+    campaigns
+      .filter((campaign) => campaign.jobId && !CAMPAIGN_DONE_STATUSES.includes(campaign.status))
+      .forEach((campaign) => trackCampaign(campaign.jobId));
   }, []);
 
   useEffect(() => {
@@ -99,6 +104,7 @@ function App() {
     }
 
     setIsGenerating(true);
+    setStreamingText('');
 
     try {
       let fullContext = context;
@@ -108,7 +114,7 @@ function App() {
         fullContext += `\n\nResume:\n${resume.content}`;
       }
 
-      const data = await emailService.generateDraft(prompt, fullContext);
+      const data = await emailService.streamDraft(prompt, fullContext, (_, content) => setStreamingText(content));
       processEmailContent(data);
       setComposeStep('edit');
       showToast('Email generated successfully!', 'success');
@@ -146,6 +152,31 @@ function App() {
 
   /* ============ Send Email ============ */
 
+  const updateCampaign = (jobId, changes) => {
+    setCampaigns((current) =>
+      current.map((campaign) => (campaign.jobId === jobId ? { ...campaign, ...changes } : campaign))
+    );
+  };
+
+  // The server sends in the background; follow its progress until every recipient has an outcome
+  const trackCampaign = async (jobId) => {
+    try {
+      const result = await campaignService.waitForCompletion(jobId, (progress) =>
+        updateCampaign(jobId, { status: progress.status, sent: progress.sent, failed: progress.failed })
+      );
+      if (result.status === 'failed' && !result.sent) {
+        showToast('Sending failed. Check your email settings and try again.', 'error');
+      } else if (result.failed) {
+        showToast(`Sent ${result.sent} of ${result.total} emails; ${result.failed} failed`, 'warning');
+      } else {
+        showToast(`All ${result.sent} emails sent!`, 'success');
+      }
+    } catch (err) {
+      console.error(err);
+      showToast('Lost track of the send; check Campaign History later', 'error');
+    }
+  };
+
   const handleSend = async () => {
     if (!emailService.validateEmails(selectedHRs)) {
       showToast('Invalid email detected', 'error');
@@ -155,19 +186,23 @@ function App() {
     setIsSending(true);
 
     try {
-      await emailService.sendBulk(selectedHRs, emailDraft.subject, emailDraft.body);
+      const job = await emailService.sendBulk(selectedHRs, emailDraft.subject, emailDraft.body);
 
       const campaign = {
+        jobId: job.job_id,
         subject: emailDraft.subject,
         body: emailDraft.body,
-        recipientCount: selectedHRs.length,
+        recipientCount: job.recipient_count,
         date: new Date().toLocaleDateString(),
-        status: 'sent',
+        status: job.status,
+        sent: 0,
+        failed: 0,
         recipients: selectedHRs,
       };
 
-      setCampaigns([campaign, ...campaigns]);
-      showToast('Emails sent successfully!', 'success');
+      setCampaigns((current) => [campaign, ...current]);
+      showToast(`Sending to ${job.recipient_count} recipients…`, 'info');
+      trackCampaign(job.job_id);
 
       // Reset flow
       setTimeout(() => {
@@ -177,7 +212,7 @@ function App() {
       }, 2000);
     } catch (err) {
       console.error(err);
-      showToast('Failed to send emails', 'error');
+      showToast('Failed to queue emails', 'error');
     } finally {
       setIsSending(false);
     }
@@ -280,6 +315,7 @@ function App() {
                       <AIPrompt
                         onGenerate={handleGenerate}
                         loading={isGenerating}
+                        streamingText={streamingText}
                         resumes={resumes}
                         selectedResumeId={selectedResumeId}
                         onSelectResume={setSelectedResumeId}
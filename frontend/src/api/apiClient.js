@@ -27,6 +27,44 @@ export const emailService = {
     }
   },
 
+  // Streams the draft over server-sent events, calling onDelta with each chunk
+  async streamDraft(prompt, context = 'Job application for a software role', onDelta = () => {}) {
+    const response = await fetch(`${API_BASE_URL}/email-tools/generate-content/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ prompt, context }),
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Generation failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let content = '';
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      const events = buffer.split('\n\n');
+      buffer = events.pop();
+      for (const rawEvent of events) {
+        const lines = rawEvent.split('\n');
+        const eventType = lines.find((line) => line.startsWith('event: '))?.slice(7) || 'message';
+        const data = JSON.parse(lines.find((line) => line.startsWith('data: '))?.slice(6) || '{}');
+        if (eventType === 'error') throw new Error(data.detail || 'Generation failed');
+        if (eventType === 'done') return { content };
+        if (data.delta) {
+          content += data.delta;
+          onDelta(data.delta, content);
+        }
+      }
+    }
+    return { content };
+  },
+
   async sendBulk(hrEmails, subject, body) {
     try {
       const res = await apiClient.post('/email-tools/send-bulk', { 
@@ -58,6 +96,41 @@ export const emailService = {
   }
 };
 
+// Campaign Service
+export const campaignService = {
+  async getProgress(campaignId) {
+    try {
+      const response = await apiClient.get(`/campaigns/${campaignId}/progress`);
+      return response.data;
+    } catch (error) {
+      return handleError(error);
+    }
+  },
+
+  async getStats(campaignId) {
+    try {
+      const response = await apiClient.get(`/campaigns/${campaignId}/stats`);
+      return response.data;
+    } catch (error) {
+      return handleError(error);
+    }
+  },
+
+  // Poll a queued bulk send until the worker finishes it, reporting each step to onProgress
+  async waitForCompletion(campaignId, onProgress = () => {}, intervalMs = 2000) {
+    for (;;) {
+      const progress = await this.getProgress(campaignId);
+      onProgress(progress);
+      if (CAMPAIGN_DONE_STATUSES.includes(progress.status)) {
+        return progress;
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  },
+};
+
+export const CAMPAIGN_DONE_STATUSES = ['sent', 'failed'];
+
 // Resume Service
 export const resumeService = {
   async listResumes() {
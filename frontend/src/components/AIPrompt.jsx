@@ -1,7 +1,7 @@
 import React, { useState } from 'react';
 import { FiZap, FiRefreshCw } from 'react-icons/fi';
 
-export default function AIPrompt({ onGenerate, loading, resumes = [], selectedResumeId, onSelectResume }) {
+export default function AIPrompt({ onGenerate, loading, streamingText = '', resumes = [], selectedResumeId, onSelectResume }) {
   const [input, setInput] = useState("");
   const [context, setContext] = useState("Job application for a software role");
   const [wordLength, setWordLength] = useState("100-200");
@@ -170,6 +170,14 @@ export default function AIPrompt({ onGenerate, loading, resumes = [], selectedRe
         </div>
       </div>
 
+      {/* Live Preview while the draft streams in */}
+      {loading && streamingText && (
+        <div className="bg-gray-50 border border-gray-200 rounded-lg p-3 max-h-48 overflow-y-auto">
+          <p className="text-xs font-semibold text-gray-600 mb-2">✍️ Writing...</p>
+          <p className="text-sm text-gray-700 whitespace-pre-wrap">{streamingText}</p>
+        </div>
+      )}
+
       {/* Generate Button */}
       <button
         onClick={handleGenerate}
@@ -38,6 +38,7 @@ export default function CampaignHistory({ campaigns, onDelete }) {
                   <p className="font-semibold text-gray-800 truncate">{campaign.subject}</p>
                   <p className="text-xs text-gray-500 mt-1">
                     {campaign.recipientCount} recipients • {campaign.date}
+                    {campaign.jobId && ` • ${campaign.sent || 0} sent, ${campaign.failed || 0} failed`}
                   </p>
                 </div>
                 <div className="flex items-center gap-2">